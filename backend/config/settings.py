@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
@@ -63,6 +64,7 @@ SITE_ID = 1
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.compressao.CompressaoMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -108,6 +110,13 @@ DATABASES = {
     }
 }
 
+# SQLite: banco de teste em arquivo (e não em memória), para que os processos
+# filhos de core/processos.py enxerguem os dados dos testes
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['TEST'] = {
+        'NAME': config('DB_TEST_NAME', default=str(BASE_DIR / 'test_db.sqlite3'))
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -162,7 +171,7 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
-CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken']
+CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken', 'ETag', 'X-Matriz-Hash', 'X-Exportacao-Cache']
 CORS_ALLOW_METHODS = [
     'DELETE',
     'GET',
@@ -209,11 +218,63 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON via orjson, com fallback para o json da biblioteca padrão, e os
+    # formatos compactos escolhidos pelo cliente via Accept (core.renderers)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.JSONRapidoRenderer',
+        'core.renderers.ColunarJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'core.renderers.ColunarMessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.JSONRapidoParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
+# Compressão das respostas (core.compressao)
+# Níveis por requisição são rápidos; variantes guardadas em cache são geradas uma vez
+COMPRESSAO_TAMANHO_MINIMO = config('COMPRESSAO_TAMANHO_MINIMO', default=1024, cast=int)
+COMPRESSAO_GZIP_NIVEL = config('COMPRESSAO_GZIP_NIVEL', default=6, cast=int)
+COMPRESSAO_GZIP_NIVEL_CACHE = config('COMPRESSAO_GZIP_NIVEL_CACHE', default=9, cast=int)
+COMPRESSAO_BROTLI_QUALIDADE = config('COMPRESSAO_BROTLI_QUALIDADE', default=5, cast=int)
+COMPRESSAO_BROTLI_QUALIDADE_CACHE = config('COMPRESSAO_BROTLI_QUALIDADE_CACHE', default=9, cast=int)
+
+# Paginação opcional por cursor das listagens (core.pagination.CursorPaginacao)
+PAGINACAO_TAMANHO_PADRAO = config('PAGINACAO_TAMANHO_PADRAO', default=100, cast=int)
+PAGINACAO_TAMANHO_MAXIMO = config('PAGINACAO_TAMANHO_MAXIMO', default=1000, cast=int)
+
+# Tarefas em segundo plano (core.services.TarefaService)
+# Com False, as tarefas ficam pendentes para o comando `processar_tarefas`
+TAREFAS_EM_SEGUNDO_PLANO = config('TAREFAS_EM_SEGUNDO_PLANO', default=True, cast=bool)
+TAREFAS_MAX_WORKERS = config('TAREFAS_MAX_WORKERS', default=2, cast=int)
+# Tarefas em execução sem atualização (progresso) por mais que isso são
+# consideradas interrompidas e marcadas como erro por `processar_tarefas`
+TAREFAS_TEMPO_LIMITE = config('TAREFAS_TEMPO_LIMITE', default=60 * 60, cast=int)
+
+# Planilhas enviadas para importação em segundo plano (removidas ao final da tarefa)
+IMPORTACOES_DIR = config('IMPORTACOES_DIR', default=str(BASE_DIR / 'importacoes'))
+
+# Processos usados na leitura das abas da matriz (core.services.MatrizImportService)
+# Com 1, as abas são lidas no próprio processo; com mais, o progresso da
+# leitura nas tarefas de importação avança por bloco de abas
+IMPORTACAO_MAX_PROCESSOS = config('IMPORTACAO_MAX_PROCESSOS', default=min(os.cpu_count() or 1, 4), cast=int)
+
+# Processos usados na exportação Tutory em lote (core.services.ExportacaoLoteService)
+EXPORTACAO_MAX_PROCESSOS = config('EXPORTACAO_MAX_PROCESSOS', default=4, cast=int)
+# Máximo de concursos por requisição de /api/concursos/exportar-lote/
+EXPORTACAO_LOTE_MAXIMO_CONCURSOS = config('EXPORTACAO_LOTE_MAXIMO_CONCURSOS', default=100, cast=int)
+
+# Cache LRU das planilhas exportadas, por processo (core.services.ExportacaoCacheService)
+EXPORTACAO_CACHE_TAMANHO_MAXIMO = config('EXPORTACAO_CACHE_TAMANHO_MAXIMO', default=64 * 2**20, cast=int)
+EXPORTACAO_CACHE_TAMANHO_MAXIMO_ENTRADA = config('EXPORTACAO_CACHE_TAMANHO_MAXIMO_ENTRADA', default=16 * 2**20, cast=int)
+
+# Cache LRU do detalhe dos concursos (JSON e variantes comprimidas), por processo
+# (core.services.ConcursoDetalheCacheService)
+CONCURSO_CACHE_TAMANHO_MAXIMO = config('CONCURSO_CACHE_TAMANHO_MAXIMO', default=64 * 2**20, cast=int)
+CONCURSO_CACHE_TAMANHO_MAXIMO_ENTRADA = config('CONCURSO_CACHE_TAMANHO_MAXIMO_ENTRADA', default=16 * 2**20, cast=int)
+
 # Simple JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -9,7 +9,9 @@ from .models import (
     Subassunto,
     Concurso,
     MapaAssunto,
-    MetadadosAssunto
+    MetadadosAssunto,
+    Tarefa,
+    ImportacaoMatriz
 )
 
 
@@ -101,3 +103,22 @@ class MetadadosAssuntoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(Tarefa)
+class TarefaAdmin(admin.ModelAdmin):
+    """Admin para Tarefas em segundo plano"""
+    list_display = ['id', 'tipo', 'estado', 'criado_por', 'created_at', 'concluida_em']
+    list_filter = ['tipo', 'estado', 'created_at']
+    readonly_fields = [
+        'tipo', 'estado', 'parametros', 'progresso', 'resultado', 'erro',
+        'criado_por', 'iniciada_em', 'concluida_em', 'created_at', 'updated_at'
+    ]
+
+
+@admin.register(ImportacaoMatriz)
+class ImportacaoMatrizAdmin(admin.ModelAdmin):
+    """Admin para o histórico de importações da matriz"""
+    list_display = ['id', 'hash_arquivo', 'created_at']
+    list_filter = ['created_at']
+    readonly_fields = ['hash_arquivo', 'abas', 'estatisticas', 'created_at', 'updated_at']
@@ -0,0 +1,48 @@
+"""
+Filtro de busca das listagens sobre o índice textual (ver BuscaService).
+
+Substitui o SearchFilter do DRF nas viewsets da matriz e dos mapas: em vez
+de `icontains` em cada campo de `search_fields` (varredura completa das
+tabelas unidas, sensível a acentos), cada termo de ?search= é procurado no
+índice full-text e vira uma subconsulta `pk__in` por tipo indexado.
+
+A viewset declara em `busca_indexada` quais tipos do índice valem para os
+seus registros e por qual campo:
+
+    busca_indexada = {'assunto': 'pk', 'disciplina': 'disciplina_id'}
+
+Como no SearchFilter, um registro é retornado quando cada termo casa com
+algum dos tipos. `search_fields` continua sendo usado no schema da API e
+pelas viewsets sem `busca_indexada`.
+"""
+
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+from rest_framework import filters
+
+from .services import BuscaService
+
+
+class BuscaIndexadaFilter(filters.SearchFilter):
+    """SearchFilter que consulta o índice de busca, sem acentos e por prefixo"""
+
+    def filter_queryset(self, request, queryset, view):
+        indexados = getattr(view, 'busca_indexada', None)
+        if not indexados:
+            return super().filter_queryset(request, queryset, view)
+
+        condicoes = []
+        for termo in self.get_search_terms(request):
+            alternativas = [
+                Q(**{f'{campo}__in': ids})
+                for tipo, campo in indexados.items()
+                if (ids := BuscaService.correspondencias(termo, tipo)) is not None
+            ]
+            if alternativas:
+                condicoes.append(reduce(or_, alternativas))
+
+        if not condicoes:
+            return queryset
+        return queryset.filter(reduce(and_, condicoes))
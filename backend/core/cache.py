@@ -0,0 +1,92 @@
+"""
+Cache em memória do processo, limitado por tamanho, com descarte LRU.
+
+Usado para artefatos gerados (ex.: planilhas exportadas) que são caros de
+montar e grandes demais para o cache padrão do Django. Cada processo do
+servidor mantém o seu próprio cache.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Cache de bytes limitado pelo tamanho total dos valores.
+
+    Ao ultrapassar `tamanho_maximo`, descarta as entradas usadas há mais
+    tempo. Valores maiores que `tamanho_maximo_entrada` não são guardados.
+
+    Attributes:
+        acertos (int): Leituras encontradas no cache
+        falhas (int): Leituras não encontradas
+        descartes (int): Entradas removidas para liberar espaço
+    """
+
+    def __init__(self, tamanho_maximo, tamanho_maximo_entrada=None):
+        self.tamanho_maximo = tamanho_maximo
+        self.tamanho_maximo_entrada = tamanho_maximo_entrada or tamanho_maximo
+        self._entradas = OrderedDict()
+        self._tamanho = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave):
+        """Retorna o valor da chave (marcando-a como recente) ou None"""
+        with self._lock:
+            valor = self._entradas.get(chave)
+            if valor is None:
+                self.falhas += 1
+                return None
+
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor):
+        """
+        Guarda o valor, descartando as entradas mais antigas se necessário.
+
+        Returns:
+            bool: False se o valor for grande demais para o cache
+        """
+        tamanho = len(valor)
+        if tamanho > self.tamanho_maximo_entrada:
+            return False
+
+        with self._lock:
+            anterior = self._entradas.pop(chave, None)
+            if anterior is not None:
+                self._tamanho -= len(anterior)
+
+            self._entradas[chave] = valor
+            self._tamanho += tamanho
+
+            while self._tamanho > self.tamanho_maximo:
+                _, descartado = self._entradas.popitem(last=False)
+                self._tamanho -= len(descartado)
+                self.descartes += 1
+
+        return True
+
+    def limpar(self):
+        """Remove todas as entradas (os contadores são mantidos)"""
+        with self._lock:
+            self._entradas.clear()
+            self._tamanho = 0
+
+    def estatisticas(self):
+        """Retorna ocupação e contadores do cache"""
+        with self._lock:
+            leituras = self.acertos + self.falhas
+            return {
+                'entradas': len(self._entradas),
+                'tamanho': self._tamanho,
+                'tamanho_maximo': self.tamanho_maximo,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'descartes': self.descartes,
+                'taxa_acerto': round(self.acertos / leituras, 4) if leituras else None,
+            }
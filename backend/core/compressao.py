@@ -0,0 +1,182 @@
+"""
+Compressão das respostas da API (gzip e brotli).
+
+Respostas comuns são comprimidas por requisição no CompressaoMiddleware,
+com níveis rápidos. Corpos cacheáveis (snapshot da matriz, detalhe do
+concurso) guardam as variantes comprimidas ao lado do corpo, com níveis
+mais altos, e são servidos com `resposta_precomprimida()`.
+
+O tempo gasto comprimindo é informado no cabeçalho Server-Timing
+(métrica `comp`; zero quando a variante veio do cache).
+
+Brotli é usado quando o pacote `brotli` está instalado e o cliente o aceita.
+"""
+
+import gzip
+import re
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+
+# Em ordem de preferência do servidor
+CODIFICACOES = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Páginas HTML (admin) ficam de fora: com tokens CSRF no corpo, estariam expostas ao BREACH
+TIPOS_COMPRIMIVEIS = re.compile(r'^(text/(plain|csv)|application/([\w.+-]+\+)?(json|msgpack))\b')
+
+
+def escolher_codificacao(request):
+    """
+    Codificação a usar para o cliente, pelo cabeçalho Accept-Encoding.
+
+    Entre as aceitas (q > 0), prefere o maior q e, no empate, a ordem de
+    CODIFICACOES.
+
+    Returns:
+        str: 'br', 'gzip' ou None
+    """
+    cabecalho = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if not cabecalho:
+        return None
+
+    pesos = {}
+    for parte in cabecalho.split(','):
+        nome, _, parametros = parte.strip().partition(';')
+        peso = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith('q='):
+            try:
+                peso = float(parametro[2:])
+            except ValueError:
+                peso = 0.0
+        pesos[nome.strip().lower()] = peso
+
+    coringa = pesos.get('*', 0.0)
+    aceitas = [
+        (pesos.get(codificacao, coringa), -indice, codificacao)
+        for indice, codificacao in enumerate(CODIFICACOES)
+    ]
+    peso, _, codificacao = max(aceitas)
+    return codificacao if peso > 0 else None
+
+
+def comprimir(corpo, codificacao, cache=False):
+    """
+    Comprime `corpo` com `codificacao`.
+
+    Args:
+        corpo (bytes): Conteúdo original
+        codificacao (str): 'br' ou 'gzip'
+        cache (bool): Usa o nível de compressão das variantes guardadas em
+            cache (mais lento, comprime mais), em vez do nível por requisição
+
+    Returns:
+        bytes
+    """
+    if codificacao == 'br':
+        qualidade = settings.COMPRESSAO_BROTLI_QUALIDADE_CACHE if cache else settings.COMPRESSAO_BROTLI_QUALIDADE
+        return brotli.compress(corpo, quality=qualidade)
+
+    nivel = settings.COMPRESSAO_GZIP_NIVEL_CACHE if cache else settings.COMPRESSAO_GZIP_NIVEL
+    # mtime fixo: a mesma entrada gera sempre os mesmos bytes
+    return gzip.compress(corpo, compresslevel=nivel, mtime=0)
+
+
+def medir_compressao(corpo, codificacao, cache=False):
+    """
+    Comprime `corpo` medindo o tempo gasto.
+
+    Returns:
+        tuple: (bytes comprimidos, segundos)
+    """
+    inicio = time.perf_counter()
+    comprimido = comprimir(corpo, codificacao, cache)
+    return comprimido, time.perf_counter() - inicio
+
+
+def resposta_precomprimida(request, corpo, variante, content_type='application/json'):
+    """
+    Resposta com `corpo` ou a sua variante comprimida aceita pelo cliente.
+
+    Args:
+        request: HttpRequest
+        corpo (bytes): Conteúdo original
+        variante: Função (codificacao) -> (bytes, segundos gastos comprimindo
+            ou None se a variante já estava em cache)
+        content_type (str): Content-Type do corpo original
+
+    Returns:
+        HttpResponse
+    """
+    codificacao = escolher_codificacao(request) if len(corpo) >= settings.COMPRESSAO_TAMANHO_MINIMO else None
+
+    if codificacao is None:
+        response = HttpResponse(corpo, content_type=content_type)
+    else:
+        comprimido, duracao = variante(codificacao)
+        response = HttpResponse(comprimido, content_type=content_type)
+        response['Content-Encoding'] = codificacao
+        registrar_tempo(response, duracao or 0, codificacao if duracao is not None else f'{codificacao} (cache)')
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def registrar_tempo(response, segundos, descricao):
+    """Acrescenta a métrica `comp` ao cabeçalho Server-Timing"""
+    metrica = f'comp;dur={segundos * 1000:.1f};desc="{descricao}"'
+    anterior = response.get('Server-Timing')
+    response['Server-Timing'] = f'{anterior}, {metrica}' if anterior else metrica
+
+
+class CompressaoMiddleware:
+    """
+    Comprime por requisição as respostas da API (gzip ou brotli).
+
+    Ignora respostas em streaming (exportações), já codificadas (variantes
+    pré-comprimidas), pequenas (COMPRESSAO_TAMANHO_MINIMO) e de tipos que
+    não comprimem bem (planilhas e .zip já são comprimidos).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not TIPOS_COMPRIMIVEIS.match(response.get('Content-Type', '')):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.COMPRESSAO_TAMANHO_MINIMO:
+            return response
+
+        codificacao = escolher_codificacao(request)
+        if codificacao is None:
+            return response
+
+        comprimido, duracao = medir_compressao(response.content, codificacao)
+        if len(comprimido) >= len(response.content):
+            return response
+
+        response.content = comprimido
+        response['Content-Length'] = str(len(comprimido))
+        response['Content-Encoding'] = codificacao
+        registrar_tempo(response, duracao, codificacao)
+
+        # Mesma regra do GZipMiddleware do Django: o corpo mudou, o ETag passa a ser fraco
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        return response
@@ -0,0 +1,146 @@
+"""
+Benchmark da busca textual: icontains (SearchFilter) vs. índice de busca.
+
+Gera uma matriz sintética dentro de uma transação (desfeita ao final),
+indexa-a com BuscaService e compara, para alguns termos, o filtro
+?search= antigo (icontains nos campos de `search_fields`) com o filtro
+sobre o índice (BuscaIndexadaFilter) e com /api/busca/ (BuscaService.buscar).
+
+Uso:
+    python manage.py benchmark_busca
+    python manage.py benchmark_busca --assuntos 100000 --repeticoes 5
+"""
+
+import random
+import time
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from core.models import Disciplina, Assunto, Subassunto, IndiceBusca
+from core.services import BuscaService, ContadoresService
+
+
+PALAVRAS = (
+    'licitação', 'contrato', 'administração', 'pública', 'princípios', 'constitucional',
+    'improbidade', 'servidores', 'processo', 'ação', 'execução', 'tributário', 'competência',
+    'responsabilidade', 'civil', 'penal', 'crimes', 'contra', 'ordem', 'econômica', 'orçamento',
+    'receita', 'despesa', 'controle', 'externo', 'interno', 'concessão', 'permissão', 'serviços',
+    'poder', 'polícia', 'atos', 'administrativos', 'função', 'social', 'propriedade', 'direitos',
+    'garantias', 'fundamentais', 'organização', 'estado', 'município', 'regência', 'concordância',
+    'crase', 'pontuação', 'interpretação', 'textos', 'lógica', 'proposicional', 'estatística',
+)
+
+# Termos específicos (leis, institutos), cada um presente em poucas linhas
+RAROS = tuple(
+    f'{prefixo}{sufixo}'
+    for prefixo in ('ana', 'bene', 'cogni', 'dispo', 'emen', 'fisca', 'garan', 'habi', 'juris', 'lega')
+    for sufixo in ('tório', 'ção', 'cidade', 'mento', 'tivo', 'lidade', 'dição', 'ência', 'ismo', 'vel')
+)
+
+# Termo frequente, com e sem acento; termo raro; dois termos; prefixo
+TERMOS = ('licitação', 'licitacao', 'juristório', 'execução penal', 'orçam')
+
+
+class Command(BaseCommand):
+    help = 'Compara a busca por icontains com a busca no índice textual'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--disciplinas', type=int, default=40)
+        parser.add_argument('--assuntos', type=int, default=40000,
+                            help='Total de assuntos sintéticos')
+        parser.add_argument('--subassuntos', type=int, default=2,
+                            help='Subassuntos por assunto')
+        parser.add_argument('--repeticoes', type=int, default=3)
+
+    def handle(self, *args, **options):
+        repeticoes = max(options['repeticoes'], 1)
+
+        with transaction.atomic():
+            self._gerar_matriz(options['disciplinas'], options['assuntos'], options['subassuntos'])
+
+            inicio = time.perf_counter()
+            BuscaService.reindexar_matriz()
+            indexacao = time.perf_counter() - inicio
+            entradas = IndiceBusca.objects.count()
+
+            resultados = []
+            for termo in TERMOS:
+                icontains, ids_icontains = self._medir(lambda: self._icontains(termo), repeticoes)
+                indice, ids_indice = self._medir(lambda: self._indexado(termo), repeticoes)
+                busca, _ = self._medir(lambda: BuscaService.buscar(termo), repeticoes)
+                resultados.append((termo, len(ids_icontains), len(ids_indice), icontains, indice, busca))
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'{entradas} entradas indexadas em {indexacao:.1f}s ({connection.vendor}). '
+            f'Subassuntos: ?search= por nome do subassunto ou do assunto.'
+        )
+        self.stdout.write(
+            f"{'Termo':<30}{'icontains':>10}{'índice':>8}"
+            f"{'icontains (ms)':>16}{'índice (ms)':>13}{'Speedup':>9}{'/api/busca/ (ms)':>18}"
+        )
+        for termo, total_icontains, total_indice, icontains, indice, busca in resultados:
+            self.stdout.write(
+                f'{termo:<30}{total_icontains:>10}{total_indice:>8}'
+                f'{icontains * 1000:>16.1f}{indice * 1000:>13.1f}{icontains / indice:>8.1f}x'
+                f'{busca * 1000:>18.1f}'
+            )
+        self.stdout.write(
+            f'Tempos em ms (melhor de {repeticoes} execuções). O icontains não ignora acentos '
+            'nem a ordem das palavras; o índice casa cada termo pelo início das palavras.'
+        )
+
+    def _icontains(self, termo):
+        """?search= do SearchFilter em SubassuntoViewSet (search_fields = nome, assunto__nome)"""
+        queryset = Subassunto.objects.all()
+        for parte in termo.split():
+            queryset = queryset.filter(reduce(or_, (
+                Q(**{f'{campo}__icontains': parte}) for campo in ('nome', 'assunto__nome')
+            )))
+        return list(queryset.values_list('pk', flat=True))
+
+    def _indexado(self, termo):
+        """?search= do BuscaIndexadaFilter em SubassuntoViewSet"""
+        queryset = Subassunto.objects.all()
+        for parte in termo.split():
+            queryset = queryset.filter(
+                Q(pk__in=BuscaService.correspondencias(parte, 'subassunto')) |
+                Q(assunto_id__in=BuscaService.correspondencias(parte, 'assunto'))
+            )
+        return list(queryset.values_list('pk', flat=True))
+
+    def _medir(self, funcao, repeticoes):
+        """Executa `funcao` várias vezes; retorna o melhor tempo e o resultado"""
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempos.append(time.perf_counter() - inicio)
+        return min(tempos), resultado
+
+    def _gerar_matriz(self, total_disciplinas, total_assuntos, subassuntos_por_assunto):
+        """Cria a matriz com nomes sorteados de PALAVRAS (semente fixa)"""
+        sorteio = random.Random(42)
+
+        def nome(palavras):
+            return ' '.join([*sorteio.sample(PALAVRAS, palavras), sorteio.choice(RAROS)]).capitalize()
+
+        with ContadoresService.suspender():
+            disciplinas = Disciplina.objects.bulk_create([
+                Disciplina(nome=f'__benchmark__ {nome(2)} {i}', ordem=i)
+                for i in range(total_disciplinas)
+            ])
+            assuntos = Assunto.objects.bulk_create([
+                Assunto(disciplina=disciplinas[i % len(disciplinas)], nome=f'{nome(4)} {i}', ordem=i)
+                for i in range(total_assuntos)
+            ], batch_size=2000)
+            Subassunto.objects.bulk_create([
+                Subassunto(assunto=assunto, nome=nome(3), ordem=j)
+                for assunto in assuntos
+                for j in range(subassuntos_por_assunto)
+            ], batch_size=2000)
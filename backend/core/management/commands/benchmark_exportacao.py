@@ -0,0 +1,139 @@
+"""
+Benchmark da exportação Tutory: workbook completo em memória vs. write-only.
+
+Gera um concurso sintético dentro de uma transação (desfeita ao final) e
+compara latência e pico de memória (tracemalloc) dos dois caminhos.
+
+Uso:
+    python manage.py benchmark_exportacao
+    python manage.py benchmark_exportacao --linhas 100000
+"""
+
+import time
+import tracemalloc
+from io import BytesIO
+
+import openpyxl
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import FileResponse
+
+from core.models import Disciplina, Assunto, Subassunto, Concurso, MapaAssunto, MetadadosAssunto
+from core.services import ContadoresService, ExportacaoTutoryService
+
+
+class Command(BaseCommand):
+    help = 'Compara memória e latência da exportação Tutory (em memória vs. streaming)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=50000,
+                            help='Itens no mapa do concurso sintético')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            concurso = self._gerar_concurso(options['linhas'])
+
+            resultados = {}
+            for nome, funcao in (('em memória', self._exportar_em_memoria),
+                                 ('streaming', self._exportar_streaming)):
+                inicio = time.perf_counter()
+                tamanho = funcao(concurso)
+                duracao = time.perf_counter() - inicio
+
+                tracemalloc.start()
+                funcao(concurso)
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                resultados[nome] = (duracao, pico, tamanho)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'Caminho':<14}{'Tempo (s)':>12}{'Pico (MB)':>12}{'Arquivo (MB)':>14}")
+        for nome, (duracao, pico, tamanho) in resultados.items():
+            self.stdout.write(
+                f'{nome:<14}{duracao:>12.2f}{pico / 2**20:>12.1f}{tamanho / 2**20:>14.1f}'
+            )
+
+    def _gerar_concurso(self, total_linhas):
+        """Cria um concurso com `total_linhas` itens, todos com metadados"""
+        with ContadoresService.suspender():
+            disciplina = Disciplina.objects.create(nome='__benchmark__ Exportação')
+            assuntos = Assunto.objects.bulk_create([
+                Assunto(disciplina=disciplina, nome=f'Assunto {i}', ordem=i)
+                for i in range(max(total_linhas // 100, 1))
+            ])
+            subassuntos = Subassunto.objects.bulk_create([
+                Subassunto(assunto=assuntos[i % len(assuntos)], nome=f'Subassunto {i}', ordem=i)
+                for i in range(total_linhas)
+            ], batch_size=2000)
+
+            concurso = Concurso.objects.create(nome='__benchmark__', sigla='BENCH')
+            mapas = MapaAssunto.objects.bulk_create([
+                MapaAssunto(
+                    concurso=concurso,
+                    assunto_id=subassunto.assunto_id,
+                    subassunto=subassunto,
+                    ordem=i
+                )
+                for i, subassunto in enumerate(subassuntos)
+            ], batch_size=2000)
+            MetadadosAssunto.objects.bulk_create([
+                MetadadosAssunto(
+                    mapa_assunto=mapa,
+                    paginas_minutos=30,
+                    minutos_expresso='12.50',
+                    minutos_regular='25.00',
+                    minutos_calma='40.00',
+                    dica='Revise a legislação seca antes das questões.',
+                    link_pdf='https://exemplo.com/material.pdf',
+                    link_questoes='https://exemplo.com/questoes'
+                )
+                for mapa in mapas
+            ], batch_size=2000)
+
+        return concurso
+
+    def _exportar_em_memoria(self, concurso):
+        """Caminho anterior: Workbook completo, cell() por coluna e BytesIO"""
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = concurso.sigla[:31]
+        for col, header in enumerate(ExportacaoTutoryService.CABECALHOS, 1):
+            sheet.cell(row=1, column=col, value=header)
+
+        mapas = MapaAssunto.objects.filter(concurso=concurso).select_related(
+            'assunto', 'assunto__disciplina', 'subassunto'
+        ).prefetch_related('metadados').order_by('ordem')
+
+        for row, mapa in enumerate(mapas, start=2):
+            metadados = getattr(mapa, 'metadados', None)
+            valores = [
+                mapa.assunto.disciplina.nome,
+                f'{mapa.assunto.nome} - {mapa.subassunto.nome}',
+                metadados.paginas_minutos,
+                float(metadados.minutos_expresso),
+                float(metadados.minutos_regular),
+                float(metadados.minutos_calma),
+                metadados.dica, metadados.dica_revisoes, metadados.dica_questoes,
+                metadados.referencia, mapa.ordem,
+                metadados.peso_resumos, metadados.peso_revisoes, metadados.peso_questoes,
+                metadados.numero_questoes, metadados.link_pdf,
+                metadados.link_resumo, metadados.link_questoes,
+                1 if metadados.suplementar else 0
+            ]
+            for col, valor in enumerate(valores, 1):
+                sheet.cell(row=row, column=col, value=valor)
+
+        output = BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        return len(output.read())
+
+    def _exportar_streaming(self, concurso):
+        """Caminho atual: write-only + arquivo temporário + FileResponse"""
+        output = ExportacaoTutoryService().exportar_concurso(concurso)
+        response = FileResponse(output)
+        tamanho = sum(len(bloco) for bloco in response.streaming_content)
+        output.close()
+        return tamanho
@@ -0,0 +1,229 @@
+"""
+Benchmark dos formatos da API.
+
+Gera uma matriz e um concurso sintéticos dentro de uma transação (desfeita
+ao final) e serializa as maiores respostas da API com os serializers reais.
+
+Compara o tempo de renderização e de leitura do corpo entre o JSON do DRF
+e o JSON via orjson:
+
+- matriz: /api/disciplinas/ (árvore completa)
+- concurso: /api/concursos/{id}/ (mapa aninhado com metadados)
+- mapas: /api/mapas/ sem filtros
+
+E o tamanho e o tempo de leitura dos formatos compactos (JSON colunar e
+MessagePack) nas listagens /api/mapas/?concurso={id} e /api/metadados/.
+
+Uso:
+    python manage.py benchmark_json
+    python manage.py benchmark_json --itens 20000 --repeticoes 10
+"""
+
+import io
+import json
+import time
+
+import msgpack
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Disciplina, Assunto, Subassunto, Concurso, MapaAssunto, MetadadosAssunto
+from core.otimizacao import otimizar_queryset
+from core.renderers import (
+    ColunarJSONRenderer, ColunarMessagePackRenderer, JSONRapidoParser, JSONRapidoRenderer,
+    MessagePackRenderer, orjson
+)
+from core.serializers import ConcursoSerializer, MapaAssuntoSerializer, MetadadosAssuntoSerializer
+from core.services import ContadoresService, MatrizArvoreService
+
+
+class Command(BaseCommand):
+    help = 'Compara renderização, leitura e tamanho dos formatos da API (DRF, orjson, colunar, MessagePack)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--itens', type=int, default=5000,
+                            help='Itens no mapa do concurso sintético (e subassuntos na matriz)')
+        parser.add_argument('--repeticoes', type=int, default=5)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                'orjson não está instalado: JSONRapidoRenderer usa o json da biblioteca padrão.'
+            ))
+
+        repeticoes = max(options['repeticoes'], 1)
+        with transaction.atomic():
+            concurso = self._gerar_dados(options['itens'])
+
+            respostas = {
+                'matriz': lambda: MatrizArvoreService().montar(),
+                'concurso': lambda: self._serializar(
+                    ConcursoSerializer, Concurso.objects.filter(pk=concurso.pk)
+                )[0],
+                'mapas': lambda: self._serializar(MapaAssuntoSerializer, MapaAssunto.objects.all()),
+            }
+            resultados = {}
+            for nome, serializar in respostas.items():
+                resultados[nome] = self._comparar(serializar, repeticoes)
+
+            listagens = {
+                'mapas': self._serializar(
+                    MapaAssuntoSerializer, MapaAssunto.objects.filter(concurso=concurso)
+                ),
+                'metadados': self._serializar(
+                    MetadadosAssuntoSerializer,
+                    MetadadosAssunto.objects.filter(mapa_assunto__concurso=concurso)
+                ),
+            }
+            compactos = {
+                nome: self._comparar_formatos(dados, repeticoes)
+                for nome, dados in listagens.items()
+            }
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'Resposta':<10}{'KB':>8}{'Serializer':>12}"
+            f"{'Render DRF':>12}{'orjson':>10}{'Speedup':>9}"
+            f"{'Parse DRF':>11}{'orjson':>10}{'Speedup':>9}"
+        )
+        for nome, r in resultados.items():
+            self.stdout.write(
+                f"{nome:<10}{r['tamanho'] / 1024:>8.0f}{r['serializar'] * 1000:>12.1f}"
+                f"{r['render_drf'] * 1000:>12.1f}{r['render_rapido'] * 1000:>10.1f}"
+                f"{r['render_drf'] / r['render_rapido']:>8.1f}x"
+                f"{r['parse_drf'] * 1000:>11.1f}{r['parse_rapido'] * 1000:>10.1f}"
+                f"{r['parse_drf'] / r['parse_rapido']:>8.1f}x"
+            )
+        self.stdout.write('Tempos em ms (melhor de %d execuções).' % repeticoes)
+
+        if all(r['iguais'] for r in resultados.values()):
+            self.stdout.write(self.style.SUCCESS('JSON equivalente nos dois caminhos.'))
+        else:
+            diferentes = ', '.join(nome for nome, r in resultados.items() if not r['iguais'])
+            self.stdout.write(self.style.ERROR(f'JSON diferente entre os caminhos: {diferentes}'))
+
+        self.stdout.write('')
+        self.stdout.write(f"{'Listagem':<12}{'Formato':<17}{'KB':>8}{'Render (ms)':>13}{'Leitura (ms)':>14}")
+        for nome, formatos in compactos.items():
+            base = formatos['json']['tamanho']
+            for formato, r in formatos.items():
+                self.stdout.write(
+                    f"{nome:<12}{formato:<17}{r['tamanho'] / 1024:>8.0f}"
+                    f"{r['render'] * 1000:>13.1f}{r['leitura'] * 1000:>14.1f}"
+                    f"  ({base / r['tamanho']:.1f}x menor)"
+                )
+
+    def _comparar(self, serializar, repeticoes):
+        """Mede serialização, renderização e leitura de uma resposta"""
+        tempo_serializar, dados = self._medir(serializar, repeticoes)
+
+        tempo_drf, corpo_drf = self._medir(lambda: JSONRenderer().render(dados), repeticoes)
+        tempo_rapido, corpo_rapido = self._medir(lambda: JSONRapidoRenderer().render(dados), repeticoes)
+
+        parse_drf, lido = self._medir(lambda: JSONParser().parse(io.BytesIO(corpo_drf)), repeticoes)
+        parse_rapido, lido_rapido = self._medir(
+            lambda: JSONRapidoParser().parse(io.BytesIO(corpo_drf)), repeticoes
+        )
+
+        return {
+            'tamanho': len(corpo_drf),
+            'serializar': tempo_serializar,
+            'render_drf': tempo_drf,
+            'render_rapido': tempo_rapido,
+            'parse_drf': parse_drf,
+            'parse_rapido': parse_rapido,
+            'iguais': json.loads(corpo_rapido) == json.loads(corpo_drf) and lido == lido_rapido,
+        }
+
+    def _comparar_formatos(self, dados, repeticoes):
+        """Tamanho, renderização e leitura de uma listagem em cada formato"""
+        formatos = {
+            'json': (JSONRapidoRenderer(), self._ler_json),
+            'colunar': (ColunarJSONRenderer(), self._ler_json),
+            'msgpack': (MessagePackRenderer(), msgpack.unpackb),
+            'colunar-msgpack': (ColunarMessagePackRenderer(), msgpack.unpackb),
+        }
+
+        resultados = {}
+        for formato, (renderer, ler) in formatos.items():
+            tempo_render, corpo = self._medir(lambda: renderer.render(dados), repeticoes)
+            tempo_leitura, _ = self._medir(lambda: ler(corpo), repeticoes)
+            resultados[formato] = {
+                'tamanho': len(corpo),
+                'render': tempo_render,
+                'leitura': tempo_leitura,
+            }
+        return resultados
+
+    @staticmethod
+    def _ler_json(corpo):
+        return orjson.loads(corpo) if orjson is not None else json.loads(corpo)
+
+    def _medir(self, funcao, repeticoes):
+        """Executa `funcao` várias vezes; retorna o melhor tempo e o resultado"""
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultado = funcao()
+            tempos.append(time.perf_counter() - inicio)
+        return min(tempos), resultado
+
+    def _serializar(self, serializer_class, queryset):
+        """Serializa como a listagem da view, com o plano de consulta do serializer"""
+        serializer = serializer_class(many=True)
+        return serializer_class(otimizar_queryset(queryset, serializer), many=True).data
+
+    def _gerar_dados(self, total_itens):
+        """Cria a matriz e um concurso com `total_itens` itens, todos com metadados"""
+        with ContadoresService.suspender():
+            disciplinas = Disciplina.objects.bulk_create([
+                Disciplina(nome=f'__benchmark__ Disciplina {i}', ordem=i)
+                for i in range(20)
+            ])
+            assuntos = Assunto.objects.bulk_create([
+                Assunto(
+                    disciplina=disciplinas[i % len(disciplinas)],
+                    nome=f'Assunto {i} - Legislação aplicada',
+                    ordem=i,
+                    link_resumos=f'https://exemplo.com/resumos/{i}',
+                    dica='Revise a legislação seca antes das questões.'
+                )
+                for i in range(max(total_itens // 5, 1))
+            ], batch_size=2000)
+            subassuntos = Subassunto.objects.bulk_create([
+                Subassunto(assunto=assuntos[i % len(assuntos)], nome=f'Subassunto {i}', ordem=i)
+                for i in range(total_itens)
+            ], batch_size=2000)
+
+            concurso = Concurso.objects.create(nome='__benchmark__', sigla='BENCH')
+            mapas = MapaAssunto.objects.bulk_create([
+                MapaAssunto(
+                    concurso=concurso,
+                    assunto_id=subassunto.assunto_id,
+                    subassunto=subassunto,
+                    ordem=i
+                )
+                for i, subassunto in enumerate(subassuntos)
+            ], batch_size=2000)
+            MetadadosAssunto.objects.bulk_create([
+                MetadadosAssunto(
+                    mapa_assunto=mapa,
+                    paginas_minutos=30,
+                    minutos_expresso='12.50',
+                    minutos_regular='25.00',
+                    minutos_calma='40.00',
+                    dica='Revise a legislação seca antes das questões.',
+                    link_pdf='https://exemplo.com/material.pdf',
+                    link_questoes='https://exemplo.com/questoes'
+                )
+                for mapa in mapas
+            ], batch_size=2000)
+
+            ContadoresService.recalcular(Disciplina)
+            ContadoresService.recalcular(Assunto)
+            ContadoresService.recalcular(Concurso)
+
+        return concurso
@@ -0,0 +1,117 @@
+"""
+Benchmark da listagem da matriz: serializers aninhados vs. modo árvore.
+
+Gera uma matriz sintética dentro de uma transação (desfeita ao final) e
+compara número de consultas e latência dos dois caminhos.
+
+Uso:
+    python manage.py benchmark_matriz
+    python manage.py benchmark_matriz --assuntos 20000 --repeticoes 5
+"""
+
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Disciplina, Assunto, Subassunto
+from core.serializers import DisciplinaSerializer
+from core.services import ContadoresService, MatrizArvoreService
+
+
+class Command(BaseCommand):
+    help = 'Compara consultas e latência da listagem da matriz (serializer vs. árvore)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--disciplinas', type=int, default=40)
+        parser.add_argument('--assuntos', type=int, default=10000,
+                            help='Total de assuntos sintéticos')
+        parser.add_argument('--subassuntos', type=int, default=2,
+                            help='Subassuntos por assunto')
+        parser.add_argument('--repeticoes', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._gerar_matriz(
+                options['disciplinas'], options['assuntos'], options['subassuntos']
+            )
+
+            serializer = self._medir(
+                lambda: DisciplinaSerializer(Disciplina.objects.all(), many=True).data,
+                options['repeticoes']
+            )
+            arvore = self._medir(
+                lambda: MatrizArvoreService().montar(),
+                options['repeticoes']
+            )
+
+            iguais = self._renderizar(serializer['resultado']) == self._renderizar(arvore['resultado'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'Caminho':<12}{'Consultas':>12}{'Melhor (ms)':>14}{'Média (ms)':>14}")
+        for nome, medida in (('serializer', serializer), ('árvore', arvore)):
+            self.stdout.write(
+                f"{nome:<12}{medida['consultas']:>12}"
+                f"{medida['melhor'] * 1000:>14.1f}{medida['media'] * 1000:>14.1f}"
+            )
+        self.stdout.write(f'Speedup: {serializer["melhor"] / arvore["melhor"]:.1f}x')
+
+        if iguais:
+            self.stdout.write(self.style.SUCCESS('JSON idêntico nos dois caminhos.'))
+        else:
+            self.stdout.write(self.style.ERROR('JSON diferente entre os caminhos!'))
+
+    def _gerar_matriz(self, total_disciplinas, total_assuntos, subassuntos_por_assunto):
+        """Cria a matriz sintética com bulk_create"""
+        with ContadoresService.suspender():
+            disciplinas = Disciplina.objects.bulk_create([
+                Disciplina(nome=f'__benchmark__ Disciplina {i}', ordem=i)
+                for i in range(total_disciplinas)
+            ])
+            assuntos = Assunto.objects.bulk_create([
+                Assunto(
+                    disciplina=disciplinas[i % total_disciplinas],
+                    nome=f'Assunto {i}',
+                    ordem=i,
+                    link_resumos=f'https://exemplo.com/resumos/{i}',
+                    dica='Dica de exemplo'
+                )
+                for i in range(total_assuntos)
+            ], batch_size=2000)
+            Subassunto.objects.bulk_create([
+                Subassunto(assunto=assunto, nome=f'Subassunto {j}', ordem=j)
+                for assunto in assuntos
+                for j in range(subassuntos_por_assunto)
+            ], batch_size=2000)
+
+            ContadoresService.recalcular(Disciplina)
+            ContadoresService.recalcular(Assunto)
+
+    def _medir(self, funcao, repeticoes):
+        """Executa `funcao` várias vezes medindo tempo e consultas"""
+        tempos = []
+        consultas = []
+
+        def contar(execute, sql, params, many, context):
+            consultas.append(sql)
+            return execute(sql, params, many, context)
+
+        for _ in range(max(repeticoes, 1)):
+            consultas.clear()
+            with connection.execute_wrapper(contar):
+                inicio = time.perf_counter()
+                resultado = funcao()
+                tempos.append(time.perf_counter() - inicio)
+
+        return {
+            'resultado': resultado,
+            'consultas': len(consultas),
+            'melhor': min(tempos),
+            'media': sum(tempos) / len(tempos),
+        }
+
+    def _renderizar(self, dados):
+        """Normaliza o resultado para comparação"""
+        return json.loads(JSONRenderer().render(dados))
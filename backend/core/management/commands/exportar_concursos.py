@@ -0,0 +1,54 @@
+"""
+Comando que exporta vários concursos para o formato Tutory.
+
+Uso:
+    python manage.py exportar_concursos --ids 1 2 3 --saida concursos.zip
+    python manage.py exportar_concursos --cursinho X --tipo GRAD --formato xlsx --saida ciclo.xlsx
+"""
+
+import shutil
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Concurso
+from core.services import ExportacaoLoteService
+
+
+class Command(BaseCommand):
+    help = 'Exporta vários concursos (um .zip com uma planilha por concurso ou um .xlsx com várias abas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, nargs='+', help='IDs dos concursos')
+        parser.add_argument('--cursinho', help='Filtra pelo cursinho')
+        parser.add_argument('--tipo', help='Filtra pelo tipo do concurso')
+        parser.add_argument('--ativos', action='store_true', help='Apenas concursos ativos')
+        parser.add_argument(
+            '--formato',
+            choices=ExportacaoLoteService.FORMATOS,
+            default='zip'
+        )
+        parser.add_argument('--processos', type=int, help='Tamanho do pool de processos')
+        parser.add_argument('--saida', required=True, help='Arquivo de saída')
+
+    def handle(self, *args, **options):
+        concursos = Concurso.objects.all()
+        if options['ids']:
+            concursos = concursos.filter(pk__in=options['ids'])
+        if options['cursinho']:
+            concursos = concursos.filter(cursinho=options['cursinho'])
+        if options['tipo']:
+            concursos = concursos.filter(tipo=options['tipo'])
+        if options['ativos']:
+            concursos = concursos.filter(ativo=True)
+
+        total = concursos.count()
+        if not total:
+            raise CommandError('Nenhum concurso encontrado')
+
+        service = ExportacaoLoteService(processos=options['processos'])
+        output = service.exportar(concursos, options['formato'])
+
+        with output, open(options['saida'], 'wb') as destino:
+            shutil.copyfileobj(output, destino)
+
+        self.stdout.write(self.style.SUCCESS(f"{total} concurso(s) exportado(s) para {options['saida']}"))
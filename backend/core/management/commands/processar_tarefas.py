@@ -0,0 +1,53 @@
+"""
+Comando que processa a fila local de tarefas em segundo plano (modelo Tarefa).
+
+Uso:
+    python manage.py processar_tarefas
+    python manage.py processar_tarefas --continuo --intervalo 2
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import Tarefa
+from core.services import TarefaService
+
+
+class Command(BaseCommand):
+    help = (
+        'Executa as tarefas pendentes, em ordem de criação, e marca como erro '
+        'as tarefas em execução sem atualização há mais de TAREFAS_TEMPO_LIMITE'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Continua aguardando novas tarefas'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos entre verificações no modo contínuo'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            interrompidas = TarefaService.recuperar_interrompidas()
+            if interrompidas:
+                self.stdout.write(f'{interrompidas} tarefa(s) interrompida(s) marcada(s) como erro')
+
+            pendentes = list(
+                Tarefa.objects.filter(estado='pendente').order_by('created_at').values_list('pk', flat=True)
+            )
+
+            for tarefa_id in pendentes:
+                if TarefaService.executar(tarefa_id):
+                    tarefa = Tarefa.objects.get(pk=tarefa_id)
+                    self.stdout.write(f'{tarefa}')
+
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
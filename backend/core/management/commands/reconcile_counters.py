@@ -0,0 +1,55 @@
+"""
+Comando para corrigir divergências nas colunas de contagem (counter cache).
+
+Uso:
+    python manage.py reconcile_counters
+    python manage.py reconcile_counters --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.services import ContadoresService
+
+
+class Command(BaseCommand):
+    help = 'Recalcula total_assuntos, total_subassuntos e total_assuntos_mapa'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas lista as divergências, sem corrigir'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        total_divergentes = 0
+
+        with transaction.atomic():
+            for modelo, (campo, _, _) in ContadoresService.CONTADORES.items():
+                divergentes = list(
+                    ContadoresService.divergentes(modelo).values_list(
+                        'pk', campo, 'contagem_real'
+                    )
+                )
+                total_divergentes += len(divergentes)
+
+                for pk, armazenado, real in divergentes:
+                    self.stdout.write(
+                        f'{modelo.__name__} #{pk}: {campo}={armazenado}, real={real}'
+                    )
+
+                if divergentes and not dry_run:
+                    ContadoresService.recalcular(modelo, [pk for pk, _, _ in divergentes])
+
+        if total_divergentes == 0:
+            self.stdout.write(self.style.SUCCESS('Nenhuma divergência encontrada.'))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'{total_divergentes} contador(es) divergente(s) encontrados.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{total_divergentes} contador(es) corrigido(s).'
+            ))
@@ -0,0 +1,25 @@
+"""
+Comando para reconstruir o índice de busca (IndiceBusca).
+
+Grava apenas as diferenças entre o índice e a matriz/mapas atuais; útil
+após cargas feitas por fora do Django (SQL direto, restauração de backup).
+
+Uso:
+    python manage.py reindexar_busca
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.services import BuscaService
+
+
+class Command(BaseCommand):
+    help = 'Sincroniza o índice de busca com disciplinas, assuntos, subassuntos e mapas'
+
+    def handle(self, *args, **options):
+        estatisticas = BuscaService.reindexar()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice de busca sincronizado: {estatisticas['criadas']} entrada(s) criada(s), "
+            f"{estatisticas['atualizadas']} atualizada(s), {estatisticas['removidas']} removida(s)."
+        ))
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:09
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_contadores(apps, schema_editor):
+    """Popula os contadores a partir das contagens atuais"""
+    relacoes = [
+        ('Disciplina', 'total_assuntos', 'Assunto', 'disciplina'),
+        ('Assunto', 'total_subassuntos', 'Subassunto', 'assunto'),
+        ('Concurso', 'total_assuntos_mapa', 'MapaAssunto', 'concurso'),
+    ]
+    for nome_pai, campo, nome_filho, fk in relacoes:
+        pai = apps.get_model('core', nome_pai)
+        filho = apps.get_model('core', nome_filho)
+        contagem = filho.objects.filter(
+            **{fk: OuterRef('pk')}
+        ).order_by().values(fk).annotate(total=Count('pk')).values('total')
+        pai.objects.update(**{
+            campo: Coalesce(Subquery(contagem, output_field=IntegerField()), Value(0))
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_add_relevancia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assunto',
+            name='total_subassuntos',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Contador mantido automaticamente (ver ContadoresService)', verbose_name='Total de Subassuntos'),
+        ),
+        migrations.AddField(
+            model_name='concurso',
+            name='total_assuntos_mapa',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Contador mantido automaticamente (ver ContadoresService)', verbose_name='Total de Assuntos no Mapa'),
+        ),
+        migrations.AddField(
+            model_name='disciplina',
+            name='total_assuntos',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Contador mantido automaticamente (ver ContadoresService)', verbose_name='Total de Assuntos'),
+        ),
+        migrations.RunPython(preencher_contadores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_counter_cache_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatrizVersao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(help_text='Identificador da versão atual da matriz', max_length=32, verbose_name='Token')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Versão da Matriz',
+                'verbose_name_plural': 'Versão da Matriz',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_tarefa'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tarefa',
+            name='tipo',
+            field=models.CharField(choices=[('duplicar_concurso', 'Duplicação de Concurso'), ('importar_matriz', 'Importação da Matriz')], max_length=50, verbose_name='Tipo'),
+        ),
+    ]
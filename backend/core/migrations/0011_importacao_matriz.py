@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_tarefa_importar_matriz'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacaoMatriz',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('hash_arquivo', models.CharField(db_index=True, max_length=64, verbose_name='Hash do arquivo')),
+                ('abas', models.JSONField(blank=True, default=dict, verbose_name='Abas')),
+                ('estatisticas', models.JSONField(blank=True, default=dict, verbose_name='Estatísticas')),
+            ],
+            options={
+                'verbose_name': 'Importação da Matriz',
+                'verbose_name_plural': 'Importações da Matriz',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.14 on 2026-10-17 00:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_importacao_matriz'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assunto',
+            index=models.Index(fields=['disciplina', 'ordem', 'nome'], name='assunto_disc_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assunto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['disciplina', 'ordem', 'nome'], name='assunto_ativo_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concurso',
+            index=models.Index(fields=['ordem', '-created_at'], name='concurso_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concurso',
+            index=models.Index(fields=['tipo', 'ordem', '-created_at'], name='concurso_tipo_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concurso',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['ordem', '-created_at'], name='concurso_ativo_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='concurso',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['tipo', 'ordem', '-created_at'], name='concurso_ativo_tipo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disciplina',
+            index=models.Index(fields=['ordem', 'nome'], name='disciplina_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='disciplina',
+            index=models.Index(condition=models.Q(('ativa', True)), fields=['ordem', 'nome'], name='disciplina_ativa_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mapaassunto',
+            index=models.Index(fields=['concurso', 'ordem'], name='mapa_concurso_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subassunto',
+            index=models.Index(fields=['assunto', 'ordem', 'nome'], name='subassunto_assunto_ordem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subassunto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['assunto', 'ordem', 'nome'], name='subassunto_ativo_ordem_idx'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:09
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+TABELA = 'core_indicebusca'
+TABELA_FTS = 'core_indicebusca_fts'
+
+SQL_SQLITE = [
+    f"""CREATE VIRTUAL TABLE {TABELA_FTS} USING fts5(
+        texto, content='{TABELA}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER {TABELA}_ai AFTER INSERT ON {TABELA} BEGIN
+        INSERT INTO {TABELA_FTS} (rowid, texto) VALUES (new.id, new.texto);
+    END""",
+    f"""CREATE TRIGGER {TABELA}_ad AFTER DELETE ON {TABELA} BEGIN
+        INSERT INTO {TABELA_FTS} ({TABELA_FTS}, rowid, texto) VALUES ('delete', old.id, old.texto);
+    END""",
+    f"""CREATE TRIGGER {TABELA}_au AFTER UPDATE OF texto ON {TABELA} BEGIN
+        INSERT INTO {TABELA_FTS} ({TABELA_FTS}, rowid, texto) VALUES ('delete', old.id, old.texto);
+        INSERT INTO {TABELA_FTS} (rowid, texto) VALUES (new.id, new.texto);
+    END""",
+]
+
+SQL_POSTGRESQL = [
+    f"CREATE INDEX {TABELA}_texto_fts ON {TABELA} USING gin (to_tsvector('simple', texto))",
+]
+
+
+def criar_indice_textual(apps, schema_editor):
+    """FTS5 no SQLite, GIN sobre tsvector no PostgreSQL (outros bancos: sem índice)"""
+    vendor = schema_editor.connection.vendor
+    for sql in {'sqlite': SQL_SQLITE, 'postgresql': SQL_POSTGRESQL}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+def remover_indice_textual(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for sufixo in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {TABELA}_{sufixo}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABELA_FTS}')
+    elif vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TABELA}_texto_fts')
+
+
+def _normalizar(texto):
+    """Cópia de BuscaService.normalizar no momento desta migração"""
+    sem_acentos = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.findall(r'[a-z0-9]+', sem_acentos.casefold()))
+
+
+def preencher_indice(apps, schema_editor):
+    """Indexa a matriz e os itens de mapa existentes"""
+    IndiceBusca = apps.get_model('core', 'IndiceBusca')
+    entradas = []
+    for tipo, modelo, campo in (
+        ('disciplina', 'Disciplina', 'disciplina_id'),
+        ('assunto', 'Assunto', 'assunto_id'),
+        ('subassunto', 'Subassunto', 'subassunto_id'),
+    ):
+        for pk, nome in apps.get_model('core', modelo).objects.values_list('pk', 'nome').iterator():
+            entradas.append(IndiceBusca(tipo=tipo, texto=_normalizar(nome), **{campo: pk}))
+
+    mapas = apps.get_model('core', 'MapaAssunto').objects.exclude(nome_extra='', item_edital='')
+    for pk, nome_extra, item_edital in mapas.values_list('pk', 'nome_extra', 'item_edital').iterator():
+        texto = _normalizar(f'{nome_extra or ""} {item_edital or ""}')
+        if texto:
+            entradas.append(IndiceBusca(tipo='mapa', texto=texto, mapa_assunto_id=pk))
+
+    IndiceBusca.objects.bulk_create(entradas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_indices_listagens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('disciplina', 'Disciplina'), ('assunto', 'Assunto'), ('subassunto', 'Subassunto'), ('mapa', 'Item do mapa')], max_length=20, verbose_name='Tipo')),
+                ('texto', models.TextField(verbose_name='Texto normalizado')),
+                ('assunto', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.assunto')),
+                ('disciplina', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.disciplina')),
+                ('mapa_assunto', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.mapaassunto')),
+                ('subassunto', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.subassunto')),
+            ],
+            options={
+                'verbose_name': 'Entrada do Índice de Busca',
+                'verbose_name_plural': 'Índice de Busca',
+            },
+        ),
+        migrations.RunPython(criar_indice_textual, remover_indice_textual),
+        migrations.RunPython(preencher_indice, migrations.RunPython.noop),
+    ]
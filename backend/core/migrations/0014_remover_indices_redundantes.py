@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-17 01:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_indice_busca'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='subassunto',
+            name='subassunto_ativo_ordem_idx',
+        ),
+        migrations.AlterField(
+            model_name='assunto',
+            name='disciplina',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='assuntos', to='core.disciplina', verbose_name='Disciplina'),
+        ),
+        migrations.AlterField(
+            model_name='mapaassunto',
+            name='concurso',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='mapa_assuntos', to='core.concurso', verbose_name='Concurso'),
+        ),
+        migrations.AlterField(
+            model_name='subassunto',
+            name='assunto',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='subassuntos', to='core.assunto', verbose_name='Assunto'),
+        ),
+    ]
@@ -27,7 +27,64 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
-class Disciplina(TimeStampedModel):
+class PaiCarregadoMixin:
+    """
+    Guarda o valor de `campo_pai` lido do banco (ou gravado no último save).
+    
+    Usado pelos sinais dos contadores (core/signals.py) para detectar a
+    mudança de pai em um save sem consultar o valor anterior no banco.
+    
+    Attributes:
+        campo_pai (str): attname da FK para o registro que conta este
+    """
+    campo_pai = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if cls.campo_pai in field_names:
+            instance._pai_carregado = values[field_names.index(cls.campo_pai)]
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using, fields, **kwargs)
+        if fields is None or self.campo_pai in fields or self.campo_pai[:-3] in fields:
+            self._pai_carregado = getattr(self, self.campo_pai)
+
+
+class IndexadoNaBuscaModel(TimeStampedModel):
+    """
+    Modelo abstrato dos registros com entrada no índice de busca (IndiceBusca).
+    
+    Guarda os valores de `campos_busca` lidos do banco, para que o sinal de
+    indexação só regrave a entrada quando algum deles mudou.
+    
+    Attributes:
+        campos_busca (tuple): Campos que compõem o texto indexado
+    """
+    campos_busca = ()
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        valores = dict(zip(field_names, values))
+        if all(campo in valores for campo in cls.campos_busca):
+            instance._valores_busca = tuple(valores[campo] for campo in cls.campos_busca)
+        return instance
+    
+    def valores_busca(self):
+        """Valores atuais de `campos_busca`"""
+        return tuple(getattr(self, campo) for campo in self.campos_busca)
+    
+    def busca_alterada(self):
+        """Se algum campo indexado mudou desde a leitura (ou o último save)"""
+        return getattr(self, '_valores_busca', None) != self.valores_busca()
+
+
+class Disciplina(IndexadoNaBuscaModel):
     """
     Representa uma disciplina da matriz de assuntos.
     
@@ -37,6 +94,7 @@ class Disciplina(TimeStampedModel):
         nome (CharField): Nome da disciplina
         ordem (PositiveIntegerField): Ordem de exibição
         ativa (BooleanField): Se a disciplina está ativa no sistema
+        total_assuntos (PositiveIntegerField): Contador de assuntos (counter cache)
     """
     nome = models.CharField(
         'Nome',
@@ -54,22 +112,33 @@ class Disciplina(TimeStampedModel):
         default=True,
         help_text='Define se a disciplina está ativa no sistema'
     )
+    total_assuntos = models.PositiveIntegerField(
+        'Total de Assuntos',
+        default=0,
+        editable=False,
+        help_text='Contador mantido automaticamente (ver ContadoresService)'
+    )
+    
+    campos_busca = ('nome',)
     
     class Meta:
         verbose_name = 'Disciplina'
         verbose_name_plural = 'Disciplinas'
         ordering = ['ordem', 'nome']
+        indexes = [
+            models.Index(fields=['ordem', 'nome'], name='disciplina_ordem_idx'),
+            models.Index(
+                fields=['ordem', 'nome'],
+                name='disciplina_ativa_ordem_idx',
+                condition=models.Q(ativa=True)
+            ),
+        ]
     
     def __str__(self):
         return self.nome
-    
-    @property
-    def total_assuntos(self):
-        """Retorna o total de assuntos desta disciplina"""
-        return self.assuntos.count()
 
 
-class Assunto(TimeStampedModel):
+class Assunto(PaiCarregadoMixin, IndexadoNaBuscaModel):
     """
     Representa um assunto dentro de uma disciplina.
     
@@ -80,12 +149,15 @@ class Assunto(TimeStampedModel):
         nome (CharField): Nome do assunto
         ordem (PositiveIntegerField): Ordem de exibição dentro da disciplina
         ativo (BooleanField): Se o assunto está ativo no sistema
+        total_subassuntos (PositiveIntegerField): Contador de subassuntos (counter cache)
     """
+    # Sem índice próprio: a coluna já é o início de assunto_disc_ordem_idx
     disciplina = models.ForeignKey(
         Disciplina,
         on_delete=models.CASCADE,
         related_name='assuntos',
-        verbose_name='Disciplina'
+        verbose_name='Disciplina',
+        db_index=False
     )
     nome = models.CharField(
         'Nome',
@@ -128,23 +200,36 @@ class Assunto(TimeStampedModel):
         blank=True,
         help_text='Dica sobre o assunto (máx. 500 caracteres)'
     )
+    total_subassuntos = models.PositiveIntegerField(
+        'Total de Subassuntos',
+        default=0,
+        editable=False,
+        help_text='Contador mantido automaticamente (ver ContadoresService)'
+    )
+    
+    campos_busca = ('nome',)
+    campo_pai = 'disciplina_id'
     
     class Meta:
         verbose_name = 'Assunto'
         verbose_name_plural = 'Assuntos'
         ordering = ['disciplina', 'ordem', 'nome']
         unique_together = ['disciplina', 'nome']
+        indexes = [
+            # Listagem por disciplina (a ordenação padrão começa pela FK)
+            models.Index(fields=['disciplina', 'ordem', 'nome'], name='assunto_disc_ordem_idx'),
+            models.Index(
+                fields=['disciplina', 'ordem', 'nome'],
+                name='assunto_ativo_ordem_idx',
+                condition=models.Q(ativo=True)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.disciplina.nome} - {self.nome}"
-    
-    @property
-    def total_subassuntos(self):
-        """Retorna o total de subassuntos deste assunto"""
-        return self.subassuntos.count()
 
 
-class Subassunto(TimeStampedModel):
+class Subassunto(PaiCarregadoMixin, IndexadoNaBuscaModel):
     """
     Representa um subassunto dentro de um assunto.
     
@@ -156,11 +241,13 @@ class Subassunto(TimeStampedModel):
         ordem (PositiveIntegerField): Ordem de exibição dentro do assunto
         ativo (BooleanField): Se o subassunto está ativo no sistema
     """
+    # Sem índice próprio: a coluna já é o início de subassunto_assunto_ordem_idx
     assunto = models.ForeignKey(
         Assunto,
         on_delete=models.CASCADE,
         related_name='subassuntos',
-        verbose_name='Assunto'
+        verbose_name='Assunto',
+        db_index=False
     )
     nome = models.CharField(
         'Nome',
@@ -178,11 +265,17 @@ class Subassunto(TimeStampedModel):
         help_text='Define se o subassunto está ativo no sistema'
     )
     
+    campos_busca = ('nome',)
+    campo_pai = 'assunto_id'
+    
     class Meta:
         verbose_name = 'Subassunto'
         verbose_name_plural = 'Subassuntos'
         ordering = ['assunto', 'ordem', 'nome']
         unique_together = ['assunto', 'nome']
+        indexes = [
+            models.Index(fields=['assunto', 'ordem', 'nome'], name='subassunto_assunto_ordem_idx'),
+        ]
     
     def __str__(self):
         return f"{self.assunto.nome} - {self.nome}"
@@ -202,6 +295,7 @@ class Concurso(TimeStampedModel):
         cursinho (CharField): Nome do cursinho associado
         ativo (BooleanField): Se o concurso está ativo
         criado_por (ForeignKey): Usuário admin que criou o concurso
+        total_assuntos_mapa (PositiveIntegerField): Contador de itens do mapa (counter cache)
     """
     
     TIPO_CHOICES = [
@@ -249,28 +343,44 @@ class Concurso(TimeStampedModel):
         related_name='concursos_criados',
         verbose_name='Criado por'
     )
+    total_assuntos_mapa = models.PositiveIntegerField(
+        'Total de Assuntos no Mapa',
+        default=0,
+        editable=False,
+        help_text='Contador mantido automaticamente (ver ContadoresService)'
+    )
     
     class Meta:
         verbose_name = 'Concurso'
         verbose_name_plural = 'Concursos'
         ordering = ['ordem', '-created_at']
         unique_together = ['nome', 'sigla']
+        indexes = [
+            models.Index(fields=['ordem', '-created_at'], name='concurso_ordem_idx'),
+            models.Index(fields=['tipo', 'ordem', '-created_at'], name='concurso_tipo_ordem_idx'),
+            # A listagem dos alunos filtra apenas concursos ativos
+            models.Index(
+                fields=['ordem', '-created_at'],
+                name='concurso_ativo_ordem_idx',
+                condition=models.Q(ativo=True)
+            ),
+            models.Index(
+                fields=['tipo', 'ordem', '-created_at'],
+                name='concurso_ativo_tipo_idx',
+                condition=models.Q(ativo=True)
+            ),
+        ]
     
     def __str__(self):
         return f"{self.nome} ({self.sigla})"
     
-    @property
-    def total_assuntos_mapa(self):
-        """Retorna o total de assuntos no mapa deste concurso"""
-        return self.mapa_assuntos.count()
-    
     @property
     def tipo_display(self):
         """Retorna o nome legível do tipo"""
         return dict(self.TIPO_CHOICES).get(self.tipo, self.tipo)
 
 
-class MapaAssunto(TimeStampedModel):
+class MapaAssunto(PaiCarregadoMixin, IndexadoNaBuscaModel):
     """
     Relaciona assuntos da matriz com um concurso específico.
     
@@ -285,11 +395,13 @@ class MapaAssunto(TimeStampedModel):
         extra_cursinho (BooleanField): Se é um assunto extra não presente na matriz
         nome_extra (CharField): Nome do assunto extra (se aplicável)
     """
+    # Sem índice próprio: a coluna já é o início de mapa_concurso_ordem_idx
     concurso = models.ForeignKey(
         Concurso,
         on_delete=models.CASCADE,
         related_name='mapa_assuntos',
-        verbose_name='Concurso'
+        verbose_name='Concurso',
+        db_index=False
     )
     assunto = models.ForeignKey(
         Assunto,
@@ -332,11 +444,18 @@ class MapaAssunto(TimeStampedModel):
         help_text='Nome do assunto extra (apenas se extra_cursinho=True)'
     )
     
+    campos_busca = ('nome_extra', 'item_edital')
+    campo_pai = 'concurso_id'
+    
     class Meta:
         verbose_name = 'Mapa de Assunto'
         verbose_name_plural = 'Mapas de Assuntos'
         ordering = ['concurso', 'ordem']
         unique_together = ['concurso', 'assunto', 'subassunto']
+        indexes = [
+            # Mapa de um concurso na ordem de exibição (e metadados por concurso)
+            models.Index(fields=['concurso', 'ordem'], name='mapa_concurso_ordem_idx'),
+        ]
     
     def __str__(self):
         if self.extra_cursinho:
@@ -587,3 +706,226 @@ class MetadadosAssunto(TimeStampedModel):
         
         if errors:
             raise ValidationError(errors)
+
+
+class MatrizVersao(models.Model):
+    """
+    Versão atual da matriz de assuntos (registro único).
+    
+    O token muda a cada alteração em Disciplina, Assunto ou Subassunto e
+    identifica o snapshot JSON pré-computado da matriz (ver
+    MatrizSnapshotService).
+    
+    Attributes:
+        token (CharField): Identificador aleatório da versão atual
+        atualizado_em (DateTimeField): Data/hora da última alteração da matriz
+    """
+    token = models.CharField(
+        'Token',
+        max_length=32,
+        help_text='Identificador da versão atual da matriz'
+    )
+    atualizado_em = models.DateTimeField(
+        'Atualizado em',
+        auto_now=True
+    )
+    
+    class Meta:
+        verbose_name = 'Versão da Matriz'
+        verbose_name_plural = 'Versão da Matriz'
+    
+    def __str__(self):
+        return f"Matriz {self.token}"
+
+
+class Tarefa(TimeStampedModel):
+    """
+    Tarefa executada em segundo plano, com acompanhamento de estado.
+    
+    Usada para operações longas (ex: duplicação de concursos muito grandes,
+    importação da matriz), que são executadas fora do ciclo da requisição e
+    consultadas por polling em /api/tarefas/{id}/.
+    
+    Attributes:
+        tipo (CharField): Tipo da tarefa (define o executor)
+        estado (CharField): pendente, executando, concluida ou erro
+        parametros (JSONField): Parâmetros de entrada do executor
+        progresso (JSONField): Progresso parcial informado pelo executor
+        resultado (JSONField): Resultado final (quando concluída)
+        erro (TextField): Mensagem de erro (quando falhou)
+        criado_por (ForeignKey): Usuário que solicitou a tarefa
+        iniciada_em (DateTimeField): Início da execução
+        concluida_em (DateTimeField): Fim da execução
+    """
+    
+    TIPO_CHOICES = [
+        ('duplicar_concurso', 'Duplicação de Concurso'),
+        ('importar_matriz', 'Importação da Matriz'),
+    ]
+    
+    ESTADO_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('executando', 'Executando'),
+        ('concluida', 'Concluída'),
+        ('erro', 'Erro'),
+    ]
+    
+    tipo = models.CharField(
+        'Tipo',
+        max_length=50,
+        choices=TIPO_CHOICES
+    )
+    estado = models.CharField(
+        'Estado',
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='pendente'
+    )
+    parametros = models.JSONField(
+        'Parâmetros',
+        default=dict,
+        blank=True
+    )
+    progresso = models.JSONField(
+        'Progresso',
+        default=dict,
+        blank=True
+    )
+    resultado = models.JSONField(
+        'Resultado',
+        null=True,
+        blank=True
+    )
+    erro = models.TextField(
+        'Erro',
+        blank=True
+    )
+    criado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='tarefas',
+        verbose_name='Criado por'
+    )
+    iniciada_em = models.DateTimeField(
+        'Iniciada em',
+        null=True,
+        blank=True
+    )
+    concluida_em = models.DateTimeField(
+        'Concluída em',
+        null=True,
+        blank=True
+    )
+    
+    class Meta:
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.get_estado_display()})"
+
+
+class ImportacaoMatriz(TimeStampedModel):
+    """
+    Registro de uma importação da matriz concluída com sucesso.
+    
+    Guarda as impressões digitais do arquivo e de cada aba (disciplina),
+    usadas para pular abas inalteradas na importação seguinte (ver
+    MatrizImportService).
+    
+    Attributes:
+        hash_arquivo (CharField): SHA-256 do arquivo importado
+        abas (JSONField): nome da aba -> {'hash': conteúdo lido da aba,
+            'estado': estado da disciplina no banco após a importação}
+        estatisticas (JSONField): Estatísticas da importação
+    """
+    hash_arquivo = models.CharField(
+        'Hash do arquivo',
+        max_length=64,
+        db_index=True
+    )
+    abas = models.JSONField(
+        'Abas',
+        default=dict,
+        blank=True
+    )
+    estatisticas = models.JSONField(
+        'Estatísticas',
+        default=dict,
+        blank=True
+    )
+    
+    class Meta:
+        verbose_name = 'Importação da Matriz'
+        verbose_name_plural = 'Importações da Matriz'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Importação {self.hash_arquivo[:12]} ({self.created_at:%d/%m/%Y %H:%M})"
+
+
+class IndiceBusca(models.Model):
+    """
+    Entrada do índice de busca textual (ver BuscaService).
+    
+    Uma linha por disciplina, assunto, subassunto e item de mapa com texto
+    próprio (nome extra ou item do edital), com o texto normalizado: sem
+    acentos, em minúsculas e só com letras e números.
+    
+    A coluna `texto` é indexada por um índice full-text criado na migração
+    0013: tabela FTS5 sincronizada por triggers no SQLite, índice GIN sobre
+    to_tsvector('simple', texto) no PostgreSQL. Migrações que recriem esta
+    tabela no SQLite precisam recriar os triggers.
+    
+    Attributes:
+        tipo (CharField): 'disciplina', 'assunto', 'subassunto' ou 'mapa'
+        texto (TextField): Texto normalizado
+        disciplina, assunto, subassunto, mapa_assunto: O registro indexado
+            (apenas um preenchido); o cascade remove a entrada com ele
+    """
+    TIPO_CHOICES = [
+        ('disciplina', 'Disciplina'),
+        ('assunto', 'Assunto'),
+        ('subassunto', 'Subassunto'),
+        ('mapa', 'Item do mapa'),
+    ]
+    
+    tipo = models.CharField(
+        'Tipo',
+        max_length=20,
+        choices=TIPO_CHOICES
+    )
+    texto = models.TextField('Texto normalizado')
+    disciplina = models.OneToOneField(
+        Disciplina,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    assunto = models.OneToOneField(
+        Assunto,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    subassunto = models.OneToOneField(
+        Subassunto,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    mapa_assunto = models.OneToOneField(
+        MapaAssunto,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+'
+    )
+    
+    class Meta:
+        verbose_name = 'Entrada do Índice de Busca'
+        verbose_name_plural = 'Índice de Busca'
+    
+    def __str__(self):
+        return f"{self.tipo}: {self.texto[:50]}"
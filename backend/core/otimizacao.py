@@ -0,0 +1,173 @@
+"""
+Plano de consulta derivado dos campos de um serializer.
+
+Percorre os campos ativos de um serializer (sources e serializers
+aninhados) e monta os select_related, Prefetch e only() necessários para
+serializá-lo sem consultas adicionais por registro.
+
+Campos cujo source não é uma coluna (properties, SerializerMethodField)
+podem declarar as colunas de que dependem em `Meta.dependencias`:
+
+    class Meta:
+        dependencias = {'nome_completo': ('nome_extra', 'assunto.nome')}
+
+Sem essa declaração, o modelo correspondente é carregado por inteiro.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def otimizar_queryset(queryset, serializer, restringir_colunas=False):
+    """
+    Aplica a `queryset` o plano de consulta de `serializer`.
+
+    Substitui os select_related existentes pelos que o serializer usa.
+
+    Args:
+        queryset: QuerySet do modelo do serializer
+        serializer: Serializer (ou ListSerializer) já instanciado, com os
+            campos que serão de fato renderizados
+        restringir_colunas (bool): Também aplica only() com as colunas usadas
+
+    Returns:
+        QuerySet
+    """
+    plano = PlanoDeConsulta(queryset.model)
+    plano.percorrer(serializer)
+    return plano.aplicar(queryset, restringir_colunas)
+
+
+class PlanoDeConsulta:
+    """
+    Colunas e relações de um modelo usadas por um serializer.
+
+    Attributes:
+        colunas (set): Campos concretos usados, ou None para todos
+        juncoes (dict): Relações de valor único (select_related) -> plano
+        prefetches (dict): Relações de vários valores -> plano
+    """
+
+    def __init__(self, modelo, campo_de_retorno=None):
+        self.modelo = modelo
+        self.colunas = set()
+        self.juncoes = {}
+        self.prefetches = {}
+
+        # FK de volta ao modelo pai: o prefetch precisa dela para agrupar os registros
+        if campo_de_retorno is not None:
+            self.colunas.add(campo_de_retorno)
+
+    def percorrer(self, serializer):
+        """Inclui no plano os campos renderizados por `serializer`"""
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+
+        dependencias = getattr(getattr(serializer, 'Meta', None), 'dependencias', {})
+
+        for nome, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+
+            if nome in dependencias:
+                for caminho in dependencias[nome]:
+                    self.adicionar(caminho.split('.'))
+            elif campo.source == '*':
+                self.colunas = None
+            elif isinstance(campo, serializers.BaseSerializer):
+                plano = self
+                for parte in campo.source.split('.'):
+                    plano = plano.relacao(parte)
+                    if plano is None:
+                        break
+                else:
+                    plano.percorrer(campo)
+            else:
+                self.adicionar(campo.source.split('.'))
+
+    def adicionar(self, partes):
+        """Inclui o caminho `partes` (ex.: ['assunto', 'nome']) no plano"""
+        nome, resto = partes[0], partes[1:]
+
+        try:
+            campo = self.modelo._meta.get_field(nome)
+        except FieldDoesNotExist:
+            # Property ou método: não há como saber quais colunas usa
+            self.colunas = None
+            return
+
+        if campo.is_relation and (resto or not campo.concrete or campo.many_to_many):
+            plano = self.relacao(nome)
+            if plano is not None and resto:
+                plano.adicionar(resto)
+        elif self.colunas is not None:
+            self.colunas.add(nome)
+
+    def relacao(self, nome):
+        """Plano da relação `nome`, criando a junção ou o prefetch"""
+        try:
+            campo = self.modelo._meta.get_field(nome)
+        except FieldDoesNotExist:
+            self.colunas = None
+            return None
+
+        if not campo.is_relation:
+            return None
+
+        if campo.many_to_one or campo.one_to_one:
+            if campo.concrete and self.colunas is not None:
+                self.colunas.add(nome)
+            if nome not in self.juncoes:
+                retorno = None if campo.concrete else campo.field.name
+                self.juncoes[nome] = PlanoDeConsulta(campo.related_model, retorno)
+            return self.juncoes[nome]
+
+        if nome not in self.prefetches:
+            retorno = campo.field.name if campo.one_to_many else None
+            self.prefetches[nome] = PlanoDeConsulta(campo.related_model, retorno)
+            if campo.many_to_many:
+                self.prefetches[nome].colunas = None
+        return self.prefetches[nome]
+
+    def aplicar(self, queryset, restringir_colunas=False):
+        """Aplica o plano a `queryset`"""
+        juncoes = list(self._caminhos_de_juncao())
+        queryset = queryset.select_related(None)
+        if juncoes:
+            queryset = queryset.select_related(*juncoes)
+
+        prefetches = [
+            Prefetch(caminho, queryset=plano.aplicar(plano.modelo._default_manager.all(), restringir_colunas))
+            for caminho, plano in self._prefetches()
+        ]
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+
+        if restringir_colunas:
+            queryset = queryset.only(*self._colunas())
+        return queryset
+
+    def _caminhos_de_juncao(self, prefixo=''):
+        for nome, plano in self.juncoes.items():
+            yield f'{prefixo}{nome}'
+            yield from plano._caminhos_de_juncao(f'{prefixo}{nome}__')
+
+    def _prefetches(self, prefixo=''):
+        """Prefetches deste modelo e dos modelos unidos por select_related"""
+        for nome, plano in self.prefetches.items():
+            yield f'{prefixo}{nome}', plano
+        for nome, plano in self.juncoes.items():
+            yield from plano._prefetches(f'{prefixo}{nome}__')
+
+    def _colunas(self, prefixo=''):
+        """Caminhos para only(), incluindo os dos modelos unidos"""
+        if self.colunas is None:
+            colunas = [campo.name for campo in self.modelo._meta.concrete_fields]
+        else:
+            colunas = [self.modelo._meta.pk.name, *self.colunas]
+
+        for coluna in colunas:
+            yield f'{prefixo}{coluna}'
+        for nome, plano in self.juncoes.items():
+            yield from plano._colunas(f'{prefixo}{nome}__')
@@ -0,0 +1,136 @@
+"""
+Paginação das listagens da API.
+
+A paginação é opcional: sem `cursor` nem `page_size` na query string, as
+listagens continuam retornando todos os registros em uma lista simples.
+"""
+
+import base64
+import binascii
+import json
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorPaginacao(BasePagination):
+    """
+    Paginação por chave (keyset) sobre a ordenação `ordenacao_cursor` da view.
+
+    O cursor guarda os valores dos campos de ordenação do último item da
+    página; a página seguinte filtra os registros posteriores a ele, sem
+    OFFSET, de modo que o custo de cada página não cresce com a posição.
+    `ordenacao_cursor` deve terminar em um campo único (ex.: 'id') e
+    acompanhar um índice da tabela.
+
+    Query params:
+        page_size: Itens por página (limitado a PAGINACAO_TAMANHO_MAXIMO)
+        cursor: Valor de `next` da página anterior
+
+    Resposta: {'next': URL da próxima página ou null, 'results': [...]}
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params and \
+                self.page_size_query_param not in request.query_params:
+            return None
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise ValidationError({
+                api_settings.ORDERING_PARAM: 'A ordenação não pode ser alterada na listagem paginada.'
+            })
+
+        self.request = request
+        self.ordenacao = view.ordenacao_cursor
+        self.tamanho = self._tamanho_pagina(request)
+
+        queryset = queryset.order_by(*self.ordenacao)
+        posicao = self._decodificar(request.query_params.get(self.cursor_query_param))
+        if posicao is not None:
+            queryset = queryset.filter(self._apos(posicao))
+
+        itens = list(queryset[:self.tamanho + 1])
+        self.proxima = None
+        if len(itens) > self.tamanho:
+            itens = itens[:self.tamanho]
+            self.proxima = [self._valor(itens[-1], campo) for campo in self.ordenacao]
+
+        return itens
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.proxima is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.tamanho)
+        return replace_query_param(url, self.cursor_query_param, self._codificar(self.proxima))
+
+    def _tamanho_pagina(self, request):
+        """Tamanho pedido, limitado ao máximo configurado"""
+        try:
+            tamanho = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.PAGINACAO_TAMANHO_PADRAO
+
+        if tamanho < 1:
+            return settings.PAGINACAO_TAMANHO_PADRAO
+        return min(tamanho, settings.PAGINACAO_TAMANHO_MAXIMO)
+
+    def _apos(self, posicao):
+        """
+        Condição "vem depois de `posicao`" na ordenação (todas ascendentes).
+
+        (a, b, c) > (x, y, z) vira a > x OR (a = x AND b > y) OR ...; o
+        `a >= x` adicional permite ao banco limitar a faixa do índice.
+        """
+        condicoes = []
+        for i, campo in enumerate(self.ordenacao):
+            iguais = {anterior: posicao[j] for j, anterior in enumerate(self.ordenacao[:i])}
+            condicoes.append(Q(**iguais, **{f'{campo}__gt': posicao[i]}))
+
+        return Q(**{f'{self.ordenacao[0]}__gte': posicao[0]}) & reduce(lambda a, b: a | b, condicoes)
+
+    def _codificar(self, valores):
+        return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+    def _decodificar(self, cursor):
+        if not cursor:
+            return None
+
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound('Cursor inválido.')
+
+        if not isinstance(valores, list) or len(valores) != len(self.ordenacao):
+            raise NotFound('Cursor inválido.')
+        return valores
+
+    @staticmethod
+    def _valor(objeto, campo):
+        """Valor de um campo de ordenação, seguindo relações (ex.: 'mapa_assunto__ordem')"""
+        for parte in campo.split('__'):
+            objeto = getattr(objeto, parte)
+        return objeto
@@ -0,0 +1,216 @@
+"""
+Funções executadas em processos filhos (ProcessPoolExecutor).
+
+Este módulo não importa modelos no nível do módulo: os processos são
+criados com 'spawn' e só podem usar o ORM depois de `inicializar_django()`,
+que é passado como `initializer` do pool.
+
+O pool é criado no primeiro uso e reaproveitado pelas chamadas seguintes,
+então o custo de iniciar os processos (e o django.setup() de cada um) é
+pago uma vez por processo do servidor, não por requisição.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from django.db import connections
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+def executar(funcao, blocos, max_processos, args=(), ao_concluir=None):
+    """
+    Executa `funcao(bloco, *args)` para cada bloco em um pool de processos.
+
+    Com um único bloco ou `max_processos` <= 1, executa no próprio processo.
+
+    Args:
+        funcao: Função deste módulo (precisa ser importável pelo filho)
+        blocos (list): Primeiro argumento de cada chamada
+        max_processos (int): Tamanho máximo do pool
+        args (tuple): Argumentos adicionais, iguais para todos os blocos
+        ao_concluir (callable): Opcional; recebe (índice, resultado) à
+            medida que cada bloco termina
+
+    Returns:
+        list: Resultados na ordem dos blocos
+    """
+    if max_processos <= 1 or len(blocos) <= 1:
+        resultados = []
+        for indice, bloco in enumerate(blocos):
+            resultados.append(funcao(bloco, *args))
+            if ao_concluir is not None:
+                ao_concluir(indice, resultados[-1])
+        return resultados
+
+    resultados = [None] * len(blocos)
+    pool = obter_pool(max_processos)
+    try:
+        futuros = {pool.submit(funcao, bloco, *args): indice for indice, bloco in enumerate(blocos)}
+        for futuro in as_completed(futuros):
+            indice = futuros[futuro]
+            resultados[indice] = futuro.result()
+            if ao_concluir is not None:
+                ao_concluir(indice, resultados[indice])
+    except BrokenProcessPool:
+        # Um filho morreu (ex.: falta de memória); a próxima chamada cria outro pool
+        descartar_pool(pool)
+        raise
+
+    return resultados
+
+
+def obter_pool(max_processos):
+    """
+    Retorna o pool compartilhado com `max_processos` processos.
+
+    Os filhos usam os mesmos bancos do processo atual (nos testes, o banco
+    de teste). Se o tamanho ou os bancos mudarem, o pool anterior é
+    encerrado depois de concluir o que já recebeu.
+    """
+    bancos = {alias: connections[alias].settings_dict['NAME'] for alias in connections}
+    chave = (max_processos, tuple(sorted(bancos.items())))
+
+    with _lock:
+        pool = _pools.get(chave)
+        if pool is None:
+            for anterior in _pools.values():
+                anterior.shutdown(wait=False)
+            _pools.clear()
+            pool = _pools[chave] = ProcessPoolExecutor(
+                max_workers=max_processos,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=inicializar_django,
+                initargs=(bancos,)
+            )
+    return pool
+
+
+def descartar_pool(pool):
+    """Remove `pool` dos pools compartilhados e o encerra"""
+    with _lock:
+        for chave, atual in list(_pools.items()):
+            if atual is pool:
+                del _pools[chave]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def inicializar_django(bancos=None):
+    """
+    Configura o Django no processo filho.
+
+    Args:
+        bancos (dict): Opcional; alias -> NAME dos bancos do processo pai
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+    import django
+    from django.conf import settings
+    django.setup()
+
+    for alias, nome in (bancos or {}).items():
+        settings.DATABASES[alias]['NAME'] = nome
+
+
+def _fechar_conexao():
+    """
+    Fecha a conexão do processo filho ao fim de cada bloco.
+
+    Na execução serial (ver `executar`), a conexão é a da própria
+    requisição e continua aberta.
+    """
+    if multiprocessing.parent_process() is not None:
+        connections.close_all()
+
+
+def exportar_concursos_em_arquivos(itens, diretorio):
+    """
+    Gera uma planilha Tutory por concurso em `diretorio`.
+
+    Todas as linhas do bloco são lidas com uma única consulta.
+
+    Args:
+        itens (list): Pares (concurso_id, título da aba)
+        diretorio (str): Diretório de saída
+
+    Returns:
+        list: Pares (concurso_id, caminho do arquivo gerado)
+    """
+    import openpyxl
+    from .services import ExportacaoTutoryService
+
+    service = ExportacaoTutoryService()
+    titulos = dict(itens)
+    caminhos = []
+
+    def salvar(concurso_id, linhas):
+        workbook = openpyxl.Workbook(write_only=True)
+        service.adicionar_aba(workbook, titulos[concurso_id], linhas)
+        caminho = os.path.join(diretorio, f'{concurso_id}.xlsx')
+        workbook.save(caminho)
+        caminhos.append((concurso_id, caminho))
+
+    try:
+        for concurso_id, linhas in service.linhas_por_concurso(list(titulos)):
+            salvar(concurso_id, linhas)
+
+        # Concursos sem itens no mapa geram apenas o cabeçalho
+        gerados = {concurso_id for concurso_id, _ in caminhos}
+        for concurso_id in titulos:
+            if concurso_id not in gerados:
+                salvar(concurso_id, [])
+    finally:
+        _fechar_conexao()
+
+    return caminhos
+
+
+def formatar_concursos(itens):
+    """
+    Formata as linhas Tutory de um bloco de concursos.
+
+    Args:
+        itens (list): Pares (concurso_id, título da aba)
+
+    Returns:
+        dict: concurso_id -> lista de linhas
+    """
+    from .services import ExportacaoTutoryService
+
+    service = ExportacaoTutoryService()
+    try:
+        return {
+            concurso_id: list(linhas)
+            for concurso_id, linhas in service.linhas_por_concurso([pk for pk, _ in itens])
+        }
+    finally:
+        _fechar_conexao()
+
+
+def ler_abas_da_matriz(nomes, arquivo_path):
+    """
+    Lê algumas abas da planilha da matriz (ver MatrizImportService._ler_aba).
+
+    Cada processo abre a própria cópia do workbook em modo read-only.
+
+    Args:
+        nomes (list): Nomes das abas a ler
+        arquivo_path (str): Caminho do arquivo Excel
+
+    Returns:
+        list: Abas lidas, na ordem de `nomes`
+    """
+    import openpyxl
+    from .services import MatrizImportService
+
+    service = MatrizImportService()
+    workbook = openpyxl.load_workbook(arquivo_path, read_only=True, data_only=True)
+    try:
+        return [service._ler_aba(workbook[nome]) for nome in nomes]
+    finally:
+        workbook.close()
@@ -0,0 +1,219 @@
+"""
+Renderers e parser da API.
+
+JSONRapidoRenderer e JSONRapidoParser são os padrões da API; os formatos
+compactos (ColunarJSONRenderer e MessagePackRenderer) são escolhidos pelo
+cliente via Accept ou `?format=`.
+
+O JSON é gerado com orjson: o mesmo JSON dos equivalentes do DRF
+(JSONRenderer e JSONParser), em uma fração do tempo nas respostas grandes
+(árvore da matriz, concurso com o mapa aninhado, listagem de mapas). Sem o orjson
+instalado, ou nos casos que ele não cobre (indentação, inteiros maiores
+que 64 bits), usam o módulo json da biblioteca padrão como o DRF.
+
+Diferença conhecida: floats não finitos (NaN, Infinity) saem como null,
+enquanto o DRF levanta ValueError (STRICT_JSON) ou gera JSON inválido. Os
+modelos não têm campos float; Decimal sai como string por padrão.
+
+Valores que não são tipos JSON nativos passam pelo JSONEncoder do DRF
+(datas, lazy strings, UUID, querysets), exceto Decimal, que segue
+COERCE_DECIMAL_TO_STRING como os DecimalField dos serializers.
+
+Comparação dos formatos: `python manage.py benchmark_json`.
+"""
+
+import decimal
+from itertools import chain
+
+import msgpack
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+
+class CodificadorJSON(encoders.JSONEncoder):
+    """JSONEncoder do DRF com Decimal no mesmo formato dos serializers"""
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj) if api_settings.COERCE_DECIMAL_TO_STRING else float(obj)
+        return super().default(obj)
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """
+    JSONRenderer que serializa com orjson.
+
+    Datas e horas são repassadas ao CodificadorJSON (OPT_PASSTHROUGH_DATETIME)
+    para manter o formato do DRF (ex.: 'Z' em vez de '+00:00'). NaN e
+    Infinity saem como null (o orjson não tem modo estrito).
+    """
+
+    encoder_class = CodificadorJSON
+
+    OPCOES = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if orjson else 0
+
+    def __init__(self):
+        self._codificador = self.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if orjson is None or self.ensure_ascii or not self.compact or \
+                self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            corpo = orjson.dumps(data, default=self._codificador.default, option=self.OPCOES)
+        except orjson.JSONEncodeError:
+            # Inteiros fora de 64 bits, tipos desconhecidos:
+            # o caminho padrão gera o mesmo resultado (ou o mesmo erro) do DRF
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Mesmo escape do JSONRenderer, para JSON embutido em <script>
+        if b'\xe2\x80\xa8' in corpo or b'\xe2\x80\xa9' in corpo:
+            corpo = corpo.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return corpo
+
+
+class JSONRapidoParser(JSONParser):
+    """JSONParser que decodifica com orjson (corpos em UTF-8)"""
+
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class ColunarJSONRenderer(JSONRapidoRenderer):
+    """
+    JSON colunar para listagens (ver `codificar_colunar`).
+
+    Accept: application/vnd.resumos.colunar+json (ou `?format=colunar`).
+    Respostas que não são listas de objetos (detalhe, erros) saem em JSON
+    normal; na listagem paginada, apenas `results` é convertido.
+    """
+
+    media_type = 'application/vnd.resumos.colunar+json'
+    format = 'colunar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(_colunar(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack com a mesma estrutura do JSON.
+
+    Accept: application/msgpack (ou `?format=msgpack`).
+    """
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def __init__(self):
+        self._codificador = CodificadorJSON()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self._codificador.default, use_bin_type=True)
+
+
+class ColunarMessagePackRenderer(MessagePackRenderer):
+    """
+    MessagePack com as listagens em colunas (ver ColunarJSONRenderer).
+
+    Accept: application/vnd.resumos.colunar+msgpack (ou `?format=colunar-msgpack`).
+    """
+
+    media_type = 'application/vnd.resumos.colunar+msgpack'
+    format = 'colunar-msgpack'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(_colunar(data), accepted_media_type, renderer_context)
+
+
+def codificar_colunar(linhas):
+    """
+    Converte uma lista de objetos em colunas.
+
+    Cada campo vira uma coluna, na ordem em que aparece nas linhas:
+
+    - lista simples de valores: {"id": [1, 2, 3]}
+    - textos repetidos, codificados por dicionário:
+      {"disciplina_nome": {"dicionario": ["Direito", "Português"], "indices": [0, 0, 1]}}
+    - objetos aninhados (ex.: metadados), codificados recursivamente, com os
+      índices das linhas em que o objeto é null:
+      {"metadados": {"linhas": 3, "colunas": {...}, "nulos": [2]}}
+
+    Args:
+        linhas (list): Objetos (dicts) com os mesmos campos
+
+    Returns:
+        dict: {'linhas': total de linhas, 'colunas': {campo: coluna}}
+    """
+    campos = dict.fromkeys(chain.from_iterable(linhas))
+    return {
+        'linhas': len(linhas),
+        'colunas': {
+            campo: _codificar_coluna([linha.get(campo) for linha in linhas])
+            for campo in campos
+        },
+    }
+
+
+def _colunar(data):
+    """Converte a listagem (ou `results` da paginada) de `data` em colunas"""
+    if _linhas(data):
+        return codificar_colunar(data)
+    if isinstance(data, dict) and _linhas(data.get('results')):
+        return {**data, 'results': codificar_colunar(data['results'])}
+    return data
+
+
+def _linhas(data):
+    """Se `data` é uma lista não vazia de objetos"""
+    return isinstance(data, list) and bool(data) and all(isinstance(linha, dict) for linha in data)
+
+
+def _codificar_coluna(valores):
+    presentes = [valor for valor in valores if valor is not None]
+    if not presentes:
+        return valores
+
+    if all(isinstance(valor, dict) for valor in presentes):
+        coluna = codificar_colunar([valor or {} for valor in valores])
+        nulos = [i for i, valor in enumerate(valores) if valor is None]
+        if nulos:
+            coluna['nulos'] = nulos
+        return coluna
+
+    # Dicionário só compensa quando os textos se repetem
+    if all(isinstance(valor, str) for valor in presentes):
+        indices_por_valor = {}
+        indices = [indices_por_valor.setdefault(valor, len(indices_por_valor)) for valor in valores]
+        if len(indices_por_valor) <= len(valores) // 2:
+            return {'dicionario': list(indices_por_valor), 'indices': indices}
+
+    return valores
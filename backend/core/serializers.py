@@ -4,18 +4,92 @@ Serializers para a API REST do sistema de mapas de estudos.
 Converte os modelos Django em JSON e vice-versa, com validações.
 """
 
-from rest_framework import serializers
+from rest_framework import permissions, serializers
 from .models import (
     Disciplina,
     Assunto,
     Subassunto,
     Concurso,
     MapaAssunto,
-    MetadadosAssunto
+    MetadadosAssunto,
+    Tarefa
 )
 
 
-class SubassuntoSerializer(serializers.ModelSerializer):
+def _arvore_de_campos(valor):
+    """
+    Converte 'id,mapa_assuntos.ordem' em {'id': {}, 'mapa_assuntos': {'ordem': {}}}.
+    """
+    arvore = {}
+    for caminho in valor.split(','):
+        no = arvore
+        for parte in caminho.strip().split('.'):
+            if parte:
+                no = no.setdefault(parte, {})
+    return arvore
+
+
+class CamposDinamicosMixin:
+    """
+    Seleção dos campos da resposta pela query string (apenas em leituras).
+    
+    ?fields=id,nome,mapa_assuntos.ordem
+        Apenas os campos listados. O caminho com ponto escolhe os campos de
+        um serializer aninhado; listado sem subcampos, ele vem completo.
+    ?expand=mapa_assuntos.metadados
+        Com o parâmetro presente, serializers aninhados só são incluídos se
+        listados nele (ou em `fields`). Sem o parâmetro, continuam incluídos.
+    
+    As views ajustam a consulta aos campos escolhidos (ver
+    ConsultaOtimizadaMixin).
+    """
+    PARAMETRO_CAMPOS = 'fields'
+    PARAMETRO_EXPANDIR = 'expand'
+    
+    def get_fields(self):
+        campos = super().get_fields()
+        selecao, expandir = self._selecao()
+        
+        if selecao is not None:
+            campos = {nome: campo for nome, campo in campos.items() if nome in selecao}
+        
+        for nome, campo in list(campos.items()):
+            if not isinstance(campo, serializers.BaseSerializer):
+                continue
+            
+            listado = selecao is not None and nome in selecao
+            if expandir is not None and nome not in expandir and not listado:
+                del campos[nome]
+                continue
+            
+            filho = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+            if isinstance(filho, CamposDinamicosMixin):
+                filho._selecao_do_pai = (
+                    (selecao or {}).get(nome) or None,
+                    expandir.get(nome, {}) if expandir is not None else None
+                )
+        
+        return campos
+    
+    def _selecao(self):
+        """Árvores (campos, expandir) deste serializer; None sem restrição"""
+        if hasattr(self, '_selecao_do_pai'):
+            return self._selecao_do_pai
+        
+        request = self.context.get('request')
+        raiz = self.root.child if isinstance(self.root, serializers.ListSerializer) else self.root
+        if request is None or raiz is not self or request.method not in permissions.SAFE_METHODS:
+            return None, None
+        
+        campos = request.query_params.get(self.PARAMETRO_CAMPOS)
+        expandir = request.query_params.get(self.PARAMETRO_EXPANDIR)
+        return (
+            _arvore_de_campos(campos) if campos else None,
+            _arvore_de_campos(expandir) if expandir is not None else None
+        )
+
+
+class SubassuntoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para Subassuntos.
     
@@ -27,7 +101,7 @@ class SubassuntoSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class AssuntoSerializer(serializers.ModelSerializer):
+class AssuntoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para Assuntos.
     
@@ -49,7 +123,7 @@ class AssuntoSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'total_subassuntos']
 
 
-class DisciplinaSerializer(serializers.ModelSerializer):
+class DisciplinaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para Disciplinas.
     
@@ -68,7 +142,7 @@ class DisciplinaSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'total_assuntos', 'created_at', 'updated_at']
 
 
-class DisciplinaListSerializer(serializers.ModelSerializer):
+class DisciplinaListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer simplificado para listagem de Disciplinas.
     
@@ -82,7 +156,7 @@ class DisciplinaListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'total_assuntos']
 
 
-class MetadadosAssuntoSerializer(serializers.ModelSerializer):
+class MetadadosAssuntoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para Metadados dos Assuntos - Formato Tutory.
     
@@ -126,6 +200,13 @@ class MetadadosAssuntoSerializer(serializers.ModelSerializer):
             'id', 'suplementar_display',
             'created_at', 'updated_at'
         ]
+        dependencias = {
+            'suplementar_display': ('suplementar',),
+            'dica_length': ('dica',),
+            'dica_revisoes_length': ('dica_revisoes',),
+            'dica_questoes_length': ('dica_questoes',),
+            'referencia_length': ('referencia',),
+        }
     
     def get_dica_length(self, obj):
         return len(obj.dica) if obj.dica else 0
@@ -155,7 +236,7 @@ class MetadadosAssuntoSerializer(serializers.ModelSerializer):
         return value
 
 
-class MapaAssuntoSerializer(serializers.ModelSerializer):
+class MapaAssuntoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para Mapas de Assuntos.
     
@@ -186,6 +267,9 @@ class MapaAssuntoSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'nome_completo', 'created_at', 'updated_at']
+        dependencias = {
+            'nome_completo': ('extra_cursinho', 'nome_extra', 'assunto.nome', 'subassunto.nome'),
+        }
     
     def validate(self, data):
         """
@@ -211,7 +295,61 @@ class MapaAssuntoSerializer(serializers.ModelSerializer):
         return data
 
 
-class ConcursoSerializer(serializers.ModelSerializer):
+class MapaAssuntoLoteItemSerializer(serializers.Serializer):
+    """
+    Item de criação em lote de Mapas de Assuntos.
+    
+    Valida apenas o formato de cada item; as FKs são validadas em conjunto
+    por MapaAssuntoLoteService, com poucas consultas para o lote inteiro.
+    A ordem é atribuída pelo servidor.
+    """
+    concurso = serializers.IntegerField()
+    assunto = serializers.IntegerField(required=False, allow_null=True, default=None)
+    subassunto = serializers.IntegerField(required=False, allow_null=True, default=None)
+    item_edital = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+    extra_cursinho = serializers.BooleanField(required=False, default=False)
+    nome_extra = serializers.CharField(max_length=300, required=False, allow_blank=True, default='')
+    
+    def validate(self, data):
+        """Mesmas regras de MapaAssuntoSerializer.validate"""
+        if data['extra_cursinho'] and not data['nome_extra']:
+            raise serializers.ValidationError({
+                'nome_extra': 'Assuntos extras devem ter um nome definido'
+            })
+        
+        if not data['extra_cursinho'] and not data['assunto']:
+            raise serializers.ValidationError({
+                'assunto': 'Assuntos não-extras devem estar vinculados a um assunto da matriz'
+            })
+        
+        if data['subassunto'] and not data['assunto']:
+            raise serializers.ValidationError({
+                'subassunto': 'Subassuntos devem estar vinculados a um assunto'
+            })
+        
+        return data
+
+
+class MapaAssuntoLoteRemocaoSerializer(serializers.Serializer):
+    """
+    Filtro de remoção em lote de Mapas de Assuntos de um concurso.
+    
+    Pelo menos um filtro (ids, assuntos ou disciplina) deve ser informado.
+    """
+    concurso = serializers.IntegerField()
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    assuntos = serializers.ListField(child=serializers.IntegerField(), required=False)
+    disciplina = serializers.IntegerField(required=False)
+    
+    def validate(self, data):
+        if not any(campo in data for campo in ('ids', 'assuntos', 'disciplina')):
+            raise serializers.ValidationError(
+                'Informe ids, assuntos ou disciplina para remover'
+            )
+        return data
+
+
+class ConcursoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer para Concursos.
     
@@ -236,9 +374,10 @@ class ConcursoSerializer(serializers.ModelSerializer):
             'criado_por', 'criado_por_email',
             'created_at', 'updated_at'
         ]
+        dependencias = {'tipo_display': ('tipo',)}
 
 
-class ConcursoListSerializer(serializers.ModelSerializer):
+class ConcursoListSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """
     Serializer simplificado para listagem de Concursos.
     
@@ -255,6 +394,24 @@ class ConcursoListSerializer(serializers.ModelSerializer):
             'total_assuntos_mapa', 'created_at'
         ]
         read_only_fields = ['id', 'tipo_display', 'total_assuntos_mapa', 'created_at']
+        dependencias = {'tipo_display': ('tipo',)}
+
+
+class TarefaSerializer(serializers.ModelSerializer):
+    """
+    Serializer para acompanhamento de Tarefas em segundo plano.
+    """
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    
+    class Meta:
+        model = Tarefa
+        fields = [
+            'id', 'tipo', 'tipo_display', 'estado', 'estado_display',
+            'parametros', 'progresso', 'resultado', 'erro',
+            'iniciada_em', 'concluida_em', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
 
 
 class MatrizImportSerializer(serializers.Serializer):
@@ -268,6 +425,17 @@ class MatrizImportSerializer(serializers.Serializer):
         default=False,
         help_text='Se True, remove a matriz existente antes de importar'
     )
+    substituir = serializers.BooleanField(
+        default=False,
+        help_text=(
+            'Se True, torna a matriz igual ao arquivo, mantendo os IDs (e os mapas) '
+            'dos itens que continuam nele'
+        )
+    )
+    simular = serializers.BooleanField(
+        default=False,
+        help_text='Se True, apenas compara a planilha com a matriz atual, sem gravar nada'
+    )
     
     def validate_arquivo(self, value):
         """Valida que o arquivo é um Excel válido"""
@@ -283,3 +451,11 @@ class MatrizImportSerializer(serializers.Serializer):
             )
         
         return value
+    
+    def validate(self, data):
+        """Substituir e limpar a matriz existente são modos exclusivos"""
+        if data.get('substituir') and data.get('limpar_existente'):
+            raise serializers.ValidationError(
+                'Use apenas um dos modos: substituir ou limpar_existente'
+            )
+        return data
@@ -4,9 +4,734 @@ Serviços de negócio do sistema.
 Contém lógica de importação, exportação e processamento de dados.
 """
 
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import groupby
+from io import BytesIO
+from operator import itemgetter
+
 import openpyxl
-from django.db import transaction
-from .models import Disciplina, Assunto, Subassunto
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+from . import compressao, processos
+from .cache import CacheLRU
+from .renderers import JSONRapidoRenderer
+from .models import (
+    Disciplina,
+    Assunto,
+    Subassunto,
+    Concurso,
+    MapaAssunto,
+    MetadadosAssunto,
+    MatrizVersao,
+    ImportacaoMatriz,
+    IndiceBusca,
+    Tarefa
+)
+
+
+class ContadoresService:
+    """
+    Serviço de manutenção das colunas de contagem (counter cache).
+    
+    Contadores mantidos:
+    - Disciplina.total_assuntos: assuntos da disciplina
+    - Assunto.total_subassuntos: subassuntos do assunto
+    - Concurso.total_assuntos_mapa: itens do mapa do concurso
+    
+    Saves e deletes individuais são tratados pelos sinais em core/signals.py.
+    Operações em massa (bulk_create, delete de querysets, importação) devem
+    rodar dentro de `suspender()` e depois chamar `recalcular()` para os
+    registros pais afetados.
+    """
+    
+    # modelo pai -> (campo contador, modelo filho, campo FK do filho)
+    CONTADORES = {
+        Disciplina: ('total_assuntos', Assunto, 'disciplina'),
+        Assunto: ('total_subassuntos', Subassunto, 'assunto'),
+        Concurso: ('total_assuntos_mapa', MapaAssunto, 'concurso'),
+    }
+    
+    _estado = threading.local()
+    
+    @classmethod
+    @contextmanager
+    def suspender(cls):
+        """
+        Suspende a atualização incremental feita pelos sinais.
+        
+        Usado por operações em massa, que recalculam os contadores de uma vez
+        ao final com `recalcular()`.
+        """
+        cls._estado.profundidade = getattr(cls._estado, 'profundidade', 0) + 1
+        try:
+            yield
+        finally:
+            cls._estado.profundidade -= 1
+    
+    @classmethod
+    def suspenso(cls):
+        """Retorna True se a atualização incremental está suspensa"""
+        return getattr(cls._estado, 'profundidade', 0) > 0
+    
+    @classmethod
+    def incrementar(cls, modelo, pk, delta):
+        """
+        Soma `delta` ao contador do registro `pk` de `modelo`.
+        
+        Decrementos nunca deixam o contador negativo.
+        """
+        if pk is None or delta == 0 or cls.suspenso():
+            return
+        
+        campo = cls.CONTADORES[modelo][0]
+        queryset = modelo.objects.filter(pk=pk)
+        if delta < 0:
+            queryset = queryset.filter(**{f'{campo}__gte': -delta})
+        queryset.update(**{campo: F(campo) + delta})
+    
+    @classmethod
+    def _contagem_real(cls, modelo):
+        """Subquery com a contagem real de filhos de cada registro de `modelo`"""
+        _, filho, fk = cls.CONTADORES[modelo]
+        contagem = filho.objects.filter(
+            **{fk: OuterRef('pk')}
+        ).order_by().values(fk).annotate(total=Count('pk')).values('total')
+        return Coalesce(
+            Subquery(contagem, output_field=IntegerField()),
+            Value(0)
+        )
+    
+    @classmethod
+    def recalcular(cls, modelo, ids=None):
+        """
+        Recalcula o contador de `modelo` com um único UPDATE.
+        
+        Args:
+            modelo: Disciplina, Assunto ou Concurso
+            ids: IDs a recalcular (None recalcula todos)
+            
+        Returns:
+            int: Número de registros atualizados
+        """
+        campo = cls.CONTADORES[modelo][0]
+        queryset = modelo.objects.all()
+        if ids is not None:
+            ids = set(ids)
+            if not ids:
+                return 0
+            queryset = queryset.filter(pk__in=ids)
+        return queryset.update(**{campo: cls._contagem_real(modelo)})
+    
+    @classmethod
+    def divergentes(cls, modelo):
+        """Retorna os registros de `modelo` cujo contador está incorreto"""
+        campo = cls.CONTADORES[modelo][0]
+        return modelo.objects.annotate(
+            contagem_real=cls._contagem_real(modelo)
+        ).exclude(**{campo: F('contagem_real')})
+
+
+class MatrizArvoreService:
+    """
+    Monta a árvore completa da matriz (Disciplina > Assunto > Subassunto).
+    
+    Carrega cada tabela com uma única consulta `values_list()` ordenada e
+    monta a estrutura aninhada em uma passada, sem o custo por objeto dos
+    serializers do DRF. O resultado tem o mesmo formato JSON de
+    DisciplinaSerializer (com AssuntoSerializer e SubassuntoSerializer).
+    """
+    
+    def __init__(self):
+        self._data_hora = serializers.DateTimeField()
+    
+    def montar(self, disciplinas=None):
+        """
+        Monta a árvore da matriz.
+        
+        Args:
+            disciplinas: QuerySet de Disciplina já filtrado e ordenado
+                (None usa todas, na ordenação padrão)
+                
+        Returns:
+            list: Disciplinas com assuntos e subassuntos aninhados
+        """
+        if disciplinas is None:
+            disciplinas = Disciplina.objects.all()
+        
+        formatar_data = self._data_hora.to_representation
+        arvore = []
+        nomes_disciplinas = {}
+        assuntos_por_disciplina = {}
+        
+        for (pk, nome, ordem, ativa, total_assuntos,
+             created_at, updated_at) in disciplinas.values_list(
+                'id', 'nome', 'ordem', 'ativa', 'total_assuntos',
+                'created_at', 'updated_at'):
+            assuntos = []
+            nomes_disciplinas[pk] = nome
+            assuntos_por_disciplina[pk] = assuntos
+            arvore.append({
+                'id': pk,
+                'nome': nome,
+                'ordem': ordem,
+                'ativa': ativa,
+                'assuntos': assuntos,
+                'total_assuntos': total_assuntos,
+                'created_at': formatar_data(created_at),
+                'updated_at': formatar_data(updated_at),
+            })
+        
+        if not arvore:
+            return arvore
+        
+        filtro_assuntos = {}
+        filtro_subassuntos = {}
+        if disciplinas.query.where:
+            ids = disciplinas.order_by().values('pk')
+            filtro_assuntos = {'disciplina__in': ids}
+            filtro_subassuntos = {'assunto__disciplina__in': ids}
+        
+        subassuntos_por_assunto = {}
+        for (pk, disciplina_id, nome, ordem, ativo, total_subassuntos,
+             link_resumos, link_questoes_cebraspe, link_questoes_fgv,
+             dica) in Assunto.objects.filter(**filtro_assuntos).order_by(
+                'ordem', 'nome').values_list(
+                'id', 'disciplina_id', 'nome', 'ordem', 'ativo',
+                'total_subassuntos', 'link_resumos', 'link_questoes_cebraspe',
+                'link_questoes_fgv', 'dica'):
+            subassuntos = []
+            subassuntos_por_assunto[pk] = subassuntos
+            assuntos_por_disciplina[disciplina_id].append({
+                'id': pk,
+                'nome': nome,
+                'ordem': ordem,
+                'ativo': ativo,
+                'disciplina': disciplina_id,
+                'disciplina_nome': nomes_disciplinas[disciplina_id],
+                'subassuntos': subassuntos,
+                'total_subassuntos': total_subassuntos,
+                'link_resumos': link_resumos,
+                'link_questoes_cebraspe': link_questoes_cebraspe,
+                'link_questoes_fgv': link_questoes_fgv,
+                'dica': dica,
+            })
+        
+        for pk, assunto_id, nome, ordem, ativo in Subassunto.objects.filter(
+                **filtro_subassuntos).order_by('ordem', 'nome').values_list(
+                'id', 'assunto_id', 'nome', 'ordem', 'ativo'):
+            subassuntos_por_assunto[assunto_id].append({
+                'id': pk,
+                'nome': nome,
+                'ordem': ordem,
+                'ativo': ativo,
+            })
+        
+        return arvore
+
+
+class MatrizSnapshotService:
+    """
+    Snapshots imutáveis e endereçados por conteúdo da matriz completa.
+    
+    O corpo JSON da árvore (MatrizArvoreService) é gerado uma vez por versão
+    da matriz (MatrizVersao) e guardado no cache do Django sob o hash SHA-256
+    do próprio conteúdo. O hash serve como ETag forte e como chave da URL
+    versionada /api/matriz/<hash>/, que pode ser cacheada indefinidamente.
+    
+    Alterações individuais invalidam a versão pelos sinais em core/signals.py.
+    Operações em massa devem rodar dentro de `adiar_invalidacao()`, que
+    gera uma única nova versão ao final.
+    """
+    
+    PREFIXO_CACHE = 'matriz:snapshot'
+    TIMEOUT_CACHE = 60 * 60 * 24 * 7
+    
+    _estado = threading.local()
+    
+    @classmethod
+    def versao_atual(cls):
+        """Retorna o token da versão atual da matriz"""
+        token = MatrizVersao.objects.filter(pk=1).values_list('token', flat=True).first()
+        if token is None:
+            versao, _ = MatrizVersao.objects.get_or_create(
+                pk=1, defaults={'token': uuid.uuid4().hex}
+            )
+            token = versao.token
+        return token
+    
+    @classmethod
+    def invalidar(cls):
+        """Gera uma nova versão da matriz (ou adia, se em modo de lote)"""
+        if getattr(cls._estado, 'profundidade', 0) > 0:
+            cls._estado.pendente = True
+            return
+        
+        atualizados = MatrizVersao.objects.filter(pk=1).update(
+            token=uuid.uuid4().hex, atualizado_em=timezone.now()
+        )
+        if not atualizados:
+            MatrizVersao.objects.get_or_create(pk=1, defaults={'token': uuid.uuid4().hex})
+    
+    @classmethod
+    @contextmanager
+    def adiar_invalidacao(cls):
+        """Agrupa as invalidações do bloco em uma única nova versão ao final"""
+        cls._estado.profundidade = getattr(cls._estado, 'profundidade', 0) + 1
+        try:
+            yield
+        except BaseException:
+            # A transação do lote será desfeita; não há nova versão a gerar
+            cls._estado.profundidade -= 1
+            if cls._estado.profundidade == 0:
+                cls._estado.pendente = False
+            raise
+        
+        cls._estado.profundidade -= 1
+        if cls._estado.profundidade == 0 and getattr(cls._estado, 'pendente', False):
+            cls._estado.pendente = False
+            cls.invalidar()
+    
+    @classmethod
+    def etag_atual(cls):
+        """
+        Retorna o hash do snapshot da versão atual, gerando-o se necessário.
+        
+        Returns:
+            str: Hash SHA-256 (hex) do corpo JSON da matriz
+        """
+        token = cls.versao_atual()
+        hash_conteudo = cache.get(f'{cls.PREFIXO_CACHE}:versao:{token}')
+        if hash_conteudo is None or not cache.has_key(f'{cls.PREFIXO_CACHE}:corpo:{hash_conteudo}'):
+            hash_conteudo, _ = cls._gerar(token)
+        return hash_conteudo
+    
+    @classmethod
+    def snapshot_atual(cls):
+        """
+        Retorna o snapshot da versão atual.
+        
+        Returns:
+            tuple: (hash, corpo JSON em bytes)
+        """
+        hash_conteudo = cls.etag_atual()
+        corpo = cls.obter_corpo(hash_conteudo)
+        if corpo is None:
+            hash_conteudo, corpo = cls._gerar(cls.versao_atual())
+        return hash_conteudo, corpo
+    
+    @classmethod
+    def obter_corpo(cls, hash_conteudo):
+        """Retorna o corpo JSON (bytes) do snapshot `hash_conteudo`, ou None"""
+        return cache.get(f'{cls.PREFIXO_CACHE}:corpo:{hash_conteudo}')
+    
+    @classmethod
+    def obter_variante(cls, hash_conteudo, corpo, codificacao):
+        """
+        Corpo do snapshot comprimido com `codificacao` ('br' ou 'gzip').
+        
+        A variante é gerada na primeira leitura e guardada no cache ao lado
+        do corpo, sob o mesmo hash.
+        
+        Returns:
+            tuple: (bytes, segundos gastos comprimindo ou None se veio do cache)
+        """
+        chave = f'{cls.PREFIXO_CACHE}:corpo:{hash_conteudo}:{codificacao}'
+        comprimido = cache.get(chave)
+        if comprimido is not None:
+            return comprimido, None
+        
+        comprimido, duracao = compressao.medir_compressao(corpo, codificacao, cache=True)
+        cache.set(chave, comprimido, cls.TIMEOUT_CACHE)
+        return comprimido, duracao
+    
+    @classmethod
+    def _gerar(cls, token):
+        """Gera o snapshot da versão `token` e o guarda no cache"""
+        corpo = JSONRapidoRenderer().render(MatrizArvoreService().montar())
+        hash_conteudo = hashlib.sha256(corpo).hexdigest()
+        cache.set_many({
+            f'{cls.PREFIXO_CACHE}:corpo:{hash_conteudo}': corpo,
+            f'{cls.PREFIXO_CACHE}:versao:{token}': hash_conteudo,
+        }, cls.TIMEOUT_CACHE)
+        return hash_conteudo, corpo
+
+
+class BuscaService:
+    """
+    Busca textual na matriz e nos itens de mapa, sem acentos e por relevância.
+    
+    Os nomes são normalizados em Python (sem acentos, minúsculas, só letras
+    e números) e gravados em IndiceBusca; a busca usa o índice full-text do
+    banco sobre essa coluna: FTS5 no SQLite (ranking por bm25) e tsvector com
+    índice GIN no PostgreSQL (ranking por ts_rank). Cada termo casa pelo
+    prefixo das palavras ("licit" encontra "Licitações"); todos os termos
+    precisam casar. Em outros bancos, a busca cai para LIKE na coluna
+    normalizada, sem ranking.
+    
+    O índice é mantido pelos sinais em saves individuais, pelo cascade das
+    FKs em deletes e explicitamente nas operações em massa (importação e
+    substituição da matriz, criação de mapas em lote, duplicação).
+    """
+    
+    TIPOS = ('disciplina', 'assunto', 'subassunto', 'mapa')
+    
+    # Coluna de IndiceBusca com o registro indexado, por tipo
+    CAMPOS = {
+        'disciplina': 'disciplina_id',
+        'assunto': 'assunto_id',
+        'subassunto': 'subassunto_id',
+        'mapa': 'mapa_assunto_id',
+    }
+    
+    LIMITE_PADRAO = 20
+    LIMITE_MAXIMO = 100
+    
+    TAMANHO_LOTE = 1000
+    
+    TABELA_FTS = 'core_indicebusca_fts'
+    
+    @staticmethod
+    def normalizar(texto):
+        """Texto sem acentos, em minúsculas e só com letras e números"""
+        sem_acentos = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+        return ' '.join(re.findall(r'[a-z0-9]+', sem_acentos.casefold()))
+    
+    @classmethod
+    def termos(cls, texto):
+        """Palavras normalizadas de `texto` (sem repetições, na ordem)"""
+        return list(dict.fromkeys(cls.normalizar(texto).split()))
+    
+    @classmethod
+    def texto_indexado(cls, instancia):
+        """
+        Texto de `instancia` para o índice.
+        
+        Itens de mapa só têm entrada própria com nome extra ou item do edital;
+        os demais são encontrados pelo assunto.
+        
+        Returns:
+            tuple: (tipo, texto normalizado)
+        """
+        if isinstance(instancia, MapaAssunto):
+            return 'mapa', cls.normalizar(f'{instancia.nome_extra or ""} {instancia.item_edital or ""}')
+        tipo = {Disciplina: 'disciplina', Assunto: 'assunto', Subassunto: 'subassunto'}[type(instancia)]
+        return tipo, cls.normalizar(instancia.nome)
+    
+    @classmethod
+    def indexar(cls, instancia, criado=False):
+        """
+        Cria ou atualiza a entrada de `instancia` no índice, com um comando SQL.
+        
+        Args:
+            instancia: Disciplina, Assunto, Subassunto ou MapaAssunto
+            criado (bool): Registro recém-criado (ainda sem entrada)
+        """
+        tipo, texto = cls.texto_indexado(instancia)
+        campo = cls.CAMPOS[tipo]
+        
+        if not texto:
+            if not criado:
+                IndiceBusca.objects.filter(**{campo: instancia.pk}).delete()
+            return
+        
+        # Upsert em um único comando (INSERT ... ON CONFLICT DO UPDATE)
+        alvo = [campo.removesuffix('_id')] if connection.features.supports_update_conflicts_with_target else None
+        IndiceBusca.objects.bulk_create(
+            [IndiceBusca(tipo=tipo, texto=texto, **{campo: instancia.pk})],
+            update_conflicts=True,
+            unique_fields=alvo,
+            update_fields=['texto']
+        )
+    
+    @classmethod
+    def reindexar_matriz(cls, disciplina_ids=None):
+        """
+        Sincroniza o índice com disciplinas, assuntos e subassuntos.
+        
+        Args:
+            disciplina_ids: Restringe às disciplinas (e seus itens); None para
+                a matriz inteira
+        
+        Returns:
+            dict: Entradas criadas, atualizadas e removidas
+        """
+        disciplinas = Disciplina.objects.all()
+        assuntos = Assunto.objects.all()
+        subassuntos = Subassunto.objects.all()
+        existentes = IndiceBusca.objects.filter(tipo__in=('disciplina', 'assunto', 'subassunto'))
+        
+        if disciplina_ids is not None:
+            disciplina_ids = list(disciplina_ids)
+            disciplinas = disciplinas.filter(pk__in=disciplina_ids)
+            assuntos = assuntos.filter(disciplina_id__in=disciplina_ids)
+            subassuntos = subassuntos.filter(assunto__disciplina_id__in=disciplina_ids)
+            existentes = existentes.filter(
+                Q(disciplina_id__in=disciplina_ids) |
+                Q(assunto__disciplina_id__in=disciplina_ids) |
+                Q(subassunto__assunto__disciplina_id__in=disciplina_ids)
+            )
+        
+        desejadas = {}
+        for tipo, queryset in (('disciplina', disciplinas), ('assunto', assuntos), ('subassunto', subassuntos)):
+            for pk, nome in queryset.values_list('pk', 'nome').iterator():
+                desejadas[(tipo, pk)] = cls.normalizar(nome)
+        
+        return cls._sincronizar(existentes, desejadas)
+    
+    @classmethod
+    def reindexar_mapas(cls, ids=None, concurso_ids=None):
+        """
+        Sincroniza o índice com os itens de mapa.
+        
+        Args:
+            ids: Restringe aos itens informados
+            concurso_ids: Restringe aos itens dos concursos informados
+        
+        Returns:
+            dict: Entradas criadas, atualizadas e removidas
+        """
+        mapas = MapaAssunto.objects.all()
+        existentes = IndiceBusca.objects.filter(tipo='mapa')
+        if ids is not None:
+            ids = list(ids)
+            mapas = mapas.filter(pk__in=ids)
+            existentes = existentes.filter(mapa_assunto_id__in=ids)
+        if concurso_ids is not None:
+            concurso_ids = list(concurso_ids)
+            mapas = mapas.filter(concurso_id__in=concurso_ids)
+            existentes = existentes.filter(mapa_assunto__concurso_id__in=concurso_ids)
+        
+        desejadas = {}
+        com_texto = mapas.exclude(nome_extra='', item_edital='')
+        for pk, nome_extra, item_edital in com_texto.values_list('pk', 'nome_extra', 'item_edital').iterator():
+            texto = cls.normalizar(f'{nome_extra or ""} {item_edital or ""}')
+            if texto:
+                desejadas[('mapa', pk)] = texto
+        
+        return cls._sincronizar(existentes, desejadas)
+    
+    @classmethod
+    def reindexar(cls):
+        """Sincroniza o índice inteiro"""
+        with transaction.atomic():
+            estatisticas = cls.reindexar_matriz()
+            for chave, valor in cls.reindexar_mapas().items():
+                estatisticas[chave] += valor
+        return estatisticas
+    
+    @classmethod
+    def _sincronizar(cls, existentes, desejadas):
+        """
+        Grava só as diferenças entre as entradas `existentes` e `desejadas`.
+        
+        Args:
+            existentes: QuerySet de IndiceBusca no escopo da sincronização
+            desejadas (dict): (tipo, id do registro) -> texto normalizado
+        """
+        atuais = {}
+        for entrada in existentes.values('pk', 'tipo', 'texto', *cls.CAMPOS.values()).iterator():
+            tipo = entrada['tipo']
+            atuais[(tipo, entrada[cls.CAMPOS[tipo]])] = (entrada['pk'], entrada['texto'])
+        
+        removidas = [pk for chave, (pk, _) in atuais.items() if chave not in desejadas]
+        alteradas = [
+            IndiceBusca(pk=atuais[chave][0], texto=texto)
+            for chave, texto in desejadas.items()
+            if chave in atuais and atuais[chave][1] != texto
+        ]
+        novas = [
+            IndiceBusca(tipo=tipo, texto=texto, **{cls.CAMPOS[tipo]: pk})
+            for (tipo, pk), texto in desejadas.items()
+            if (tipo, pk) not in atuais
+        ]
+        
+        for inicio in range(0, len(removidas), cls.TAMANHO_LOTE):
+            IndiceBusca.objects.filter(pk__in=removidas[inicio:inicio + cls.TAMANHO_LOTE]).delete()
+        IndiceBusca.objects.bulk_update(alteradas, ['texto'], batch_size=cls.TAMANHO_LOTE)
+        IndiceBusca.objects.bulk_create(novas, batch_size=cls.TAMANHO_LOTE)
+        
+        return {'criadas': len(novas), 'atualizadas': len(alteradas), 'removidas': len(removidas)}
+    
+    @classmethod
+    def _consulta_textual(cls, termos):
+        """Expressão de busca do banco com todos os `termos` como prefixo"""
+        if connection.vendor == 'postgresql':
+            return ' & '.join(f'{termo}:*' for termo in termos)
+        return ' '.join(f'"{termo}"*' for termo in termos)
+    
+    @classmethod
+    def correspondencias(cls, texto, tipo):
+        """
+        IDs dos registros de `tipo` que casam com todos os termos de `texto`.
+        
+        Para uso como subconsulta (`pk__in=`) nos filtros de busca das views.
+        
+        Returns:
+            QuerySet: values_list com os IDs, ou None se `texto` não tem termos
+        """
+        termos = cls.termos(texto)
+        if not termos:
+            return None
+        
+        entradas = IndiceBusca.objects.filter(tipo=tipo)
+        if connection.vendor == 'sqlite':
+            entradas = entradas.filter(pk__in=RawSQL(
+                f'SELECT rowid FROM {cls.TABELA_FTS} WHERE {cls.TABELA_FTS} MATCH %s',
+                [cls._consulta_textual(termos)]
+            ))
+        elif connection.vendor == 'postgresql':
+            entradas = entradas.filter(pk__in=RawSQL(
+                f"SELECT id FROM {IndiceBusca._meta.db_table} "
+                f"WHERE to_tsvector('simple', texto) @@ to_tsquery('simple', %s)",
+                [cls._consulta_textual(termos)]
+            ))
+        else:
+            for termo in termos:
+                entradas = entradas.filter(texto__contains=termo)
+        return entradas.values_list(cls.CAMPOS[tipo], flat=True)
+    
+    @classmethod
+    def buscar(cls, texto, tipos=None, limite=None):
+        """
+        Registros mais relevantes para `texto`.
+        
+        Args:
+            texto (str): Termos da busca
+            tipos: Tipos a incluir (TIPOS); None para todos
+            limite (int): Máximo de resultados (LIMITE_PADRAO, até LIMITE_MAXIMO)
+        
+        Returns:
+            list: Dicts com tipo, id, nome e relevância de cada resultado, mais
+            a disciplina/assunto (matriz) ou o concurso (itens de mapa)
+        """
+        termos = cls.termos(texto)
+        tipos = list(tipos or cls.TIPOS)
+        limite = min(limite or cls.LIMITE_PADRAO, cls.LIMITE_MAXIMO)
+        if not termos or not tipos:
+            return []
+        
+        relevancias = cls._ranquear(termos, tipos, limite)
+        contexto = {
+            entrada['pk']: entrada
+            for entrada in IndiceBusca.objects.filter(pk__in=relevancias).values(
+                'pk', 'tipo',
+                'disciplina_id', 'disciplina__nome',
+                'assunto_id', 'assunto__nome', 'assunto__disciplina_id', 'assunto__disciplina__nome',
+                'subassunto_id', 'subassunto__nome', 'subassunto__assunto_id', 'subassunto__assunto__nome',
+                'subassunto__assunto__disciplina_id', 'subassunto__assunto__disciplina__nome',
+                'mapa_assunto_id', 'mapa_assunto__nome_extra', 'mapa_assunto__item_edital',
+                'mapa_assunto__extra_cursinho', 'mapa_assunto__assunto__nome', 'mapa_assunto__subassunto__nome',
+                'mapa_assunto__concurso_id', 'mapa_assunto__concurso__sigla',
+            )
+        }
+        return [
+            cls._formatar(contexto[pk], relevancia)
+            for pk, relevancia in relevancias.items()
+            if pk in contexto
+        ]
+    
+    @classmethod
+    def _ranquear(cls, termos, tipos, limite):
+        """
+        IDs das entradas do índice que casam com os termos, da mais relevante
+        para a menos relevante.
+        
+        Returns:
+            dict: id da entrada -> relevância (maior é melhor)
+        """
+        tabela = IndiceBusca._meta.db_table
+        marcadores = ', '.join(['%s'] * len(tipos))
+        consulta = cls._consulta_textual(termos)
+        
+        if connection.vendor == 'sqlite':
+            # bm25() é negativo: quanto menor, mais relevante
+            sql = (
+                f'SELECT i.id, -bm25({cls.TABELA_FTS}) FROM {cls.TABELA_FTS} '
+                f'JOIN {tabela} i ON i.id = {cls.TABELA_FTS}.rowid '
+                f'WHERE {cls.TABELA_FTS} MATCH %s AND i.tipo IN ({marcadores}) '
+                f'ORDER BY bm25({cls.TABELA_FTS}), i.id LIMIT %s'
+            )
+        elif connection.vendor == 'postgresql':
+            sql = (
+                f"SELECT id, ts_rank(to_tsvector('simple', texto), q) AS relevancia "
+                f"FROM {tabela}, to_tsquery('simple', %s) q "
+                f"WHERE to_tsvector('simple', texto) @@ q AND tipo IN ({marcadores}) "
+                f"ORDER BY relevancia DESC, id LIMIT %s"
+            )
+        else:
+            entradas = IndiceBusca.objects.filter(tipo__in=tipos)
+            for termo in termos:
+                entradas = entradas.filter(texto__contains=termo)
+            return dict.fromkeys(entradas.order_by('pk').values_list('pk', flat=True)[:limite], 0.0)
+        
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [consulta, *tipos, limite])
+            return dict(cursor.fetchall())
+    
+    @staticmethod
+    def _formatar(entrada, relevancia):
+        """Resultado da busca a partir dos valores da entrada do índice"""
+        tipo = entrada['tipo']
+        if tipo == 'disciplina':
+            return {
+                'tipo': tipo, 'id': entrada['disciplina_id'], 'nome': entrada['disciplina__nome'],
+                'relevancia': relevancia,
+            }
+        if tipo == 'assunto':
+            return {
+                'tipo': tipo, 'id': entrada['assunto_id'], 'nome': entrada['assunto__nome'],
+                'relevancia': relevancia,
+                'disciplina': {
+                    'id': entrada['assunto__disciplina_id'], 'nome': entrada['assunto__disciplina__nome'],
+                },
+            }
+        if tipo == 'subassunto':
+            return {
+                'tipo': tipo, 'id': entrada['subassunto_id'], 'nome': entrada['subassunto__nome'],
+                'relevancia': relevancia,
+                'assunto': {
+                    'id': entrada['subassunto__assunto_id'], 'nome': entrada['subassunto__assunto__nome'],
+                },
+                'disciplina': {
+                    'id': entrada['subassunto__assunto__disciplina_id'],
+                    'nome': entrada['subassunto__assunto__disciplina__nome'],
+                },
+            }
+        
+        # Mesmo nome de MapaAssunto.nome_completo
+        if entrada['mapa_assunto__extra_cursinho']:
+            nome = entrada['mapa_assunto__nome_extra']
+        elif entrada['mapa_assunto__subassunto__nome']:
+            nome = f"{entrada['mapa_assunto__assunto__nome']} - {entrada['mapa_assunto__subassunto__nome']}"
+        else:
+            nome = entrada['mapa_assunto__assunto__nome']
+        return {
+            'tipo': tipo, 'id': entrada['mapa_assunto_id'], 'nome': nome,
+            'relevancia': relevancia,
+            'item_edital': entrada['mapa_assunto__item_edital'],
+            'concurso': {
+                'id': entrada['mapa_assunto__concurso_id'], 'sigla': entrada['mapa_assunto__concurso__sigla'],
+            },
+        }
 
 
 class MatrizImportService:
@@ -30,7 +755,24 @@ class MatrizImportService:
     - Coluna H (8): Dica
     """
     
-    def __init__(self):
+    # Linhas lidas entre duas notificações de progresso
+    INTERVALO_PROGRESSO = 500
+    
+    # Abaixo disso (abas ou tamanho do arquivo), as abas são lidas no próprio
+    # processo. Medido: a leitura serial leva ~4,5 s por MiB, e cada processo
+    # filho paga ~0,8 s por MiB só para reabrir o arquivo; abaixo de 512 KiB
+    # o ganho não cobre esse custo e o envio das abas de volta
+    MINIMO_ABAS_PARALELO = 8
+    MINIMO_BYTES_PARALELO = 512 * 1024
+    
+    def __init__(self, ao_progredir=None):
+        """
+        Args:
+            ao_progredir (callable): Opcional; recebe um dict de progresso
+                (etapa e linhas processadas por aba) durante a importação.
+                Na leitura em paralelo, só ao fim de cada bloco de abas
+                (ver `_ler_em_paralelo`)
+        """
         self.erros = []
         self.avisos = []
         self.estatisticas = {
@@ -40,146 +782,748 @@ class MatrizImportService:
             'linhas_processadas': 0,
             'linhas_ignoradas': 0
         }
+        self.abas_ignoradas = []
+        self.ao_progredir = ao_progredir
+        self.progresso = {'etapa': 'leitura', 'linhas_processadas': 0, 'abas': {}}
+        self.processos = getattr(settings, 'IMPORTACAO_MAX_PROCESSOS', 1)
     
-    def importar_arquivo(self, arquivo_path):
+    # Tamanho dos lotes de bulk_create/bulk_update
+    TAMANHO_LOTE = 1000
+    
+    # Campos do assunto preenchidos pela planilha quando ainda estão vazios
+    CAMPOS_LINKS = ('link_resumos', 'link_questoes_cebraspe', 'link_questoes_fgv', 'dica')
+    
+    def importar_arquivo(self, arquivo_path, limpar_existente=False, substituir=False):
         """
         Importa matriz de assuntos de um arquivo Excel.
         
+        A planilha é lida inteira antes da transação; a gravação compara as
+        linhas com a matriz atual carregada em memória e aplica as mudanças
+        com bulk_create/bulk_update.
+        
+        Sem `limpar_existente`, abas cujo conteúdo e cuja disciplina no banco
+        não mudaram desde a última importação (ImportacaoMatriz) não são
+        gravadas, e um arquivo idêntico ao último importado nem é lido.
+        
         Args:
-            arquivo_path (str): Caminho do arquivo Excel
+            arquivo_path: Caminho ou arquivo binário do Excel
+            limpar_existente (bool): Remover a matriz existente antes de
+                gravar, na mesma transação da importação
+            substituir (bool): Tornar a matriz igual ao arquivo, mantendo os
+                IDs (e os mapas) dos itens que continuam nele (ver
+                MatrizSubstituicaoService)
             
         Returns:
-            dict: Estatísticas da importação
+            dict: Estatísticas da importação, mais as abas ignoradas e se o
+            arquivo era idêntico ao último importado
             
         Raises:
             ValueError: Se o arquivo for inválido
         """
-        try:
-            workbook = openpyxl.load_workbook(arquivo_path, data_only=True)
-        except Exception as e:
-            raise ValueError(f"Erro ao abrir arquivo Excel: {str(e)}")
+        hash_arquivo = self._calcular_hash_arquivo(arquivo_path)
+        anterior = None if limpar_existente or substituir else ImportacaoMatriz.objects.first()
         
-        # Processar cada aba como uma disciplina
-        with transaction.atomic():
-            for ordem, sheet_name in enumerate(workbook.sheetnames, start=1):
-                self._processar_aba(workbook[sheet_name], ordem)
+        if anterior is not None and anterior.hash_arquivo == hash_arquivo:
+            registradas = {nome: aba['hash'] for nome, aba in anterior.abas.items()}
+            if self._abas_inalteradas(anterior.abas, registradas) == set(registradas):
+                self.abas_ignoradas = list(registradas)
+                return self._resultado_importacao(arquivo_inalterado=True)
+        
+        abas = self.ler_arquivo(arquivo_path)
+        for aba in abas:
+            aba['hash'] = self._calcular_hash_aba(aba)
+        
+        if substituir:
+            self._informar_progresso('substituicao')
+            self.estatisticas.update(MatrizSubstituicaoService().substituir(self._consolidar(abas)))
+            with transaction.atomic():
+                self._registrar_importacao(hash_arquivo, abas)
+            return self._resultado_importacao()
+        
+        if anterior is not None:
+            inalteradas = self._abas_inalteradas(
+                anterior.abas, {aba['nome']: aba['hash'] for aba in abas}
+            )
+            self.abas_ignoradas = [aba['nome'] for aba in abas if aba['nome'] in inalteradas]
         
+        self._informar_progresso('gravacao')
+        
+        with transaction.atomic(), ContadoresService.suspender(), \
+                MatrizSnapshotService.adiar_invalidacao():
+            if limpar_existente:
+                self.limpar_matriz_existente()
+            
+            disciplina_ids = self._gravar(
+                [aba for aba in abas if aba['nome'] not in self.abas_ignoradas]
+            )
+            
+            # bulk_create/bulk_update não disparam os sinais que mantêm o índice de busca
+            BuscaService.reindexar_matriz(disciplina_ids)
+            
+            # Recalcular contadores das disciplinas importadas de uma vez
+            ContadoresService.recalcular(Disciplina, disciplina_ids)
+            ContadoresService.recalcular(
+                Assunto,
+                Assunto.objects.filter(disciplina_id__in=disciplina_ids).values_list('pk', flat=True)
+            )
+            
+            if not self.erros:
+                self._registrar_importacao(hash_arquivo, abas)
+        
+        return self._resultado_importacao()
+    
+    def _registrar_importacao(self, hash_arquivo, abas):
+        """Grava as impressões digitais da importação (ImportacaoMatriz)"""
+        estados = self._estados_disciplinas([aba['nome'] for aba in abas])
+        return ImportacaoMatriz.objects.create(
+            hash_arquivo=hash_arquivo,
+            abas={
+                aba['nome']: {'hash': aba['hash'], 'estado': estados.get(aba['nome'])}
+                for aba in abas
+            },
+            estatisticas=self.estatisticas
+        )
+    
+    def _resultado_importacao(self, arquivo_inalterado=False):
+        """Monta o retorno de `importar_arquivo`"""
         return {
             'sucesso': len(self.erros) == 0,
             'estatisticas': self.estatisticas,
             'erros': self.erros,
-            'avisos': self.avisos
+            'avisos': self.avisos,
+            'abas_ignoradas': self.abas_ignoradas,
+            'arquivo_inalterado': arquivo_inalterado
         }
     
-    def _processar_aba(self, sheet, ordem):
+    def _calcular_hash_arquivo(self, arquivo_path):
+        """SHA-256 do conteúdo do arquivo (caminho ou arquivo binário)"""
+        sha = hashlib.sha256()
+        if isinstance(arquivo_path, (str, os.PathLike)):
+            with open(arquivo_path, 'rb') as arquivo:
+                for bloco in iter(lambda: arquivo.read(2**20), b''):
+                    sha.update(bloco)
+        else:
+            posicao = arquivo_path.tell()
+            for bloco in iter(lambda: arquivo_path.read(2**20), b''):
+                sha.update(bloco)
+            arquivo_path.seek(posicao)
+        return sha.hexdigest()
+    
+    def _calcular_hash_aba(self, aba):
+        """SHA-256 do conteúdo lido de uma aba (nome e linhas)"""
+        conteudo = repr((aba['nome'], aba['linhas']))
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+    
+    def _estados_disciplinas(self, nomes):
         """
-        Processa uma aba do Excel como uma disciplina.
+        Impressão digital do estado atual de cada disciplina no banco.
         
-        Args:
-            sheet: Planilha do openpyxl
-            ordem (int): Ordem da disciplina
-        """
-        nome_disciplina = sheet.title
+        Muda quando assuntos ou subassuntos da disciplina são criados,
+        removidos ou editados (contagens e maior `updated_at`).
         
-        # Criar ou obter disciplina
-        disciplina, criada = Disciplina.objects.get_or_create(
-            nome=nome_disciplina,
-            defaults={'ordem': ordem, 'ativa': True}
+        Returns:
+            dict: nome da disciplina -> hash
+        """
+        linhas = Disciplina.objects.filter(nome__in=nomes).order_by().annotate(
+            assuntos_total=Count('assuntos', distinct=True),
+            subassuntos_total=Count('assuntos__subassuntos'),
+            ultimo_assunto=Max('assuntos__updated_at'),
+            ultimo_subassunto=Max('assuntos__subassuntos__updated_at'),
+        ).values_list(
+            'nome', 'pk', 'updated_at', 'assuntos_total', 'subassuntos_total',
+            'ultimo_assunto', 'ultimo_subassunto'
         )
+        return {
+            nome: hashlib.sha256(repr(valores).encode('utf-8')).hexdigest()
+            for nome, *valores in linhas
+        }
+    
+    def _abas_inalteradas(self, registradas, hashes):
+        """
+        Abas cujo conteúdo e cuja disciplina não mudaram desde a importação registrada.
         
-        if criada:
-            self.estatisticas['disciplinas_criadas'] += 1
+        Args:
+            registradas (dict): `ImportacaoMatriz.abas` da última importação
+            hashes (dict): nome da aba -> hash do conteúdo atual
+            
+        Returns:
+            set: Nomes das abas que podem ser ignoradas
+        """
+        candidatas = [
+            nome for nome, hash_aba in hashes.items()
+            if registradas.get(nome, {}).get('hash') == hash_aba
+        ]
+        if not candidatas:
+            return set()
         
-        # Processar linhas da planilha (começando da linha 4, pois 1=vazia, 2=cabeçalho, 3=vazia)
-        ordem_assunto = 0
+        estados = self._estados_disciplinas(candidatas)
+        return {
+            nome for nome in candidatas
+            if estados.get(nome) is not None and estados[nome] == registradas[nome]['estado']
+        }
+    
+    def comparar_arquivo(self, arquivo_path, limpar_existente=False, substituir=False):
+        """
+        Simula a importação, comparando a planilha com a matriz atual.
         
-        for row_num, row in enumerate(sheet.iter_rows(min_row=4, values_only=True), start=4):
-            self.estatisticas['linhas_processadas'] += 1
+        Nada é gravado: a planilha é lida e comparada em memória com um
+        índice da matriz atual (três consultas, mais uma para os mapas).
+        
+        Args:
+            arquivo_path (str): Caminho do arquivo Excel
+            limpar_existente (bool): Simular a importação com remoção da
+                matriz existente
+            substituir (bool): Simular a substituição da matriz
             
-            # Ignorar linhas vazias
-            if not any(row):
-                self.estatisticas['linhas_ignoradas'] += 1
-                continue
+        Returns:
+            dict: Estatísticas e avisos que a importação geraria, mais as
+            diferenças (ver `_comparar`)
             
-            # Ignorar linhas que são cabeçalhos (contém "Assunto" na primeira coluna)
-            primeira_coluna = self._limpar_texto(row[0]) if row[0] else None
-            if primeira_coluna and primeira_coluna.lower() == 'assunto':
-                self.estatisticas['linhas_ignoradas'] += 1
-                continue
+        Raises:
+            ValueError: Se o arquivo for inválido
+        """
+        abas = self.ler_arquivo(arquivo_path)
+        self._informar_progresso('comparacao')
+        diferencas = self._comparar(abas, limpar_existente, substituir)
+        
+        return {
+            'sucesso': len(self.erros) == 0,
+            'estatisticas': self.estatisticas,
+            'erros': self.erros,
+            'avisos': self.avisos,
+            'diferencas': diferencas
+        }
+    
+    def ler_arquivo(self, arquivo_path):
+        """
+        Lê todas as abas do Excel (modo read-only), sem acessar o banco.
+        
+        Com o arquivo em disco, muitas abas e tamanho suficiente (ver
+        MINIMO_ABAS_PARALELO e MINIMO_BYTES_PARALELO), as abas são
+        distribuídas entre processos (ver core/processos.py); o resultado é
+        o mesmo da leitura serial, na ordem do arquivo.
+        
+        Args:
+            arquivo_path: Caminho ou arquivo binário do Excel
             
-            nome_assunto = primeira_coluna
-            nome_subassunto1 = self._limpar_texto(row[1]) if len(row) > 1 and row[1] else None
-            nome_subassunto2 = self._limpar_texto(row[2]) if len(row) > 2 and row[2] else None
+        Returns:
+            list: Abas lidas por `_ler_aba`, na ordem do arquivo
             
-            # Extrair metadados das colunas
-            link_resumos = self._limpar_texto(row[3]) if len(row) > 3 and row[3] else ''
-            link_questoes_cebraspe = self._limpar_texto(row[4]) if len(row) > 4 and row[4] else ''
+        Raises:
+            ValueError: Se o arquivo for inválido
+        """
+        try:
+            workbook = openpyxl.load_workbook(arquivo_path, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"Erro ao abrir arquivo Excel: {str(e)}")
+        
+        try:
+            nomes = workbook.sheetnames
+            for sheet_name in nomes:
+                self.progresso['abas'][sheet_name] = 0
+            self._informar_progresso('leitura')
+            
+            if self._ler_em_processos(arquivo_path, nomes):
+                abas = self._ler_em_paralelo(arquivo_path, nomes)
+            else:
+                abas = [self._ler_aba(workbook[sheet_name]) for sheet_name in nomes]
+        finally:
+            workbook.close()
+        
+        for ordem, aba in enumerate(abas, start=1):
+            aba['ordem'] = ordem
+            self.estatisticas['linhas_processadas'] += aba['linhas_processadas']
+            self.estatisticas['linhas_ignoradas'] += aba['linhas_ignoradas']
+            self.avisos.extend(aba['avisos'])
+        
+        return abas
+    
+    def _ler_em_processos(self, arquivo_path, nomes):
+        """Se a leitura compensa ser distribuída entre processos"""
+        return (
+            isinstance(arquivo_path, (str, os.PathLike)) and
+            self.processos > 1 and
+            len(nomes) >= self.MINIMO_ABAS_PARALELO and
+            os.path.getsize(arquivo_path) >= self.MINIMO_BYTES_PARALELO
+        )
+    
+    def _ler_em_paralelo(self, arquivo_path, nomes):
+        """
+        Lê as abas em um pool de processos.
+        
+        As abas são distribuídas em um bloco por processo, então cada
+        processo abre o arquivo uma única vez.
+        
+        O progresso é menos granular que na leitura serial: os processos
+        filhos não o informam, e as abas de um bloco passam de 0 ao total
+        de linhas de uma vez, quando o bloco termina.
+        
+        Returns:
+            list: Abas lidas, na ordem de `nomes`
+        """
+        quantidade = min(len(nomes), self.processos)
+        blocos = [nomes[i::quantidade] for i in range(quantidade)]
+        
+        def ao_concluir(indice, abas):
+            for aba in abas:
+                self._informar_progresso('leitura', aba['nome'], aba['linhas_processadas'])
+        
+        resultados = processos.executar(
+            processos.ler_abas_da_matriz, blocos, self.processos,
+            (str(arquivo_path),), ao_concluir
+        )
+        lidas = {aba['nome']: aba for bloco in resultados for aba in bloco}
+        return [lidas[nome] for nome in nomes]
+    
+    def _ler_aba(self, sheet):
+        """
+        Lê uma aba do Excel (uma disciplina).
+        
+        Args:
+            sheet: Planilha do openpyxl
+            
+        Returns:
+            dict: nome da aba, linhas com assunto (tuplas na ordem de
+            `_gravar`), avisos e contagens de linhas processadas/ignoradas
+        """
+        nome_disciplina = sheet.title
+        aba = {
+            'nome': nome_disciplina,
+            'linhas': [],
+            'avisos': [],
+            'linhas_processadas': 0,
+            'linhas_ignoradas': 0
+        }
+        
+        # Processar linhas da planilha (começando da linha 4, pois 1=vazia, 2=cabeçalho, 3=vazia)
+        for row_num, row in enumerate(sheet.iter_rows(min_row=4, values_only=True), start=4):
+            aba['linhas_processadas'] += 1
+            if aba['linhas_processadas'] % self.INTERVALO_PROGRESSO == 0:
+                self._informar_progresso('leitura', nome_disciplina, aba['linhas_processadas'])
+            
+            # Ignorar linhas vazias
+            if not any(row):
+                aba['linhas_ignoradas'] += 1
+                continue
+            
+            # Ignorar linhas que são cabeçalhos (contém "Assunto" na primeira coluna)
+            primeira_coluna = self._limpar_texto(row[0]) if row[0] else None
+            if primeira_coluna and primeira_coluna.lower() == 'assunto':
+                aba['linhas_ignoradas'] += 1
+                continue
+            
+            nome_assunto = primeira_coluna
+            nome_subassunto1 = self._limpar_texto(row[1]) if len(row) > 1 and row[1] else None
+            nome_subassunto2 = self._limpar_texto(row[2]) if len(row) > 2 and row[2] else None
+            
+            if not nome_assunto:
+                # Linha sem assunto mas com subassunto - avisar
+                if nome_subassunto1 or nome_subassunto2:
+                    aba['avisos'].append(
+                        f"Linha {row_num} em '{nome_disciplina}': "
+                        f"Subassunto sem assunto pai"
+                    )
+                continue
+            
+            # Extrair metadados das colunas
+            link_resumos = self._limpar_texto(row[3]) if len(row) > 3 and row[3] else ''
+            link_questoes_cebraspe = self._limpar_texto(row[4]) if len(row) > 4 and row[4] else ''
             link_questoes_fgv = self._limpar_texto(row[6]) if len(row) > 6 and row[6] else ''
             dica = self._limpar_texto(row[7]) if len(row) > 7 and row[7] else ''
             
-            # Se tem assunto, criar/atualizar
-            if nome_assunto:
+            aba['linhas'].append((
+                nome_assunto, nome_subassunto1, nome_subassunto2,
+                link_resumos or '', link_questoes_cebraspe or '', link_questoes_fgv or '', dica or ''
+            ))
+        
+        self._informar_progresso('leitura', nome_disciplina, aba['linhas_processadas'])
+        return aba
+    
+    def _informar_progresso(self, etapa, aba=None, linhas_processadas=None):
+        """Atualiza o progresso e o repassa para `ao_progredir`, se houver"""
+        self.progresso['etapa'] = etapa
+        if aba is not None:
+            self.progresso['abas'][aba] = linhas_processadas
+            self.progresso['linhas_processadas'] = sum(self.progresso['abas'].values())
+        
+        if self.ao_progredir is not None:
+            self.ao_progredir({**self.progresso, 'abas': dict(self.progresso['abas'])})
+    
+    def _gravar(self, abas):
+        """
+        Grava as abas lidas, criando o que falta e completando links vazios.
+        
+        A matriz atual das disciplinas envolvidas é carregada em dicionários
+        indexados por chave natural (disciplina, assunto, subassunto).
+        
+        Args:
+            abas (list): Abas lidas por `_ler_aba`
+            
+        Returns:
+            list: IDs das disciplinas processadas, na ordem das abas
+        """
+        agora = timezone.now()
+        nomes = [aba['nome'] for aba in abas]
+        
+        # Disciplinas
+        disciplinas = dict(Disciplina.objects.filter(nome__in=nomes).values_list('nome', 'pk'))
+        novas_disciplinas = [
+            Disciplina(nome=aba['nome'], ordem=aba['ordem'], ativa=True)
+            for aba in abas
+            if aba['nome'] not in disciplinas
+        ]
+        if novas_disciplinas:
+            Disciplina.objects.bulk_create(novas_disciplinas, batch_size=self.TAMANHO_LOTE)
+            self.estatisticas['disciplinas_criadas'] += len(novas_disciplinas)
+            disciplinas = dict(Disciplina.objects.filter(nome__in=nomes).values_list('nome', 'pk'))
+        
+        disciplina_ids = [disciplinas[nome] for nome in nomes]
+        
+        # Assuntos: (disciplina_id, nome) -> Assunto
+        assuntos = {
+            (assunto.disciplina_id, assunto.nome): assunto
+            for assunto in Assunto.objects.filter(disciplina_id__in=disciplina_ids).only(
+                'disciplina_id', 'nome', *self.CAMPOS_LINKS
+            )
+        }
+        novos_assuntos = []
+        alterados = {}
+        subassuntos = []
+        
+        for aba in abas:
+            disciplina_id = disciplinas[aba['nome']]
+            ordem_assunto = 0
+            
+            for nome_assunto, nome_sub1, nome_sub2, *links in aba['linhas']:
                 ordem_assunto += 1
+                chave = (disciplina_id, nome_assunto)
+                assunto = assuntos.get(chave)
                 
-                assunto, criado = Assunto.objects.get_or_create(
-                    disciplina=disciplina,
-                    nome=nome_assunto,
-                    defaults={
-                        'ordem': ordem_assunto, 
-                        'ativo': True,
-                        'link_resumos': link_resumos or '',
-                        'link_questoes_cebraspe': link_questoes_cebraspe or '',
-                        'link_questoes_fgv': link_questoes_fgv or '',
-                        'dica': dica or '',
-                    }
-                )
-                
-                if criado:
-                    self.estatisticas['assuntos_criados'] += 1
+                if assunto is None:
+                    assunto = Assunto(
+                        disciplina_id=disciplina_id,
+                        nome=nome_assunto,
+                        ordem=ordem_assunto,
+                        ativo=True,
+                        **dict(zip(self.CAMPOS_LINKS, links))
+                    )
+                    assuntos[chave] = assunto
+                    novos_assuntos.append(assunto)
                 else:
                     # Atualizar metadados se o assunto já existe
                     atualizado = False
-                    if link_resumos and not assunto.link_resumos:
-                        assunto.link_resumos = link_resumos
-                        atualizado = True
-                    if link_questoes_cebraspe and not assunto.link_questoes_cebraspe:
-                        assunto.link_questoes_cebraspe = link_questoes_cebraspe
-                        atualizado = True
-                    if link_questoes_fgv and not assunto.link_questoes_fgv:
-                        assunto.link_questoes_fgv = link_questoes_fgv
-                        atualizado = True
-                    if dica and not assunto.dica:
-                        assunto.dica = dica
-                        atualizado = True
-                    if atualizado:
-                        assunto.save()
+                    for campo, valor in zip(self.CAMPOS_LINKS, links):
+                        if valor and not getattr(assunto, campo):
+                            setattr(assunto, campo, valor)
+                            atualizado = True
+                    if atualizado and assunto.pk is not None:
+                        assunto.updated_at = agora
+                        alterados[assunto.pk] = assunto
                 
-                # Criar subassunto 1 se existir
-                if nome_subassunto1:
-                    sub1, criado = Subassunto.objects.get_or_create(
-                        assunto=assunto,
-                        nome=nome_subassunto1,
-                        defaults={'ordem': 1, 'ativo': True}
+                if nome_sub1:
+                    subassuntos.append((chave, nome_sub1, 1))
+                if nome_sub2:
+                    subassuntos.append((chave, nome_sub2, 2))
+        
+        if novos_assuntos:
+            Assunto.objects.bulk_create(novos_assuntos, batch_size=self.TAMANHO_LOTE)
+            self.estatisticas['assuntos_criados'] += len(novos_assuntos)
+        if alterados:
+            Assunto.objects.bulk_update(
+                alterados.values(), [*self.CAMPOS_LINKS, 'updated_at'], batch_size=self.TAMANHO_LOTE
+            )
+        
+        # Subassuntos: (assunto_id, nome) já existentes ou a criar
+        assunto_ids = {
+            (disciplina_id, nome): pk
+            for disciplina_id, nome, pk in Assunto.objects.filter(
+                disciplina_id__in=disciplina_ids
+            ).values_list('disciplina_id', 'nome', 'pk')
+        } if novos_assuntos else {chave: assunto.pk for chave, assunto in assuntos.items()}
+        
+        existentes = set(
+            Subassunto.objects.filter(
+                assunto__disciplina_id__in=disciplina_ids
+            ).values_list('assunto_id', 'nome')
+        )
+        novos_subassuntos = []
+        for chave_assunto, nome, ordem in subassuntos:
+            chave = (assunto_ids[chave_assunto], nome)
+            if chave in existentes:
+                continue
+            existentes.add(chave)
+            novos_subassuntos.append(
+                Subassunto(assunto_id=chave[0], nome=nome, ordem=ordem, ativo=True)
+            )
+        
+        if novos_subassuntos:
+            Subassunto.objects.bulk_create(novos_subassuntos, batch_size=self.TAMANHO_LOTE)
+            self.estatisticas['subassuntos_criados'] += len(novos_subassuntos)
+        
+        # bulk_create/bulk_update não disparam sinais
+        if novas_disciplinas or novos_assuntos or alterados or novos_subassuntos:
+            MatrizSnapshotService.invalidar()
+        
+        return disciplina_ids
+    
+    def _comparar(self, abas, limpar_existente, substituir=False):
+        """
+        Compara as abas lidas com a matriz atual.
+        
+        Renomeações são inferidas: um item ausente da planilha é pareado com
+        um item novo do mesmo pai de mesmo nome normalizado (sem acentos,
+        caixa e espaços extras) ou, na falta dele, de mesma ordem. A
+        importação não renomeia: sem `limpar_existente`, o nome novo é
+        criado e o antigo permanece (ou é removido, com `substituir`).
+        
+        Args:
+            abas (list): Abas lidas por `_ler_aba`
+            limpar_existente (bool): Simular a remoção da matriz existente
+            substituir (bool): Simular a substituição (MatrizSubstituicaoService)
+            
+        Returns:
+            dict: Disciplinas, assuntos e subassuntos novos, renomeados e
+            removidos, links/dicas alterados e mapas afetados
+        """
+        # Índice da matriz atual
+        disciplinas_atuais = {
+            nome: (pk, ordem)
+            for pk, nome, ordem in Disciplina.objects.order_by().values_list('pk', 'nome', 'ordem')
+        }
+        assuntos_atuais = {}
+        for pk, disciplina_id, nome, ordem, *links in Assunto.objects.order_by().values_list(
+            'pk', 'disciplina_id', 'nome', 'ordem', *self.CAMPOS_LINKS
+        ):
+            assuntos_atuais.setdefault(disciplina_id, {})[nome] = (pk, ordem, links)
+        subassuntos_atuais = {}
+        for pk, assunto_id, nome, ordem in Subassunto.objects.order_by().values_list(
+            'pk', 'assunto_id', 'nome', 'ordem'
+        ):
+            subassuntos_atuais.setdefault(assunto_id, {})[nome] = (pk, ordem)
+        
+        arquivo = self._consolidar(abas)
+        
+        diferencas = {
+            'limpar_existente': limpar_existente,
+            'substituir': substituir,
+            'disciplinas': {'novas': [], 'renomeadas': [], 'removidas': []},
+            'assuntos': {'novos': [], 'renomeados': [], 'removidos': []},
+            'subassuntos': {'novos': [], 'renomeados': [], 'removidos': []},
+            'links_alterados': [],
+            'mapas': {'removidos': 0, 'orfaos': []},
+        }
+        assuntos_mantidos = set()
+        subassuntos_mantidos = set()
+        # Itens com a mesma chave natural no arquivo (os únicos mantidos ao substituir)
+        assuntos_exatos = set()
+        subassuntos_exatos = set()
+        criados = {'disciplinas': 0, 'assuntos': 0, 'subassuntos': 0}
+        
+        pares, removidas, novas = self._parear_renomeados(
+            {nome: ordem for nome, (_, ordem) in disciplinas_atuais.items()},
+            {nome: ordem for ordem, nome in enumerate(arquivo, start=1)}
+        )
+        diferencas['disciplinas']['novas'] = novas
+        diferencas['disciplinas']['removidas'] = removidas
+        diferencas['disciplinas']['renomeadas'] = [{'de': de, 'para': para} for de, para in pares]
+        correspondentes = dict((para, de) for de, para in pares)
+        
+        for nome in removidas:
+            disciplina_id = disciplinas_atuais[nome][0]
+            for nome_assunto, (assunto_id, _, _) in assuntos_atuais.get(disciplina_id, {}).items():
+                diferencas['assuntos']['removidos'].append({'disciplina': nome, 'assunto': nome_assunto})
+                for nome_sub in subassuntos_atuais.get(assunto_id, {}):
+                    diferencas['subassuntos']['removidos'].append(
+                        {'disciplina': nome, 'assunto': nome_assunto, 'subassunto': nome_sub}
+                    )
+        
+        for nome_disciplina, assuntos in arquivo.items():
+            nome_atual = nome_disciplina if nome_disciplina in disciplinas_atuais else correspondentes.get(nome_disciplina)
+            disciplina_id = disciplinas_atuais[nome_atual][0] if nome_atual else None
+            atuais = assuntos_atuais.get(disciplina_id, {})
+            
+            criados['disciplinas'] += limpar_existente or nome_disciplina not in disciplinas_atuais
+            criados['assuntos'] += len(assuntos) if limpar_existente else sum(
+                1 for nome in assuntos if nome_disciplina not in disciplinas_atuais or nome not in atuais
+            )
+            
+            pares, removidos, novos = self._parear_renomeados(
+                {nome: ordem for nome, (_, ordem, _) in atuais.items()},
+                {nome: item[0] for nome, item in assuntos.items()}
+            )
+            for nome_assunto in novos:
+                diferencas['assuntos']['novos'].append({'disciplina': nome_disciplina, 'assunto': nome_assunto})
+                for nome_sub in assuntos[nome_assunto][2]:
+                    diferencas['subassuntos']['novos'].append(
+                        {'disciplina': nome_disciplina, 'assunto': nome_assunto, 'subassunto': nome_sub}
+                    )
+            for nome_assunto in removidos:
+                diferencas['assuntos']['removidos'].append({'disciplina': nome_disciplina, 'assunto': nome_assunto})
+                for nome_sub in subassuntos_atuais.get(atuais[nome_assunto][0], {}):
+                    diferencas['subassuntos']['removidos'].append(
+                        {'disciplina': nome_disciplina, 'assunto': nome_assunto, 'subassunto': nome_sub}
                     )
-                    if criado:
-                        self.estatisticas['subassuntos_criados'] += 1
+            for de, para in pares:
+                diferencas['assuntos']['renomeados'].append({'disciplina': nome_disciplina, 'de': de, 'para': para})
+            
+            for nome_atual_assunto, nome_assunto in [(nome, nome) for nome in assuntos if nome in atuais] + pares:
+                assunto_id, _, links_atuais = atuais[nome_atual_assunto]
+                ordem, links, subassuntos = assuntos[nome_assunto]
+                assuntos_mantidos.add(assunto_id)
+                
+                for campo, atual, valor in zip(self.CAMPOS_LINKS, links_atuais, links):
+                    # Sem limpar ou substituir, a importação só preenche campos vazios
+                    if (atual != valor) if limpar_existente or substituir else (valor and not atual):
+                        diferencas['links_alterados'].append({
+                            'disciplina': nome_disciplina,
+                            'assunto': nome_assunto,
+                            'campo': campo,
+                            'atual': atual,
+                            'novo': valor
+                        })
                 
-                # Criar subassunto 2 se existir
-                if nome_subassunto2:
-                    sub2, criado = Subassunto.objects.get_or_create(
-                        assunto=assunto,
-                        nome=nome_subassunto2,
-                        defaults={'ordem': 2, 'ativo': True}
+                subs_atuais = subassuntos_atuais.get(assunto_id, {})
+                pares_sub, removidos_sub, novos_sub = self._parear_renomeados(
+                    {nome: ordem_sub for nome, (_, ordem_sub) in subs_atuais.items()},
+                    subassuntos
+                )
+                for chave, nomes in (('novos', novos_sub), ('removidos', removidos_sub)):
+                    diferencas['subassuntos'][chave].extend(
+                        {'disciplina': nome_disciplina, 'assunto': nome_assunto, 'subassunto': nome_sub}
+                        for nome_sub in nomes
                     )
-                    if criado:
-                        self.estatisticas['subassuntos_criados'] += 1
-            else:
-                # Linha sem assunto mas com subassunto - avisar
-                if nome_subassunto1 or nome_subassunto2:
-                    self.avisos.append(
-                        f"Linha {row_num} em '{nome_disciplina}': "
-                        f"Subassunto sem assunto pai"
+                diferencas['subassuntos']['renomeados'].extend(
+                    {'disciplina': nome_disciplina, 'assunto': nome_assunto, 'de': de, 'para': para}
+                    for de, para in pares_sub
+                )
+                subassuntos_mantidos.update(
+                    subs_atuais[nome][0] for nome in subassuntos if nome in subs_atuais
+                )
+                subassuntos_mantidos.update(subs_atuais[de][0] for de, _ in pares_sub)
+                
+                if nome_atual == nome_disciplina and nome_atual_assunto == nome_assunto:
+                    assuntos_exatos.add(assunto_id)
+                    subassuntos_exatos.update(
+                        subs_atuais[nome][0] for nome in subassuntos if nome in subs_atuais
                     )
+                
+                if not limpar_existente and nome_atual == nome_disciplina and nome_atual_assunto == nome_assunto:
+                    criados['subassuntos'] += sum(1 for nome in subassuntos if nome not in subs_atuais)
+                else:
+                    criados['subassuntos'] += len(subassuntos)
+            
+            # Assuntos sem correspondente na matriz atual: todos os subassuntos são criados
+            criados['subassuntos'] += sum(len(assuntos[nome][2]) for nome in novos)
+        
+        if limpar_existente or substituir:
+            # Ao limpar, o cascade remove todos os itens de mapas ligados à matriz;
+            # ao substituir, só os que usam itens sem a mesma chave no arquivo
+            if not limpar_existente:
+                assuntos_mantidos, subassuntos_mantidos = assuntos_exatos, subassuntos_exatos
+            orfaos = {}
+            for concurso_id, assunto_id, subassunto_id in MapaAssunto.objects.filter(
+                Q(assunto__isnull=False) | Q(subassunto__isnull=False)
+            ).order_by().values_list('concurso_id', 'assunto_id', 'subassunto_id'):
+                orfao = (assunto_id and assunto_id not in assuntos_mantidos) or \
+                    (subassunto_id and subassunto_id not in subassuntos_mantidos)
+                if limpar_existente or orfao:
+                    diferencas['mapas']['removidos'] += 1
+                if orfao:
+                    orfaos[concurso_id] = orfaos.get(concurso_id, 0) + 1
+            
+            diferencas['mapas']['orfaos'] = [
+                {'concurso_id': pk, 'concurso': nome, 'sigla': sigla, 'itens': orfaos[pk]}
+                for pk, nome, sigla in Concurso.objects.filter(
+                    pk__in=orfaos
+                ).order_by('pk').values_list('pk', 'nome', 'sigla')
+            ]
+        
+        self.estatisticas['disciplinas_criadas'] += criados['disciplinas']
+        self.estatisticas['assuntos_criados'] += criados['assuntos']
+        self.estatisticas['subassuntos_criados'] += criados['subassuntos']
+        
+        return diferencas
+    
+    def _consolidar(self, abas):
+        """
+        Consolida as linhas lidas no conteúdo final de cada assunto.
+        
+        Segue as regras da importação: a primeira ocorrência de um assunto
+        define sua ordem, linhas repetidas só completam links vazios e cada
+        subassunto fica com a ordem (coluna) em que apareceu primeiro.
+        
+        Args:
+            abas (list): Abas lidas por `_ler_aba`
+            
+        Returns:
+            dict: disciplina -> assunto -> [ordem, links, {subassunto: ordem}],
+            na ordem das abas e das linhas
+        """
+        arquivo = {}
+        for aba in abas:
+            assuntos = arquivo.setdefault(aba['nome'], {})
+            ordem_assunto = 0
+            for nome_assunto, nome_sub1, nome_sub2, *links in aba['linhas']:
+                ordem_assunto += 1
+                item = assuntos.get(nome_assunto)
+                if item is None:
+                    item = assuntos[nome_assunto] = [ordem_assunto, list(links), {}]
+                else:
+                    item[1] = [atual or valor for atual, valor in zip(item[1], links)]
+                if nome_sub1:
+                    item[2].setdefault(nome_sub1, 1)
+                if nome_sub2:
+                    item[2].setdefault(nome_sub2, 2)
+        return arquivo
+    
+    def _parear_renomeados(self, atuais, novos):
+        """
+        Separa itens novos e removidos, pareando prováveis renomeações.
+        
+        Args:
+            atuais (dict): nome -> ordem dos itens atuais
+            novos (dict): nome -> ordem dos itens da planilha
+            
+        Returns:
+            tuple: (pares (antigo, novo), nomes removidos, nomes novos)
+        """
+        removidos = [nome for nome in atuais if nome not in novos]
+        adicionados = [nome for nome in novos if nome not in atuais]
+        if not removidos or not adicionados:
+            return [], removidos, adicionados
+        
+        pares = []
+        por_nome = {}
+        for nome in removidos:
+            por_nome.setdefault(self._normalizar(nome), nome)
+        restantes = []
+        for nome in adicionados:
+            antigo = por_nome.pop(self._normalizar(nome), None)
+            if antigo is None:
+                restantes.append(nome)
+            else:
+                pares.append((antigo, nome))
+        
+        pareados = {antigo for antigo, _ in pares}
+        por_ordem = {}
+        for nome in removidos:
+            if nome not in pareados:
+                por_ordem.setdefault(atuais[nome], nome)
+        adicionados = []
+        for nome in restantes:
+            antigo = por_ordem.pop(novos[nome], None)
+            if antigo is None:
+                adicionados.append(nome)
+            else:
+                pares.append((antigo, nome))
+                pareados.add(antigo)
+        
+        return pares, [nome for nome in removidos if nome not in pareados], adicionados
+    
+    def _normalizar(self, nome):
+        """Normaliza um nome para comparação (sem acentos, caixa e espaços extras)"""
+        sem_acentos = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+        return ' '.join(sem_acentos.casefold().split())
     
     def _limpar_texto(self, texto):
         """
@@ -197,16 +1541,309 @@ class MatrizImportService:
         texto = str(texto).strip()
         return texto if texto else None
     
+    @classmethod
+    def armazenamento(cls):
+        """Storage das planilhas enviadas para importação em segundo plano"""
+        return FileSystemStorage(location=settings.IMPORTACOES_DIR)
+    
+    @classmethod
+    def enfileirar(cls, arquivo, limpar_existente=False, usuario=None, substituir=False):
+        """
+        Guarda a planilha enviada e cria uma Tarefa de importação.
+        
+        Args:
+            arquivo: Arquivo enviado (UploadedFile)
+            limpar_existente (bool): Remover a matriz existente antes de importar
+            usuario: Usuário que solicitou a importação
+            substituir (bool): Substituir a matriz mantendo IDs (ver importar_arquivo)
+            
+        Returns:
+            Tarefa: Tarefa criada
+        """
+        nome = cls.armazenamento().save(f'{uuid.uuid4().hex}.xlsx', arquivo)
+        return TarefaService.enfileirar(
+            'importar_matriz',
+            {
+                'arquivo': nome,
+                'nome_original': arquivo.name,
+                'limpar_existente': limpar_existente,
+                'substituir': substituir
+            },
+            usuario
+        )
+    
+    @classmethod
+    def executar_tarefa(cls, tarefa):
+        """Executor de Tarefa do tipo 'importar_matriz'"""
+        service = cls(ao_progredir=lambda progresso: TarefaService.atualizar_progresso(tarefa, progresso))
+        armazenamento = cls.armazenamento()
+        nome = tarefa.parametros['arquivo']
+        
+        try:
+            resultado = service.importar_arquivo(
+                armazenamento.path(nome),
+                tarefa.parametros.get('limpar_existente', False),
+                tarefa.parametros.get('substituir', False)
+            )
+        finally:
+            armazenamento.delete(nome)
+        
+        service._informar_progresso('concluida')
+        return resultado
+    
     def limpar_matriz_existente(self):
         """
         Remove toda a matriz existente do banco de dados.
         
         ATENÇÃO: Esta operação é irreversível!
         """
-        with transaction.atomic():
+        with transaction.atomic(), ContadoresService.suspender(), \
+                MatrizSnapshotService.adiar_invalidacao():
             Subassunto.objects.all().delete()
             Assunto.objects.all().delete()
             Disciplina.objects.all().delete()
+            
+            # O cascade remove itens de mapas de qualquer concurso
+            ContadoresService.recalcular(Concurso)
+
+
+class MatrizSubstituicaoService:
+    """
+    Substituição completa da matriz pelo conteúdo de uma planilha.
+    
+    Diferente de `limpar_existente`, que apaga tudo (e, em cascata, todos os
+    itens de mapas) antes de importar, a substituição mantém os IDs de
+    disciplinas, assuntos e subassuntos cujas chaves naturais continuam no
+    arquivo; só itens ausentes do arquivo (e os mapas que os usam) são
+    removidos. Os flags ativa/ativo dos itens mantidos são preservados.
+    
+    O conteúdo é carregado primeiro em tabelas temporárias (staging), fora de
+    qualquer transação; a troca é uma única transação curta com SQL
+    set-based (INSERT ... SELECT, UPDATE ... FROM e DELETE ... IN), sem
+    carregar linhas na memória do Django. UPDATE ... FROM exige PostgreSQL
+    ou SQLite 3.33+.
+    
+    Os contadores são recalculados na própria troca, com um UPDATE por
+    tabela (só os concursos que perderam itens). O índice de busca é
+    sincronizado depois do commit, em outra transação: as entradas dos
+    itens removidos saem na troca, as dos itens mantidos continuam válidas
+    e as dos itens novos aparecem ao final da sincronização.
+    """
+    
+    VENDORS = ('postgresql', 'sqlite')
+    
+    STAGING_DISCIPLINAS = 'staging_matriz_disciplina'
+    STAGING_ASSUNTOS = 'staging_matriz_assunto'
+    STAGING_SUBASSUNTOS = 'staging_matriz_subassunto'
+    
+    TAMANHO_LOTE = 1000
+    
+    def substituir(self, arquivo):
+        """
+        Torna a matriz igual ao conteúdo consolidado do arquivo.
+        
+        Args:
+            arquivo (dict): Conteúdo de MatrizImportService._consolidar
+            
+        Returns:
+            dict: Contagens de itens criados, atualizados e removidos
+            
+        Raises:
+            ValueError: Se o banco não suportar a substituição
+        """
+        if connection.vendor not in self.VENDORS:
+            raise ValueError(f'Substituição da matriz não suportada em {connection.vendor}')
+        
+        with connection.cursor() as cursor:
+            try:
+                self._criar_staging(cursor)
+                self._carregar_staging(cursor, arquivo)
+                
+                with transaction.atomic(), ContadoresService.suspender(), \
+                        MatrizSnapshotService.adiar_invalidacao():
+                    estatisticas, concurso_ids = self._trocar(cursor)
+                    
+                    ContadoresService.recalcular(Disciplina)
+                    ContadoresService.recalcular(Assunto)
+                    ContadoresService.recalcular(Concurso, concurso_ids)
+                    MatrizSnapshotService.invalidar()
+            finally:
+                self._remover_staging(cursor)
+        
+        # Fora da troca, para não manter as tabelas travadas durante a reindexação
+        with transaction.atomic():
+            BuscaService.reindexar_matriz()
+        
+        return estatisticas
+    
+    def _criar_staging(self, cursor):
+        """Cria as tabelas temporárias (visíveis apenas nesta conexão)"""
+        self._remover_staging(cursor)
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {self.STAGING_DISCIPLINAS} (nome TEXT, ordem INTEGER)'
+        )
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {self.STAGING_ASSUNTOS} ('
+            'disciplina TEXT, nome TEXT, ordem INTEGER, link_resumos TEXT, '
+            'link_questoes_cebraspe TEXT, link_questoes_fgv TEXT, dica TEXT)'
+        )
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {self.STAGING_SUBASSUNTOS} ('
+            'disciplina TEXT, assunto TEXT, nome TEXT, ordem INTEGER)'
+        )
+        cursor.execute(
+            f'CREATE INDEX {self.STAGING_DISCIPLINAS}_nome ON {self.STAGING_DISCIPLINAS} (nome)'
+        )
+        cursor.execute(
+            f'CREATE INDEX {self.STAGING_ASSUNTOS}_chave ON {self.STAGING_ASSUNTOS} (disciplina, nome)'
+        )
+        cursor.execute(
+            f'CREATE INDEX {self.STAGING_SUBASSUNTOS}_chave '
+            f'ON {self.STAGING_SUBASSUNTOS} (disciplina, assunto, nome)'
+        )
+    
+    def _remover_staging(self, cursor):
+        for tabela in (self.STAGING_DISCIPLINAS, self.STAGING_ASSUNTOS, self.STAGING_SUBASSUNTOS):
+            cursor.execute(f'DROP TABLE IF EXISTS {tabela}')
+    
+    def _carregar_staging(self, cursor, arquivo):
+        """Grava o conteúdo do arquivo nas tabelas temporárias, em lotes"""
+        disciplinas = []
+        assuntos = []
+        subassuntos = []
+        for ordem, (disciplina, itens) in enumerate(arquivo.items(), start=1):
+            disciplinas.append((disciplina, ordem))
+            for nome, (ordem_assunto, links, subs) in itens.items():
+                assuntos.append((disciplina, nome, ordem_assunto, *links))
+                subassuntos.extend((disciplina, nome, sub, ordem_sub) for sub, ordem_sub in subs.items())
+        
+        for tabela, linhas in (
+            (self.STAGING_DISCIPLINAS, disciplinas),
+            (self.STAGING_ASSUNTOS, assuntos),
+            (self.STAGING_SUBASSUNTOS, subassuntos),
+        ):
+            if not linhas:
+                continue
+            marcadores = ', '.join(['%s'] * len(linhas[0]))
+            for inicio in range(0, len(linhas), self.TAMANHO_LOTE):
+                cursor.executemany(
+                    f'INSERT INTO {tabela} VALUES ({marcadores})',
+                    linhas[inicio:inicio + self.TAMANHO_LOTE]
+                )
+    
+    def _trocar(self, cursor):
+        """
+        Reconcilia as tabelas da matriz com o staging (dentro da transação).
+        
+        Returns:
+            tuple: (contagens de itens criados, atualizados e removidos,
+            IDs dos concursos que perderam itens de mapa)
+        """
+        agora = connection.ops.adapt_datetimefield_value(timezone.now())
+        t = {
+            'd': Disciplina._meta.db_table,
+            'a': Assunto._meta.db_table,
+            's': Subassunto._meta.db_table,
+            'm': MapaAssunto._meta.db_table,
+            'md': MetadadosAssunto._meta.db_table,
+            'ib': IndiceBusca._meta.db_table,
+            'sd': self.STAGING_DISCIPLINAS,
+            'sa': self.STAGING_ASSUNTOS,
+            'ss': self.STAGING_SUBASSUNTOS,
+        }
+        
+        disciplinas_removidas = (
+            'SELECT d.id FROM {d} d '
+            'WHERE NOT EXISTS (SELECT 1 FROM {sd} x WHERE x.nome = d.nome)'
+        ).format(**t)
+        assuntos_removidos = (
+            'SELECT a.id FROM {a} a JOIN {d} d ON d.id = a.disciplina_id '
+            'WHERE NOT EXISTS (SELECT 1 FROM {sa} x WHERE x.disciplina = d.nome AND x.nome = a.nome)'
+        ).format(**t)
+        subassuntos_removidos = (
+            'SELECT s.id FROM {s} s JOIN {a} a ON a.id = s.assunto_id JOIN {d} d ON d.id = a.disciplina_id '
+            'WHERE NOT EXISTS (SELECT 1 FROM {ss} x '
+            'WHERE x.disciplina = d.nome AND x.assunto = a.nome AND x.nome = s.nome)'
+        ).format(**t)
+        mapas_removidos = (
+            f'SELECT id FROM {t["m"]} '
+            f'WHERE assunto_id IN ({assuntos_removidos}) OR subassunto_id IN ({subassuntos_removidos})'
+        )
+        
+        def executar(sql, params=()):
+            cursor.execute(sql.format(**t), params)
+            return cursor.rowcount
+        
+        estatisticas = {}
+        
+        cursor.execute(f'SELECT DISTINCT concurso_id FROM {t["m"]} WHERE id IN ({mapas_removidos})')
+        concurso_ids = [linha[0] for linha in cursor.fetchall()]
+        
+        # Remoções, dos dependentes para os pais (o cascade do Django não roda em SQL puro)
+        executar(
+            f'DELETE FROM {{ib}} WHERE mapa_assunto_id IN ({mapas_removidos}) '
+            f'OR subassunto_id IN ({subassuntos_removidos}) OR assunto_id IN ({assuntos_removidos}) '
+            f'OR disciplina_id IN ({disciplinas_removidas})'
+        )
+        executar(f'DELETE FROM {{md}} WHERE mapa_assunto_id IN ({mapas_removidos})')
+        estatisticas['mapas_removidos'] = executar(f'DELETE FROM {{m}} WHERE id IN ({mapas_removidos})')
+        estatisticas['subassuntos_removidos'] = executar(f'DELETE FROM {{s}} WHERE id IN ({subassuntos_removidos})')
+        estatisticas['assuntos_removidos'] = executar(f'DELETE FROM {{a}} WHERE id IN ({assuntos_removidos})')
+        estatisticas['disciplinas_removidas'] = executar(f'DELETE FROM {{d}} WHERE id IN ({disciplinas_removidas})')
+        
+        # Disciplinas
+        estatisticas['disciplinas_atualizadas'] = executar(
+            'UPDATE {d} SET ordem = x.ordem, updated_at = %s FROM {sd} x '
+            'WHERE {d}.nome = x.nome AND {d}.ordem <> x.ordem',
+            [agora]
+        )
+        estatisticas['disciplinas_criadas'] = executar(
+            'INSERT INTO {d} (nome, ordem, ativa, total_assuntos, created_at, updated_at) '
+            'SELECT x.nome, x.ordem, %s, 0, %s, %s FROM {sd} x '
+            'WHERE NOT EXISTS (SELECT 1 FROM {d} d WHERE d.nome = x.nome)',
+            [True, agora, agora]
+        )
+        
+        # Assuntos
+        estatisticas['assuntos_atualizados'] = executar(
+            'UPDATE {a} SET ordem = x.ordem, link_resumos = x.link_resumos, '
+            'link_questoes_cebraspe = x.link_questoes_cebraspe, '
+            'link_questoes_fgv = x.link_questoes_fgv, dica = x.dica, updated_at = %s '
+            'FROM {sa} x, {d} d '
+            'WHERE d.nome = x.disciplina AND {a}.disciplina_id = d.id AND {a}.nome = x.nome '
+            'AND ({a}.ordem <> x.ordem OR {a}.link_resumos <> x.link_resumos '
+            'OR {a}.link_questoes_cebraspe <> x.link_questoes_cebraspe '
+            'OR {a}.link_questoes_fgv <> x.link_questoes_fgv OR {a}.dica <> x.dica)',
+            [agora]
+        )
+        estatisticas['assuntos_criados'] = executar(
+            'INSERT INTO {a} (disciplina_id, nome, ordem, ativo, link_resumos, link_questoes_cebraspe, '
+            'link_questoes_fgv, dica, total_subassuntos, created_at, updated_at) '
+            'SELECT d.id, x.nome, x.ordem, %s, x.link_resumos, x.link_questoes_cebraspe, '
+            'x.link_questoes_fgv, x.dica, 0, %s, %s '
+            'FROM {sa} x JOIN {d} d ON d.nome = x.disciplina '
+            'WHERE NOT EXISTS (SELECT 1 FROM {a} a WHERE a.disciplina_id = d.id AND a.nome = x.nome)',
+            [True, agora, agora]
+        )
+        
+        # Subassuntos
+        estatisticas['subassuntos_atualizados'] = executar(
+            'UPDATE {s} SET ordem = x.ordem, updated_at = %s '
+            'FROM {ss} x, {d} d, {a} a '
+            'WHERE d.nome = x.disciplina AND a.disciplina_id = d.id AND a.nome = x.assunto '
+            'AND {s}.assunto_id = a.id AND {s}.nome = x.nome AND {s}.ordem <> x.ordem',
+            [agora]
+        )
+        estatisticas['subassuntos_criados'] = executar(
+            'INSERT INTO {s} (assunto_id, nome, ordem, ativo, created_at, updated_at) '
+            'SELECT a.id, x.nome, x.ordem, %s, %s, %s '
+            'FROM {ss} x JOIN {d} d ON d.nome = x.disciplina '
+            'JOIN {a} a ON a.disciplina_id = d.id AND a.nome = x.assunto '
+            'WHERE NOT EXISTS (SELECT 1 FROM {s} s WHERE s.assunto_id = a.id AND s.nome = x.nome)',
+            [True, agora, agora]
+        )
+        
+        return estatisticas, concurso_ids
 
 
 class ExportacaoTutoryService:
@@ -229,15 +1866,67 @@ class ExportacaoTutoryService:
     13. Peso de Revisões
     14. Peso de Questões
     15. Número de Questões
-    16. Link de Estudo
+    16. Link de Estudo (primeiro preenchido entre Estratégia, Direção, PDF e Vídeo)
     17. Link de Resumo
     18. Link de Questões
     19. Suplementar
+    
+    A planilha é gerada em modo write-only do openpyxl, a partir de linhas
+    `values_list()` lidas com `.iterator()`, sem instanciar modelos nem
+    manter a planilha inteira em memória.
     """
     
-    def __init__(self):
-        self.workbook = None
-        self.sheet = None
+    CABECALHOS = [
+        'Disciplina',
+        'Assunto',
+        'Páginas ou Minutos de Vídeo',
+        'Minutos Expresso',
+        'Minutos Regular',
+        'Minutos Calma',
+        'Dica',
+        'Dica de Revisões',
+        'Dica de Questões',
+        'Referência',
+        'Ordenação',
+        'Peso de Resumos',
+        'Peso de Revisões',
+        'Peso de Questões',
+        'Número de Questões',
+        'Link de Estudo',
+        'Link de Resumo',
+        'Link de Questões',
+        'Suplementar'
+    ]
+    
+    CAMPOS = [
+        'extra_cursinho', 'nome_extra', 'ordem',
+        'assunto__disciplina__nome', 'assunto__nome', 'subassunto__nome',
+        'metadados__id',
+        'metadados__paginas_minutos',
+        'metadados__minutos_expresso',
+        'metadados__minutos_regular',
+        'metadados__minutos_calma',
+        'metadados__dica',
+        'metadados__dica_revisoes',
+        'metadados__dica_questoes',
+        'metadados__referencia',
+        'metadados__peso_resumos',
+        'metadados__peso_revisoes',
+        'metadados__peso_questoes',
+        'metadados__numero_questoes',
+        'metadados__link_estrategia',
+        'metadados__link_direcao',
+        'metadados__link_pdf',
+        'metadados__link_video',
+        'metadados__link_resumo',
+        'metadados__link_questoes',
+        'metadados__suplementar',
+    ]
+    
+    TAMANHO_LOTE = 2000
+    
+    # Acima deste tamanho, o arquivo temporário sai da memória para o disco
+    LIMITE_MEMORIA = 5 * 1024 * 1024
     
     def exportar_concurso(self, concurso):
         """
@@ -247,90 +1936,1021 @@ class ExportacaoTutoryService:
             concurso: Objeto Concurso a ser exportado
             
         Returns:
-            BytesIO: Arquivo Excel em memória
-        """
-        from io import BytesIO
-        from .models import MapaAssunto
-        
-        self.workbook = openpyxl.Workbook()
-        self.sheet = self.workbook.active
-        self.sheet.title = concurso.sigla[:31]  # Limite de 31 chars para nome de aba
-        
-        # Cabeçalhos - Formato Tutory
-        headers = [
-            'Disciplina',
-            'Assunto',
-            'Páginas ou Minutos de Vídeo',
-            'Minutos Expresso',
-            'Minutos Regular',
-            'Minutos Calma',
-            'Dica',
-            'Dica de Revisões',
-            'Dica de Questões',
-            'Referência',
-            'Ordenação',
-            'Peso de Resumos',
-            'Peso de Revisões',
-            'Peso de Questões',
-            'Número de Questões',
-            'Link de Estudo',
-            'Link de Resumo',
-            'Link de Questões',
-            'Suplementar'
-        ]
+            SpooledTemporaryFile: Arquivo Excel posicionado no início
+        """
+        output = tempfile.SpooledTemporaryFile(max_size=self.LIMITE_MEMORIA)
+        self.escrever_concurso(concurso, output)
+        output.seek(0)
+        return output
+    
+    def escrever_concurso(self, concurso, destino):
+        """
+        Escreve a planilha Tutory de um concurso em `destino`.
         
-        for col, header in enumerate(headers, 1):
-            self.sheet.cell(row=1, column=col, value=header)
+        Args:
+            concurso: Objeto Concurso a ser exportado
+            destino: Caminho ou arquivo binário de saída
+        """
+        workbook = openpyxl.Workbook(write_only=True)
+        self.adicionar_aba(workbook, concurso.sigla, self.linhas(concurso.pk))
+        workbook.save(destino)
+    
+    def adicionar_aba(self, workbook, titulo, linhas):
+        """Adiciona uma aba Tutory (cabeçalho + linhas) a um workbook write-only"""
+        sheet = workbook.create_sheet(title=titulo[:31])  # Limite de 31 chars para nome de aba
+        sheet.append(self.CABECALHOS)
+        for linha in linhas:
+            sheet.append(linha)
+        return sheet
+    
+    def linhas(self, concurso_id):
+        """
+        Gera as linhas Tutory de um concurso, na ordem do mapa.
         
-        # Dados
+        Args:
+            concurso_id (int): ID do concurso
+            
+        Yields:
+            list: Valores das 19 colunas
+        """
         mapas = MapaAssunto.objects.filter(
-            concurso=concurso
-        ).select_related(
-            'assunto', 'assunto__disciplina', 'subassunto'
-        ).prefetch_related('metadados').order_by('ordem')
-        
-        row = 2
-        for mapa in mapas:
-            assunto = mapa.assunto
-            metadados = getattr(mapa, 'metadados', None)
-            
-            # Disciplina
-            disciplina_nome = assunto.disciplina.nome if assunto else ''
-            
-            # Nome do assunto (com subassunto se houver)
-            if mapa.extra_cursinho:
-                assunto_nome = mapa.nome_extra
-            elif mapa.subassunto:
-                assunto_nome = f"{assunto.nome} - {mapa.subassunto.nome}"
-            else:
-                assunto_nome = assunto.nome if assunto else ''
-            
-            # Preencher linha com dados do metadados (formato Tutory)
-            self.sheet.cell(row=row, column=1, value=disciplina_nome)
-            self.sheet.cell(row=row, column=2, value=assunto_nome)
-            self.sheet.cell(row=row, column=3, value=metadados.paginas_minutos if metadados else 0)
-            self.sheet.cell(row=row, column=4, value=float(metadados.minutos_expresso) if metadados else 0)
-            self.sheet.cell(row=row, column=5, value=float(metadados.minutos_regular) if metadados else 0)
-            self.sheet.cell(row=row, column=6, value=float(metadados.minutos_calma) if metadados else 0)
-            self.sheet.cell(row=row, column=7, value=metadados.dica or '' if metadados else '')
-            self.sheet.cell(row=row, column=8, value=metadados.dica_revisoes or '' if metadados else '')
-            self.sheet.cell(row=row, column=9, value=metadados.dica_questoes or '' if metadados else '')
-            self.sheet.cell(row=row, column=10, value=metadados.referencia or '' if metadados else '')
-            self.sheet.cell(row=row, column=11, value=mapa.ordem)
-            self.sheet.cell(row=row, column=12, value=metadados.peso_resumos if metadados else 1)
-            self.sheet.cell(row=row, column=13, value=metadados.peso_revisoes if metadados else 1)
-            self.sheet.cell(row=row, column=14, value=metadados.peso_questoes if metadados else 1)
-            self.sheet.cell(row=row, column=15, value=metadados.numero_questoes if metadados else 0)
-            self.sheet.cell(row=row, column=16, value=metadados.link_estudo or '' if metadados else '')
-            self.sheet.cell(row=row, column=17, value=metadados.link_resumo or '' if metadados else '')
-            self.sheet.cell(row=row, column=18, value=metadados.link_questoes or '' if metadados else '')
-            self.sheet.cell(row=row, column=19, value=1 if (metadados and metadados.suplementar) else 0)
-            
-            row += 1
-        
-        # Salvar em memória
-        output = BytesIO()
-        self.workbook.save(output)
-        output.seek(0)
+            concurso_id=concurso_id
+        ).order_by('ordem').values_list(*self.CAMPOS)
         
-        return output
+        for linha in mapas.iterator(chunk_size=self.TAMANHO_LOTE):
+            yield self.formatar_linha(linha)
+    
+    def linhas_por_concurso(self, concurso_ids):
+        """
+        Gera as linhas Tutory de vários concursos com uma única consulta.
+        
+        Args:
+            concurso_ids (list): IDs dos concursos
+            
+        Yields:
+            tuple: (concurso_id, gerador de linhas), em ordem de ID do
+            concurso; concursos sem itens não aparecem
+        """
+        mapas = MapaAssunto.objects.filter(
+            concurso_id__in=concurso_ids
+        ).order_by('concurso_id', 'ordem').values_list('concurso_id', *self.CAMPOS)
+        
+        for concurso_id, grupo in groupby(mapas.iterator(chunk_size=self.TAMANHO_LOTE), key=itemgetter(0)):
+            yield concurso_id, (self.formatar_linha(linha[1:]) for linha in grupo)
+    
+    def formatar_linha(self, linha):
+        """Converte uma linha de `CAMPOS` nas 19 colunas Tutory"""
+        (extra_cursinho, nome_extra, ordem,
+         disciplina_nome, assunto_nome, subassunto_nome,
+         metadados_id, paginas_minutos,
+         minutos_expresso, minutos_regular, minutos_calma,
+         dica, dica_revisoes, dica_questoes, referencia,
+         peso_resumos, peso_revisoes, peso_questoes, numero_questoes,
+         link_estrategia, link_direcao, link_pdf, link_video,
+         link_resumo, link_questoes, suplementar) = linha
+        
+        # Nome do assunto (com subassunto se houver)
+        if extra_cursinho:
+            nome = nome_extra
+        elif subassunto_nome:
+            nome = f"{assunto_nome} - {subassunto_nome}"
+        else:
+            nome = assunto_nome or ''
+        
+        if metadados_id is None:
+            return [
+                disciplina_nome or '', nome,
+                0, 0, 0, 0, '', '', '', '', ordem, 1, 1, 1, 0, '', '', '', 0
+            ]
+        
+        link_estudo = link_estrategia or link_direcao or link_pdf or link_video or ''
+        
+        return [
+            disciplina_nome or '',
+            nome,
+            paginas_minutos,
+            float(minutos_expresso),
+            float(minutos_regular),
+            float(minutos_calma),
+            dica or '',
+            dica_revisoes or '',
+            dica_questoes or '',
+            referencia or '',
+            ordem,
+            peso_resumos,
+            peso_revisoes,
+            peso_questoes,
+            numero_questoes,
+            link_estudo,
+            link_resumo or '',
+            link_questoes or '',
+            1 if suplementar else 0
+        ]
+
+
+class ExportacaoCacheService:
+    """
+    Cache das planilhas Tutory, indexado pela impressão digital do concurso.
+    
+    A impressão digital combina a sigla do concurso, a versão da matriz
+    (MatrizVersao, que muda a cada alteração em disciplinas, assuntos e
+    subassuntos) e o maior `updated_at` e a contagem dos itens do mapa e dos
+    seus metadados. Qualquer alteração que mude a planilha muda a chave,
+    então não há invalidação explícita: versões antigas saem do cache pela
+    política LRU.
+    """
+    
+    _cache = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def cache(cls):
+        """Retorna o cache do processo, criando-o no primeiro uso"""
+        if cls._cache is None:
+            with cls._lock:
+                if cls._cache is None:
+                    cls._cache = CacheLRU(
+                        getattr(settings, 'EXPORTACAO_CACHE_TAMANHO_MAXIMO', 64 * 2**20),
+                        getattr(settings, 'EXPORTACAO_CACHE_TAMANHO_MAXIMO_ENTRADA', 16 * 2**20)
+                    )
+        return cls._cache
+    
+    @classmethod
+    def impressao_digital(cls, concurso):
+        """
+        Calcula a impressão digital do conteúdo exportado de um concurso.
+        
+        Args:
+            concurso: Objeto Concurso
+            
+        Returns:
+            str: Hash SHA-256 (hex)
+        """
+        # A matriz entra pelo token da versão (uma leitura por chave primária),
+        # sem juntar as tabelas de disciplinas, assuntos e subassuntos
+        agregados = MapaAssunto.objects.filter(concurso_id=concurso.pk).order_by().aggregate(
+            total_mapas=Count('pk'),
+            total_metadados=Count('metadados'),
+            ultimo_mapa=Max('updated_at'),
+            ultimo_metadado=Max('metadados__updated_at'),
+        )
+        partes = [concurso.pk, concurso.sigla, MatrizSnapshotService.versao_atual()] + [
+            agregados[chave] for chave in sorted(agregados)
+        ]
+        return hashlib.sha256(repr(partes).encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def exportar(cls, concurso):
+        """
+        Retorna a planilha Tutory do concurso, do cache quando possível.
+        
+        Args:
+            concurso: Objeto Concurso
+            
+        Returns:
+            tuple: (arquivo binário posicionado no início, True se veio do cache)
+        """
+        chave = cls.impressao_digital(concurso)
+        dados = cls.cache().obter(chave)
+        if dados is not None:
+            return BytesIO(dados), True
+        
+        output = ExportacaoTutoryService().exportar_concurso(concurso)
+        output.seek(0, os.SEEK_END)
+        tamanho = output.tell()
+        output.seek(0)
+        
+        if tamanho <= cls.cache().tamanho_maximo_entrada:
+            dados = output.read()
+            output.close()
+            cls.cache().guardar(chave, dados)
+            return BytesIO(dados), False
+        
+        return output, False
+    
+    @classmethod
+    def estatisticas(cls):
+        """Retorna ocupação e contadores de acerto/falha do cache do processo"""
+        return cls.cache().estatisticas()
+
+
+class ConcursoDetalheCacheService:
+    """
+    Cache do corpo renderizado de GET /api/concursos/{id}/ e das suas
+    variantes comprimidas.
+    
+    A chave combina a impressão digital do mapa (ver ExportacaoCacheService)
+    com os campos do próprio concurso e do usuário que o criou, então também
+    não há invalidação explícita. Cada processo do servidor mantém o seu
+    próprio cache LRU.
+    """
+    
+    _cache = None
+    _lock = threading.Lock()
+    
+    @classmethod
+    def cache(cls):
+        """Retorna o cache do processo, criando-o no primeiro uso"""
+        if cls._cache is None:
+            with cls._lock:
+                if cls._cache is None:
+                    cls._cache = CacheLRU(
+                        getattr(settings, 'CONCURSO_CACHE_TAMANHO_MAXIMO', 64 * 2**20),
+                        getattr(settings, 'CONCURSO_CACHE_TAMANHO_MAXIMO_ENTRADA', 16 * 2**20)
+                    )
+        return cls._cache
+    
+    @classmethod
+    def chave(cls, concurso):
+        """
+        Chave do conteúdo atual do detalhe do concurso.
+        
+        Inclui os campos renderizados do criador (ver ConcursoSerializer),
+        que mudam sem alterar o concurso; a view já os carrega com
+        select_related.
+        """
+        criador = concurso.criado_por.email if concurso.criado_por_id else None
+        return (concurso.pk, concurso.updated_at, concurso.criado_por_id, criador,
+                ExportacaoCacheService.impressao_digital(concurso))
+    
+    @classmethod
+    def obter_corpo(cls, chave, renderizar):
+        """
+        Retorna o corpo da chave, renderizando-o com `renderizar()` se necessário.
+        
+        Returns:
+            tuple: (bytes, True se veio do cache)
+        """
+        corpo = cls.cache().obter(chave)
+        if corpo is not None:
+            return corpo, True
+        
+        corpo = renderizar()
+        cls.cache().guardar(chave, corpo)
+        return corpo, False
+    
+    @classmethod
+    def obter_variante(cls, chave, corpo, codificacao):
+        """
+        Corpo comprimido com `codificacao`, guardado ao lado do corpo original.
+        
+        Returns:
+            tuple: (bytes, segundos gastos comprimindo ou None se veio do cache)
+        """
+        comprimido = cls.cache().obter((*chave, codificacao))
+        if comprimido is not None:
+            return comprimido, None
+        
+        comprimido, duracao = compressao.medir_compressao(corpo, codificacao, cache=True)
+        cls.cache().guardar((*chave, codificacao), comprimido)
+        return comprimido, duracao
+    
+    @classmethod
+    def estatisticas(cls):
+        """Retorna ocupação e contadores de acerto/falha do cache do processo"""
+        return cls.cache().estatisticas()
+
+
+class ExportacaoLoteService:
+    """
+    Exportação Tutory de vários concursos de uma vez.
+    
+    Os concursos são divididos em blocos e cada bloco é processado por um
+    processo do pool (ver core/processos.py), com uma única leitura no banco
+    por bloco. O resultado é um .zip com uma planilha por concurso ou um
+    único .xlsx com uma aba por concurso.
+    """
+    
+    FORMATOS = ('zip', 'xlsx')
+    # Abaixo disso, iniciar os processos custa mais do que gerar as planilhas
+    MINIMO_PARALELO = 8
+    
+    def __init__(self, processos=None):
+        self.processos = processos or getattr(settings, 'EXPORTACAO_MAX_PROCESSOS', os.cpu_count() or 1)
+    
+    @staticmethod
+    def maximo_concursos():
+        """Máximo de concursos por exportação pedida pela API"""
+        return getattr(settings, 'EXPORTACAO_LOTE_MAXIMO_CONCURSOS', 100)
+    
+    def exportar(self, concursos, formato='zip'):
+        """
+        Exporta vários concursos.
+        
+        Args:
+            concursos: QuerySet de Concurso
+            formato (str): 'zip' (uma planilha por concurso) ou 'xlsx'
+                (uma aba por concurso)
+                
+        Returns:
+            SpooledTemporaryFile: Arquivo gerado, posicionado no início
+        """
+        if formato not in self.FORMATOS:
+            raise ValueError(f"Formato inválido: {formato}. Use 'zip' ou 'xlsx'")
+        
+        itens = self._nomear(concursos.order_by('pk').values_list('pk', 'sigla'))
+        output = tempfile.SpooledTemporaryFile(max_size=ExportacaoTutoryService.LIMITE_MEMORIA)
+        
+        if formato == 'zip':
+            self._exportar_zip(itens, output)
+        else:
+            self._exportar_planilha(itens, output)
+        
+        output.seek(0)
+        return output
+    
+    def _nomear(self, concursos):
+        """Define títulos de aba únicos (siglas podem se repetir entre concursos)"""
+        itens = []
+        usados = set()
+        for pk, sigla in concursos:
+            titulo = sigla[:31]
+            if titulo in usados:
+                sufixo = f' ({pk})'
+                titulo = sigla[:31 - len(sufixo)] + sufixo
+            usados.add(titulo)
+            itens.append((pk, titulo))
+        return itens
+    
+    def _blocos(self, itens):
+        """Divide os itens em até 2 blocos por processo, para balancear a carga"""
+        if len(itens) < self.MINIMO_PARALELO:
+            return [itens]
+        quantidade = min(len(itens), self.processos * 2)
+        return [itens[i::quantidade] for i in range(quantidade)]
+    
+    def _exportar_zip(self, itens, output):
+        """Gera as planilhas nos processos e as agrupa em um .zip"""
+        with tempfile.TemporaryDirectory() as diretorio:
+            resultados = processos.executar(
+                processos.exportar_concursos_em_arquivos, self._blocos(itens),
+                self.processos, (diretorio,)
+            )
+            caminhos = dict(caminho for bloco in resultados for caminho in bloco)
+            
+            # As planilhas .xlsx já são compactadas; o zip apenas as agrupa
+            with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as arquivo_zip:
+                for pk, titulo in itens:
+                    arquivo_zip.write(caminhos[pk], f'{titulo}_tutory.xlsx')
+    
+    def _exportar_planilha(self, itens, output):
+        """Formata as linhas nos processos e grava uma aba por concurso"""
+        resultados = processos.executar(
+            processos.formatar_concursos, self._blocos(itens), self.processos
+        )
+        linhas = {pk: linhas for bloco in resultados for pk, linhas in bloco.items()}
+        
+        service = ExportacaoTutoryService()
+        workbook = openpyxl.Workbook(write_only=True)
+        for pk, titulo in itens:
+            service.adicionar_aba(workbook, titulo, linhas.get(pk, []))
+        workbook.save(output)
+
+
+class MetadadosConcursoService:
+    """
+    Leitura em lote dos metadados de todos os itens do mapa de um concurso.
+    
+    Usada pelo editor do mapa para carregar os metadados uma única vez, em
+    vez de uma requisição por item. A versão (contagem e maior
+    `updated_at`) serve de ETag e de marca para leituras incrementais.
+    """
+    
+    CAMPOS = (
+        'id', 'paginas_minutos',
+        'minutos_expresso', 'minutos_regular', 'minutos_calma',
+        'dica', 'dica_revisoes', 'dica_questoes', 'referencia',
+        'peso_resumos', 'peso_revisoes', 'peso_questoes',
+        'numero_questoes',
+        'link_estrategia', 'link_direcao', 'link_pdf',
+        'link_resumo', 'link_questoes', 'link_video',
+        'relevancia', 'suplementar', 'updated_at'
+    )
+    CAMPOS_DECIMAIS = ('minutos_expresso', 'minutos_regular', 'minutos_calma')
+    
+    # Mesmo formato de data/hora dos serializers (fuso horário local)
+    _data_hora = serializers.DateTimeField()
+    
+    @classmethod
+    def formatar_data_hora(cls, valor):
+        return cls._data_hora.to_representation(valor) if valor is not None else None
+    
+    @classmethod
+    def consulta(cls, concurso_id):
+        """Metadados do concurso (usa o índice de MapaAssunto por concurso)"""
+        return MetadadosAssunto.objects.filter(mapa_assunto__concurso_id=concurso_id).order_by()
+    
+    @classmethod
+    def versao(cls, concurso_id):
+        """
+        Versão atual dos metadados do concurso.
+        
+        Returns:
+            tuple: (total de metadados, maior updated_at ou None)
+        """
+        agregados = cls.consulta(concurso_id).aggregate(
+            total=Count('pk'),
+            ultima_alteracao=Max('updated_at')
+        )
+        return agregados['total'], agregados['ultima_alteracao']
+    
+    @classmethod
+    def etag(cls, concurso_id, desde=None):
+        """
+        ETag da leitura em lote (muda a cada criação, alteração ou remoção).
+        
+        Returns:
+            tuple: (hash SHA-256 hex, maior updated_at ou None)
+        """
+        total, ultima_alteracao = cls.versao(concurso_id)
+        partes = [concurso_id, total, ultima_alteracao, desde]
+        return hashlib.sha256(repr(partes).encode('utf-8')).hexdigest(), ultima_alteracao
+    
+    @classmethod
+    def ler(cls, concurso_id, desde=None):
+        """
+        Lê os metadados do concurso com uma única consulta.
+        
+        Args:
+            concurso_id (int): ID do concurso
+            desde (datetime): Opcional; apenas metadados alterados depois
+            
+        Returns:
+            dict: ID do item do mapa -> {campo: valor}, nos formatos de
+            MetadadosAssuntoSerializer
+        """
+        queryset = cls.consulta(concurso_id)
+        if desde is not None:
+            queryset = queryset.filter(updated_at__gt=desde)
+        return cls.formatar(queryset)
+    
+    @classmethod
+    def formatar(cls, queryset):
+        """Formata os metadados de `queryset` como em `ler`"""
+        metadados = {}
+        for mapa_id, *valores in queryset.values_list('mapa_assunto_id', *cls.CAMPOS):
+            item = dict(zip(cls.CAMPOS, valores))
+            for campo in cls.CAMPOS_DECIMAIS:
+                item[campo] = str(item[campo])
+            item['updated_at'] = cls.formatar_data_hora(item['updated_at'])
+            metadados[mapa_id] = item
+        return metadados
+
+
+class MetadadosLoteService:
+    """
+    Criação e atualização em lote dos metadados dos itens dos mapas.
+    
+    Para a edição em grade: valida todas as linhas em uma única passada,
+    sem consultas por linha (tipos e escolhas pelos campos do modelo e as
+    regras de MetadadosAssunto.clean), e grava com `bulk_create` e
+    `bulk_update` em uma transação. Com qualquer erro, nada é gravado.
+    """
+    
+    CAMPOS = tuple(
+        campo for campo in MetadadosConcursoService.CAMPOS if campo not in ('id', 'updated_at')
+    )
+    TAMANHO_LOTE = 500
+    
+    def gravar(self, linhas):
+        """
+        Aplica as linhas, criando os metadados que ainda não existem.
+        
+        Args:
+            linhas (list): Dicts com 'mapa_assunto' e apenas os campos a alterar
+            
+        Returns:
+            dict: {'criados': [mapa_id], 'atualizados': [mapa_id],
+                   'erros': {índice: {campo: mensagem}}}
+        """
+        erros = {}
+        mapa_ids = {}
+        for indice, linha in enumerate(linhas):
+            erro = self._validar_formato(linha, mapa_ids)
+            if erro:
+                erros[indice] = erro
+            else:
+                mapa_ids[linha['mapa_assunto']] = indice
+        
+        mapas_existentes = set(
+            MapaAssunto.objects.filter(pk__in=mapa_ids).values_list('pk', flat=True)
+        )
+        existentes = {
+            metadados.mapa_assunto_id: metadados
+            for metadados in MetadadosAssunto.objects.filter(mapa_assunto_id__in=mapa_ids)
+        }
+        
+        novos = []
+        alterados = []
+        campos_alterados = set()
+        for mapa_id, indice in mapa_ids.items():
+            if mapa_id not in mapas_existentes:
+                erros[indice] = {'mapa_assunto': 'Item de mapa não encontrado'}
+                continue
+            
+            metadados = existentes.get(mapa_id)
+            if metadados is None:
+                metadados = MetadadosAssunto(mapa_assunto_id=mapa_id)
+                novos.append(metadados)
+            else:
+                alterados.append(metadados)
+            
+            campos = [campo for campo in linhas[indice] if campo != 'mapa_assunto']
+            campos_alterados.update(campos)
+            erro = self._aplicar(metadados, linhas[indice], campos)
+            if erro:
+                erros[indice] = erro
+        
+        if erros:
+            return {'criados': [], 'atualizados': [], 'erros': dict(sorted(erros.items()))}
+        
+        with transaction.atomic():
+            MetadadosAssunto.objects.bulk_create(novos, batch_size=self.TAMANHO_LOTE)
+            if alterados and campos_alterados:
+                agora = timezone.now()
+                for metadados in alterados:
+                    metadados.updated_at = agora
+                MetadadosAssunto.objects.bulk_update(
+                    alterados, [*campos_alterados, 'updated_at'], batch_size=self.TAMANHO_LOTE
+                )
+        
+        return {
+            'criados': [metadados.mapa_assunto_id for metadados in novos],
+            'atualizados': [metadados.mapa_assunto_id for metadados in alterados],
+            'erros': {}
+        }
+    
+    def _validar_formato(self, linha, mapa_ids):
+        """Valida a estrutura da linha (sem consultas)"""
+        if not isinstance(linha, dict):
+            return {'non_field_errors': 'Cada linha deve ser um objeto'}
+        
+        mapa_id = linha.get('mapa_assunto')
+        if not isinstance(mapa_id, int) or isinstance(mapa_id, bool):
+            return {'mapa_assunto': 'Informe o ID do item de mapa'}
+        if mapa_id in mapa_ids:
+            return {'mapa_assunto': f'Item repetido no lote (linha {mapa_ids[mapa_id]})'}
+        
+        desconhecidos = [campo for campo in linha if campo != 'mapa_assunto' and campo not in self.CAMPOS]
+        if desconhecidos:
+            return {campo: 'Campo desconhecido ou não editável' for campo in desconhecidos}
+        return None
+    
+    def _aplicar(self, metadados, linha, campos):
+        """Converte e valida os valores da linha em `metadados`; retorna os erros"""
+        erros = {}
+        for campo in campos:
+            try:
+                valor = MetadadosAssunto._meta.get_field(campo).clean(linha[campo], metadados)
+            except ValidationError as e:
+                erros[campo] = ' '.join(e.messages)
+            else:
+                setattr(metadados, campo, valor)
+        
+        if not erros:
+            try:
+                metadados.clean()
+            except ValidationError as e:
+                erros = {campo: ' '.join(mensagens) for campo, mensagens in e.message_dict.items()}
+        return erros
+
+
+class MapaAssuntoLoteService:
+    """
+    Operações em lote sobre os itens dos mapas (MapaAssunto).
+    
+    Valida as FKs de todos os itens com consultas por conjunto e grava com
+    `bulk_create`, em vez de uma requisição/validação por item.
+    """
+    
+    def criar(self, itens):
+        """
+        Cria itens de mapa em lote, ignorando os que já existem.
+        
+        A ordem é atribuída pelo servidor, continuando a partir da maior
+        ordem atual de cada concurso, na sequência recebida. Os concursos
+        ficam travados (SELECT ... FOR UPDATE) da leitura à gravação.
+        
+        Args:
+            itens (list): Dicts validados por MapaAssuntoLoteItemSerializer
+            
+        Returns:
+            dict: {'criados': [MapaAssunto], 'ignorados': [índices],
+                   'erros': {índice: {campo: mensagem}}}
+        """
+        erros = self._validar_relacoes(itens)
+        if erros:
+            return {'criados': [], 'ignorados': [], 'erros': erros}
+        
+        concurso_ids = {item['concurso'] for item in itens}
+        assunto_ids = {item['assunto'] for item in itens if item['assunto']}
+        
+        with transaction.atomic(), ContadoresService.suspender():
+            # Trava os concursos (em ordem, sem deadlock entre lotes): lotes
+            # simultâneos no mesmo mapa esperam aqui, em vez de lerem a mesma
+            # maior ordem e os mesmos itens existentes e colidirem no unique_together
+            list(Concurso.objects.select_for_update().filter(
+                pk__in=concurso_ids
+            ).order_by('pk').values_list('pk', flat=True))
+            
+            existentes = set(
+                MapaAssunto.objects.filter(
+                    concurso_id__in=concurso_ids, assunto_id__in=assunto_ids
+                ).values_list('concurso_id', 'assunto_id', 'subassunto_id')
+            )
+            proxima_ordem = {
+                concurso_id: (maior_ordem or 0) + 1
+                for concurso_id, maior_ordem in MapaAssunto.objects.filter(
+                    concurso_id__in=concurso_ids
+                ).order_by().values('concurso_id').annotate(
+                    maior_ordem=Max('ordem')
+                ).values_list('concurso_id', 'maior_ordem')
+            }
+            
+            novos = []
+            ignorados = []
+            for indice, item in enumerate(itens):
+                chave = (item['concurso'], item['assunto'], item['subassunto'])
+                if item['assunto'] and chave in existentes:
+                    ignorados.append(indice)
+                    continue
+                existentes.add(chave)
+                
+                ordem = proxima_ordem.get(item['concurso'], 1)
+                proxima_ordem[item['concurso']] = ordem + 1
+                novos.append(MapaAssunto(
+                    concurso_id=item['concurso'],
+                    assunto_id=item['assunto'],
+                    subassunto_id=item['subassunto'],
+                    ordem=ordem,
+                    item_edital=item['item_edital'],
+                    extra_cursinho=item['extra_cursinho'],
+                    nome_extra=item['nome_extra'],
+                ))
+            
+            criados = MapaAssunto.objects.bulk_create(novos, batch_size=500)
+            ContadoresService.recalcular(Concurso, concurso_ids)
+            if any(mapa.nome_extra or mapa.item_edital for mapa in criados):
+                BuscaService.reindexar_mapas(ids=[mapa.pk for mapa in criados])
+        
+        return {'criados': criados, 'ignorados': ignorados, 'erros': {}}
+    
+    def remover(self, concurso_id, ids=None, assunto_ids=None, disciplina_id=None):
+        """
+        Remove itens de um mapa (e seus metadados) com um filtro por conjunto.
+        
+        Os filtros informados são combinados (AND). Roda em uma transação
+        com um número fixo de comandos SQL, independente da quantidade de
+        itens removidos: a leitura dos IDs com SELECT ... FOR UPDATE, um
+        DELETE por tabela (entradas do índice de busca, metadados e itens)
+        sobre essa lista fixa de IDs e o recálculo do contador do concurso.
+        Fora do PostgreSQL e do SQLite, os DELETEs são divididos em lotes.
+        
+        Args:
+            concurso_id (int): Concurso dono do mapa
+            ids (list): IDs de MapaAssunto (opcional)
+            assunto_ids (list): IDs de assuntos da matriz (opcional)
+            disciplina_id (int): ID da disciplina da matriz (opcional)
+            
+        Returns:
+            list: IDs dos itens removidos
+        """
+        queryset = MapaAssunto.objects.filter(concurso_id=concurso_id)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        if assunto_ids is not None:
+            queryset = queryset.filter(assunto_id__in=assunto_ids)
+        if disciplina_id is not None:
+            queryset = queryset.filter(assunto__disciplina_id=disciplina_id)
+        
+        with transaction.atomic():
+            # Os IDs travados são exatamente os removidos, mesmo com escritas concorrentes
+            removidos = list(
+                queryset.select_for_update(of=('self',)).order_by().values_list('pk', flat=True)
+            )
+            if removidos:
+                # SQL direto: o coletor do Django carregaria cada item e enviaria um
+                # post_delete por linha; o único receptor (o contador do concurso) é
+                # substituído pelo recálculo ao final. Dependentes primeiro.
+                with connection.cursor() as cursor:
+                    for modelo, coluna in (
+                        (IndiceBusca, 'mapa_assunto_id'),
+                        (MetadadosAssunto, 'mapa_assunto_id'),
+                        (MapaAssunto, 'id'),
+                    ):
+                        self._apagar_por_ids(cursor, modelo._meta.db_table, coluna, removidos)
+                ContadoresService.recalcular(Concurso, [concurso_id])
+        
+        return removidos
+    
+    def _apagar_por_ids(self, cursor, tabela, coluna, ids):
+        """
+        DELETE das linhas de `tabela` cuja `coluna` está em `ids`.
+        
+        No PostgreSQL e no SQLite a lista vai em um único parâmetro (array e
+        JSON), em um só comando; nos demais bancos, em lotes de IN (...).
+        """
+        tabela = connection.ops.quote_name(tabela)
+        coluna = connection.ops.quote_name(coluna)
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DELETE FROM {tabela} WHERE {coluna} = ANY(%s)', [list(ids)])
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                f'DELETE FROM {tabela} WHERE {coluna} IN (SELECT value FROM json_each(%s))',
+                [json.dumps(list(ids))]
+            )
+        else:
+            lote = connection.features.max_query_params or len(ids)
+            for inicio in range(0, len(ids), lote):
+                parte = ids[inicio:inicio + lote]
+                cursor.execute(
+                    f'DELETE FROM {tabela} WHERE {coluna} IN ({", ".join(["%s"] * len(parte))})', parte
+                )
+    
+    def _validar_relacoes(self, itens):
+        """
+        Valida concursos, assuntos e subassuntos de todos os itens.
+        
+        Usa uma consulta por tabela para o lote inteiro.
+        
+        Returns:
+            dict: Erros por índice do item (vazio se tudo for válido)
+        """
+        concursos = set(Concurso.objects.filter(
+            pk__in={item['concurso'] for item in itens}
+        ).values_list('pk', flat=True))
+        assuntos = set(Assunto.objects.filter(
+            pk__in={item['assunto'] for item in itens if item['assunto']}
+        ).values_list('pk', flat=True))
+        subassuntos = dict(Subassunto.objects.filter(
+            pk__in={item['subassunto'] for item in itens if item['subassunto']}
+        ).values_list('pk', 'assunto_id'))
+        
+        erros = {}
+        for indice, item in enumerate(itens):
+            erro = {}
+            if item['concurso'] not in concursos:
+                erro['concurso'] = f"Concurso {item['concurso']} não existe"
+            if item['assunto'] and item['assunto'] not in assuntos:
+                erro['assunto'] = f"Assunto {item['assunto']} não existe"
+            if item['subassunto']:
+                if item['subassunto'] not in subassuntos:
+                    erro['subassunto'] = f"Subassunto {item['subassunto']} não existe"
+                elif subassuntos[item['subassunto']] != item['assunto']:
+                    erro['subassunto'] = 'Subassunto não pertence ao assunto informado'
+            if erro:
+                erros[indice] = erro
+        
+        return erros
+
+
+class ConcursoDuplicacaoService:
+    """
+    Duplicação de concursos com operações por conjunto.
+    
+    Copia o concurso, todos os itens do mapa e seus metadados com número
+    constante de consultas em uma única transação. Em PostgreSQL e SQLite
+    usa INSERT ... SELECT direto no banco; nos demais backends, leitura com
+    `values()` seguida de `bulk_create`.
+    """
+    
+    # Colunas copiadas do item original (o restante é definido na cópia)
+    CAMPOS_MAPA = ['assunto_id', 'subassunto_id', 'ordem', 'item_edital', 'extra_cursinho', 'nome_extra']
+    
+    def duplicar(self, concurso, novo_nome, usuario=None):
+        """
+        Duplica um concurso com todo o seu mapa.
+        
+        Args:
+            concurso: Concurso original
+            novo_nome (str): Nome do novo concurso
+            usuario: Usuário que solicitou a duplicação
+            
+        Returns:
+            Concurso: Novo concurso
+        """
+        with transaction.atomic(), ContadoresService.suspender():
+            novo_concurso = Concurso.objects.create(
+                nome=novo_nome,
+                sigla=concurso.sigla,
+                tipo=concurso.tipo,
+                cursinho=concurso.cursinho,
+                ordem=concurso.ordem,
+                criado_por=usuario
+            )
+            
+            if connection.vendor in ('postgresql', 'sqlite'):
+                self._copiar_com_insert_select(concurso.pk, novo_concurso.pk)
+            else:
+                self._copiar_com_bulk_create(concurso.pk, novo_concurso.pk)
+            
+            ContadoresService.recalcular(Concurso, [novo_concurso.pk])
+            BuscaService.reindexar_mapas(concurso_ids=[novo_concurso.pk])
+        
+        novo_concurso.refresh_from_db(fields=['total_assuntos_mapa'])
+        return novo_concurso
+    
+    def _copiar_com_insert_select(self, origem_id, destino_id):
+        """Copia itens e metadados com dois INSERT ... SELECT"""
+        ops = connection.ops
+        agora = ops.adapt_datetimefield_value(timezone.now())
+        mapa_tabela = ops.quote_name(MapaAssunto._meta.db_table)
+        metadados_tabela = ops.quote_name(MetadadosAssunto._meta.db_table)
+        campos_mapa = ', '.join(ops.quote_name(campo) for campo in self.CAMPOS_MAPA)
+        campos_metadados = [
+            ops.quote_name(field.column)
+            for field in MetadadosAssunto._meta.concrete_fields
+            if field.column not in ('id', 'mapa_assunto_id', 'created_at', 'updated_at')
+        ]
+        igual = 'IS NOT DISTINCT FROM' if connection.vendor == 'postgresql' else 'IS'
+        
+        # Itens idênticos em todas as colunas copiadas são intercambiáveis;
+        # ROW_NUMBER desempata repetições para casar cada cópia com o original
+        itens_numerados = f"""
+            SELECT id, {campos_mapa},
+                   ROW_NUMBER() OVER (PARTITION BY {campos_mapa} ORDER BY id) AS seq
+            FROM {mapa_tabela} WHERE concurso_id = %s
+        """
+        correspondencia = ' AND '.join(
+            f'destino.{ops.quote_name(campo)} {igual} origem.{ops.quote_name(campo)}'
+            for campo in self.CAMPOS_MAPA
+        )
+        
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {mapa_tabela} (created_at, updated_at, concurso_id, {campos_mapa})
+                SELECT %s, %s, %s, {campos_mapa}
+                FROM {mapa_tabela} WHERE concurso_id = %s
+                ORDER BY id
+            """, [agora, agora, destino_id, origem_id])
+            
+            cursor.execute(f"""
+                WITH origem AS ({itens_numerados}),
+                     destino AS ({itens_numerados})
+                INSERT INTO {metadados_tabela}
+                    (created_at, updated_at, mapa_assunto_id, {', '.join(campos_metadados)})
+                SELECT %s, %s, destino.id, {', '.join(f'm.{campo}' for campo in campos_metadados)}
+                FROM {metadados_tabela} m
+                JOIN origem ON origem.id = m.mapa_assunto_id
+                JOIN destino ON destino.seq = origem.seq AND {correspondencia}
+            """, [origem_id, destino_id, agora, agora])
+    
+    def _copiar_com_bulk_create(self, origem_id, destino_id):
+        """Copia itens e metadados lendo com values() e gravando com bulk_create"""
+        originais = list(
+            MapaAssunto.objects.filter(concurso_id=origem_id).order_by('pk').values('pk', *self.CAMPOS_MAPA)
+        )
+        copias = MapaAssunto.objects.bulk_create([
+            MapaAssunto(concurso_id=destino_id, **{campo: item[campo] for campo in self.CAMPOS_MAPA})
+            for item in originais
+        ], batch_size=1000)
+        
+        if not connection.features.can_return_rows_from_bulk_insert:
+            copias = list(MapaAssunto.objects.filter(concurso_id=destino_id).order_by('pk'))
+        novo_id = {item['pk']: copia.pk for item, copia in zip(originais, copias)}
+        
+        campos_metadados = [
+            field.attname
+            for field in MetadadosAssunto._meta.concrete_fields
+            if field.attname not in ('id', 'mapa_assunto_id', 'created_at', 'updated_at')
+        ]
+        MetadadosAssunto.objects.bulk_create([
+            MetadadosAssunto(
+                mapa_assunto_id=novo_id[metadados['mapa_assunto_id']],
+                **{campo: metadados[campo] for campo in campos_metadados}
+            )
+            for metadados in MetadadosAssunto.objects.filter(
+                mapa_assunto__concurso_id=origem_id
+            ).values('mapa_assunto_id', *campos_metadados)
+        ], batch_size=1000)
+    
+    @classmethod
+    def executar_tarefa(cls, tarefa):
+        """Executor de Tarefa do tipo 'duplicar_concurso'"""
+        concurso = Concurso.objects.get(pk=tarefa.parametros['concurso'])
+        novo_concurso = cls().duplicar(
+            concurso, tarefa.parametros['novo_nome'], tarefa.criado_por
+        )
+        return {
+            'concurso': novo_concurso.pk,
+            'total_assuntos_mapa': novo_concurso.total_assuntos_mapa
+        }
+
+
+class TarefaService:
+    """
+    Execução de tarefas em segundo plano (modelo Tarefa).
+    
+    As tarefas são gravadas no banco como pendentes e executadas por um pool
+    de threads do próprio processo, após o commit da transação que as criou.
+    Com TAREFAS_EM_SEGUNDO_PLANO=False, ficam pendentes para o comando
+    `processar_tarefas`, que funciona como fila local baseada no banco.
+    
+    O `updated_at` de uma tarefa em execução funciona como heartbeat: é
+    gravado na reserva e a cada atualização de progresso. Tarefas sem sinal
+    há mais de TAREFAS_TEMPO_LIMITE segundos (o worker morreu) são marcadas
+    como erro por `recuperar_interrompidas`.
+    """
+    
+    EXECUTORES = {
+        'duplicar_concurso': ConcursoDuplicacaoService.executar_tarefa,
+        'importar_matriz': MatrizImportService.executar_tarefa,
+    }
+    
+    _pool = None
+    _pool_lock = threading.Lock()
+    
+    @classmethod
+    def enfileirar(cls, tipo, parametros, usuario=None):
+        """
+        Cria uma tarefa pendente e agenda sua execução.
+        
+        Returns:
+            Tarefa: Tarefa criada
+        """
+        tarefa = Tarefa.objects.create(tipo=tipo, parametros=parametros, criado_por=usuario)
+        
+        if getattr(settings, 'TAREFAS_EM_SEGUNDO_PLANO', True):
+            transaction.on_commit(lambda: cls._obter_pool().submit(cls._executar_em_thread, tarefa.pk))
+        
+        return tarefa
+    
+    @classmethod
+    def _obter_pool(cls):
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'TAREFAS_MAX_WORKERS', 2),
+                    thread_name_prefix='tarefas'
+                )
+            return cls._pool
+    
+    @classmethod
+    def _executar_em_thread(cls, tarefa_id):
+        try:
+            cls.executar(tarefa_id)
+        finally:
+            close_old_connections()
+    
+    @classmethod
+    def executar(cls, tarefa_id):
+        """
+        Executa uma tarefa pendente.
+        
+        A tarefa é reservada com um UPDATE condicional, então cada tarefa é
+        executada uma única vez mesmo com vários workers.
+        
+        Returns:
+            bool: True se a tarefa foi executada por esta chamada
+        """
+        reservada = Tarefa.objects.filter(pk=tarefa_id, estado='pendente').update(
+            estado='executando', iniciada_em=timezone.now(), updated_at=timezone.now()
+        )
+        if not reservada:
+            return False
+        
+        tarefa = Tarefa.objects.get(pk=tarefa_id)
+        try:
+            resultado = cls.EXECUTORES[tarefa.tipo](tarefa)
+        except Exception as e:
+            agora = timezone.now()
+            Tarefa.objects.filter(pk=tarefa_id).update(
+                estado='erro', erro=str(e), concluida_em=agora, updated_at=agora
+            )
+        else:
+            agora = timezone.now()
+            Tarefa.objects.filter(pk=tarefa_id).update(
+                estado='concluida', resultado=resultado, concluida_em=agora, updated_at=agora
+            )
+        return True
+    
+    @classmethod
+    def recuperar_interrompidas(cls, tempo_limite=None):
+        """
+        Marca como erro as tarefas em execução sem heartbeat recente.
+        
+        Não são devolvidas à fila: a falha que derrubou o worker (ex.: falta
+        de memória) se repetiria a cada nova tentativa.
+        
+        Args:
+            tempo_limite (timedelta): Padrão: TAREFAS_TEMPO_LIMITE segundos
+            
+        Returns:
+            int: Quantidade de tarefas marcadas como erro
+        """
+        if tempo_limite is None:
+            tempo_limite = timedelta(seconds=getattr(settings, 'TAREFAS_TEMPO_LIMITE', 60 * 60))
+        
+        agora = timezone.now()
+        return Tarefa.objects.filter(estado='executando', updated_at__lt=agora - tempo_limite).update(
+            estado='erro',
+            erro=f'Execução interrompida: sem atualização por mais de {int(tempo_limite.total_seconds())} segundos',
+            concluida_em=agora,
+            updated_at=agora
+        )
+    
+    @classmethod
+    def atualizar_progresso(cls, tarefa, progresso):
+        """Grava o progresso parcial de uma tarefa em execução"""
+        tarefa.progresso = progresso
+        Tarefa.objects.filter(pk=tarefa.pk).update(progresso=progresso, updated_at=timezone.now())
@@ -0,0 +1,155 @@
+"""
+Sinais do app core.
+
+Mantêm as colunas de contagem (counter cache) e o índice de busca
+sincronizados e invalidam a versão da matriz em saves e deletes
+individuais. Operações em massa usam ContadoresService, BuscaService e
+MatrizSnapshotService diretamente.
+"""
+
+import threading
+import weakref
+
+from django.db.models import Model, QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .models import Disciplina, Assunto, Subassunto, Concurso, MapaAssunto
+from .services import BuscaService, ContadoresService, MatrizSnapshotService
+
+
+_estado = threading.local()
+
+# Modelos cujo conteúdo compõe o snapshot da matriz
+MODELOS_MATRIZ = (Disciplina, Assunto, Subassunto)
+
+# modelo filho -> (modelo pai, campo FK, origens de delete cujo cascade já remove o pai)
+RELACOES_CONTADAS = {
+    Assunto: (Disciplina, 'disciplina_id', (Disciplina,)),
+    Subassunto: (Assunto, 'assunto_id', (Disciplina, Assunto)),
+    MapaAssunto: (Concurso, 'concurso_id', (Concurso,)),
+}
+
+# Modelos com entrada no índice de busca (campos indexados em `campos_busca`)
+MODELOS_INDEXADOS = (Disciplina, Assunto, Subassunto, MapaAssunto)
+
+
+def _modelo_da_origem(origin):
+    """Retorna o modelo da instância ou queryset que originou um delete"""
+    if isinstance(origin, QuerySet):
+        return origin.model
+    if isinstance(origin, Model):
+        return type(origin)
+    return None
+
+
+def _fk_gravada(campo_fk, update_fields):
+    """Se o save grava a FK (update_fields pode ter o nome ou o attname)"""
+    return update_fields is None or campo_fk in update_fields or campo_fk[:-3] in update_fields
+
+
+def guardar_pai_anterior(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Guarda o pai atual antes de um update, para detectar mudança de FK.
+
+    Usa o valor lido do banco (ver PaiCarregadoMixin); só consulta o banco
+    se a FK não foi carregada (ex.: `.only()` sem ela).
+    """
+    if raw or instance._state.adding:
+        return
+
+    _, campo_fk, _ = RELACOES_CONTADAS[sender]
+    if not _fk_gravada(campo_fk, update_fields):
+        instance._pai_anterior = getattr(instance, campo_fk)
+        return
+
+    if hasattr(instance, '_pai_carregado'):
+        instance._pai_anterior = instance._pai_carregado
+        return
+
+    instance._pai_anterior = sender.objects.filter(
+        pk=instance.pk
+    ).values_list(campo_fk, flat=True).first()
+
+
+def atualizar_contador_ao_salvar(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Incrementa o contador do pai ao criar ou mover um registro"""
+    if raw:
+        return
+
+    modelo_pai, campo_fk, _ = RELACOES_CONTADAS[sender]
+    pai_atual = getattr(instance, campo_fk)
+    if _fk_gravada(campo_fk, update_fields):
+        instance._pai_carregado = pai_atual
+
+    if created:
+        ContadoresService.incrementar(modelo_pai, pai_atual, 1)
+        return
+
+    pai_anterior = getattr(instance, '_pai_anterior', pai_atual)
+    if pai_anterior != pai_atual:
+        ContadoresService.incrementar(modelo_pai, pai_anterior, -1)
+        ContadoresService.incrementar(modelo_pai, pai_atual, 1)
+
+
+def atualizar_contador_ao_deletar(sender, instance, origin=None, **kwargs):
+    """Decrementa o contador do pai ao deletar um registro"""
+    modelo_pai, campo_fk, origens_ignoradas = RELACOES_CONTADAS[sender]
+
+    # Se o delete começou por um ancestral, o próprio pai também está sendo removido
+    if _modelo_da_origem(origin) in origens_ignoradas:
+        return
+
+    ContadoresService.incrementar(modelo_pai, getattr(instance, campo_fk), -1)
+
+
+def invalidar_matriz(sender, raw=False, **kwargs):
+    """Gera uma nova versão da matriz a cada alteração"""
+    if raw:
+        return
+
+    MatrizSnapshotService.invalidar()
+
+
+def invalidar_matriz_ao_deletar(sender, instance, origin=None, **kwargs):
+    """Gera uma única nova versão da matriz por delete (incluindo o cascade)"""
+    ultima_origem = getattr(_estado, 'ultima_origem', None)
+    if origin is not None and ultima_origem is not None and ultima_origem() is origin:
+        return
+
+    _estado.ultima_origem = weakref.ref(origin) if origin is not None else None
+    MatrizSnapshotService.invalidar()
+
+
+def indexar_para_busca(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Atualiza a entrada do registro no índice de busca (o delete é feito pelo cascade).
+
+    Saves que não alteram os campos indexados não custam nenhuma consulta.
+    """
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(sender.campos_busca):
+        return
+    if not created and not instance.busca_alterada():
+        return
+
+    BuscaService.indexar(instance, criado=created)
+    instance._valores_busca = instance.valores_busca()
+
+
+def conectar_sinais():
+    """Conecta os handlers de contadores, de versão da matriz e do índice de busca"""
+    for modelo in RELACOES_CONTADAS:
+        uid = f'contadores_{modelo._meta.model_name}'
+        pre_save.connect(guardar_pai_anterior, sender=modelo, dispatch_uid=uid)
+        post_save.connect(atualizar_contador_ao_salvar, sender=modelo, dispatch_uid=uid)
+        post_delete.connect(atualizar_contador_ao_deletar, sender=modelo, dispatch_uid=uid)
+
+    for modelo in MODELOS_MATRIZ:
+        uid = f'matriz_versao_{modelo._meta.model_name}'
+        post_save.connect(invalidar_matriz, sender=modelo, dispatch_uid=uid)
+        post_delete.connect(invalidar_matriz_ao_deletar, sender=modelo, dispatch_uid=uid)
+
+    for modelo in MODELOS_INDEXADOS:
+        uid = f'busca_{modelo._meta.model_name}'
+        post_save.connect(indexar_para_busca, sender=modelo, dispatch_uid=uid)
@@ -1,3 +1,1903 @@
-from django.test import TestCase
+import datetime
+import decimal
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+import uuid
+import zipfile
+from unittest.mock import patch
 
-# Create your tests here.
+import msgpack
+import openpyxl
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from accounts.models import User
+from . import processos
+from .busca import BuscaIndexadaFilter
+from .cache import CacheLRU
+from .compressao import brotli
+from .renderers import JSONRapidoParser, JSONRapidoRenderer, codificar_colunar
+from .models import (
+    Disciplina, Assunto, Subassunto, Concurso, MapaAssunto, MetadadosAssunto, Tarefa, IndiceBusca,
+    ImportacaoMatriz, MatrizVersao
+)
+from .services import (
+    BuscaService, ConcursoDetalheCacheService, ConcursoDuplicacaoService, ContadoresService, ExportacaoCacheService,
+    ExportacaoLoteService, ExportacaoTutoryService, MapaAssuntoLoteService, MatrizImportService, MatrizSnapshotService,
+    MatrizSubstituicaoService, MetadadosConcursoService, TarefaService
+)
+from .views import (
+    DisciplinaViewSet,
+    AssuntoViewSet,
+    SubassuntoViewSet,
+    ConcursoViewSet,
+    MapaAssuntoViewSet,
+    MetadadosAssuntoViewSet
+)
+
+
+class PlanoDeConsultaTests(TestCase):
+    """
+    Verifica, via EXPLAIN, que a consulta principal de cada listagem usa
+    índices (sem varredura sequencial) em uma base sintética grande.
+
+    No SQLite usa EXPLAIN QUERY PLAN; no PostgreSQL, EXPLAIN (FORMAT JSON)
+    com enable_seqscan desligado, para que uma varredura sequencial só
+    apareça quando não houver índice utilizável.
+    """
+
+    TOTAL_DISCIPLINAS = 20
+    ASSUNTOS_POR_DISCIPLINA = 50
+    SUBASSUNTOS_POR_ASSUNTO = 4
+    TOTAL_CONCURSOS = 200
+    ITENS_POR_MAPA = 40
+
+    @classmethod
+    def setUpTestData(cls):
+        with ContadoresService.suspender():
+            disciplinas = Disciplina.objects.bulk_create([
+                Disciplina(nome=f'Disciplina {i}', ordem=i, ativa=i % 5 != 0)
+                for i in range(cls.TOTAL_DISCIPLINAS)
+            ])
+            assuntos = Assunto.objects.bulk_create([
+                Assunto(disciplina=disciplina, nome=f'Assunto {i}', ordem=i, ativo=i % 7 != 0)
+                for disciplina in disciplinas
+                for i in range(cls.ASSUNTOS_POR_DISCIPLINA)
+            ], batch_size=1000)
+            subassuntos = Subassunto.objects.bulk_create([
+                Subassunto(assunto=assunto, nome=f'Subassunto {i}', ordem=i)
+                for assunto in assuntos
+                for i in range(cls.SUBASSUNTOS_POR_ASSUNTO)
+            ], batch_size=1000)
+
+            concursos = Concurso.objects.bulk_create([
+                Concurso(
+                    nome=f'Concurso {i}', sigla=f'C{i}', ordem=i % 10,
+                    tipo='POS' if i % 3 == 0 else 'GRAD', ativo=i % 4 != 0
+                )
+                for i in range(cls.TOTAL_CONCURSOS)
+            ])
+            mapas = MapaAssunto.objects.bulk_create([
+                MapaAssunto(
+                    concurso=concurso,
+                    assunto_id=subassunto.assunto_id,
+                    subassunto=subassunto,
+                    ordem=ordem
+                )
+                for i, concurso in enumerate(concursos)
+                for ordem, subassunto in enumerate(
+                    subassuntos[i * cls.ITENS_POR_MAPA % len(subassuntos):][:cls.ITENS_POR_MAPA]
+                )
+            ], batch_size=1000)
+            MetadadosAssunto.objects.bulk_create(
+                [MetadadosAssunto(mapa_assunto=mapa) for mapa in mapas], batch_size=1000
+            )
+
+        cls.disciplina = disciplinas[3]
+        cls.assunto = assuntos[75]
+        cls.concurso = concursos[7]
+
+        # Estatísticas atualizadas, como em produção
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def _consulta_da_listagem(self, viewset_class, parametros=None):
+        """Queryset principal da listagem, com os filtros e a ordenação da API"""
+        view = viewset_class()
+        view.action = 'list'
+        view.format_kwarg = None
+        view.kwargs = {}
+        view.request = Request(APIRequestFactory().get('/', parametros or {}))
+        return view.filter_queryset(view.get_queryset())
+
+    def _varreduras_sequenciais(self, queryset):
+        """Tabelas lidas por varredura sequencial no plano da consulta"""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            plano = json.loads(queryset.explain(format='json'))
+
+            tabelas = []
+            nos = [plano[0]['Plan']]
+            while nos:
+                no = nos.pop()
+                if no['Node Type'] == 'Seq Scan':
+                    tabelas.append(no['Relation Name'])
+                nos.extend(no.get('Plans', []))
+            return tabelas
+
+        # SQLite: "SCAN tabela" sem índice é uma varredura completa da tabela
+        return [
+            tabela
+            for tabela, indice in re.findall(r'SCAN (\w+)( USING (?:COVERING )?INDEX)?', queryset.explain())
+            if not indice
+        ]
+
+    def assertUsaIndices(self, queryset):
+        self.assertEqual(
+            self._varreduras_sequenciais(queryset), [],
+            f'Varredura sequencial no plano de:\n{queryset.query}\n\n{queryset.explain()}'
+        )
+
+    def test_disciplinas(self):
+        self.assertUsaIndices(self._consulta_da_listagem(DisciplinaViewSet))
+        self.assertUsaIndices(self._consulta_da_listagem(DisciplinaViewSet, {'ativa': 'true'}))
+
+    def test_assuntos(self):
+        disciplina = str(self.disciplina.pk)
+        self.assertUsaIndices(self._consulta_da_listagem(AssuntoViewSet, {'disciplina': disciplina}))
+        self.assertUsaIndices(self._consulta_da_listagem(AssuntoViewSet, {'ativo': 'true'}))
+        self.assertUsaIndices(
+            self._consulta_da_listagem(AssuntoViewSet, {'disciplina': disciplina, 'ativo': 'true'})
+        )
+
+    def test_subassuntos(self):
+        self.assertUsaIndices(
+            self._consulta_da_listagem(SubassuntoViewSet, {'assunto': str(self.assunto.pk)})
+        )
+        self.assertUsaIndices(
+            self._consulta_da_listagem(SubassuntoViewSet, {'assunto__disciplina': str(self.disciplina.pk)})
+        )
+
+    def test_concursos(self):
+        self.assertUsaIndices(self._consulta_da_listagem(ConcursoViewSet))
+        self.assertUsaIndices(self._consulta_da_listagem(ConcursoViewSet, {'ativo': 'true'}))
+        self.assertUsaIndices(self._consulta_da_listagem(ConcursoViewSet, {'tipo': 'POS'}))
+        self.assertUsaIndices(
+            self._consulta_da_listagem(ConcursoViewSet, {'tipo': 'GRAD', 'ativo': 'true'})
+        )
+
+    def test_mapa_do_concurso(self):
+        self.assertUsaIndices(
+            self._consulta_da_listagem(MapaAssuntoViewSet, {'concurso': str(self.concurso.pk)})
+        )
+
+    def test_metadados_do_concurso(self):
+        self.assertUsaIndices(
+            self._consulta_da_listagem(
+                MetadadosAssuntoViewSet, {'mapa_assunto__concurso': str(self.concurso.pk)}
+            )
+        )
+
+    def test_metadados_em_lote(self):
+        self.assertUsaIndices(MetadadosConcursoService.consulta(self.concurso.pk))
+
+
+class ConsultasPorAcaoTests(TestCase):
+    """
+    Fixa o número de consultas de cada ação das viewsets do core.
+
+    Cada ação é medida duas vezes, antes e depois de acrescentar registros
+    aos mesmos pais (ver `_ampliar`): o número não pode depender da
+    quantidade de linhas serializadas.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        cls.disciplina = Disciplina.objects.create(nome='Direito Constitucional')
+        cls.concurso = Concurso.objects.create(nome='TRF 2025', sigla='TRF', criado_por=cls.admin)
+        Tarefa.objects.create(tipo='importar_matriz', criado_por=cls.admin)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.total = 0
+        self._ampliar()
+
+    def _ampliar(self, quantidade=3):
+        """Acrescenta assuntos, subassuntos e itens de mapa (com metadados)"""
+        for _ in range(quantidade):
+            self.total += 1
+            assunto = Assunto.objects.create(
+                disciplina=self.disciplina, nome=f'Assunto {self.total}', ordem=self.total
+            )
+            for i in range(2):
+                subassunto = Subassunto.objects.create(assunto=assunto, nome=f'Subassunto {i}', ordem=i)
+                mapa = MapaAssunto.objects.create(
+                    concurso=self.concurso, assunto=assunto, subassunto=subassunto, ordem=self.total * 2 + i
+                )
+                MetadadosAssunto.objects.create(mapa_assunto=mapa, dica='Dica')
+
+    def assertConsultasConstantes(self, consultas, metodo, url, dados=None):
+        for _ in range(2):
+            with self.assertNumQueries(consultas):
+                response = getattr(self.client, metodo)(url, dados, format='json')
+            self.assertLess(response.status_code, 300, response.content)
+            self._ampliar()
+
+    def test_disciplinas(self):
+        pk = self.disciplina.pk
+        self.assertConsultasConstantes(3, 'get', '/api/disciplinas/?ativa=true')
+        self.assertConsultasConstantes(4, 'get', f'/api/disciplinas/{pk}/')
+        self.assertConsultasConstantes(2, 'get', f'/api/disciplinas/{pk}/?expand=assuntos')
+        self.assertConsultasConstantes(8, 'patch', f'/api/disciplinas/{pk}/', {'ordem': 1})
+
+    def test_assuntos(self):
+        pk = Assunto.objects.first().pk
+        self.assertConsultasConstantes(2, 'get', '/api/assuntos/')
+        self.assertConsultasConstantes(1, 'get', '/api/assuntos/?expand=')
+        self.assertConsultasConstantes(2, 'get', f'/api/assuntos/{pk}/')
+        # Sem SELECT da disciplina anterior: a FK lida na carga basta (ver PaiCarregadoMixin)
+        self.assertConsultasConstantes(6, 'patch', f'/api/assuntos/{pk}/', {'ordem': 1})
+
+    def test_subassuntos(self):
+        pk = Subassunto.objects.first().pk
+        self.assertConsultasConstantes(1, 'get', '/api/subassuntos/')
+        self.assertConsultasConstantes(1, 'get', f'/api/subassuntos/{pk}/')
+
+    def test_concursos(self):
+        pk = self.concurso.pk
+        self.assertConsultasConstantes(1, 'get', '/api/concursos/')
+        # Sem cache: concurso, versão da matriz, agregado do mapa e o mapa aninhado
+        self.assertConsultasConstantes(4, 'get', f'/api/concursos/{pk}/')
+        self.assertEqual(self.client.get(f'/api/concursos/{pk}/')['X-Concurso-Cache'], 'MISS')
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/concursos/{pk}/')
+        self.assertEqual(response['X-Concurso-Cache'], 'HIT')
+        self.assertConsultasConstantes(1, 'get', f'/api/concursos/{pk}/?fields=id,nome,tipo_display')
+        self.assertConsultasConstantes(5, 'patch', f'/api/concursos/{pk}/', {'cursinho': 'Gran'})
+        self.assertConsultasConstantes(3, 'get', f'/api/concursos/{pk}/metadados/')
+
+    def test_mapas(self):
+        mapa = MapaAssunto.objects.first()
+        # Mais uma consulta: o filtro valida o concurso informado
+        self.assertConsultasConstantes(2, 'get', f'/api/mapas/?concurso={self.concurso.pk}')
+        self.assertConsultasConstantes(2, 'get', f'/api/mapas/?concurso={self.concurso.pk}&page_size=2')
+        self.assertConsultasConstantes(1, 'get', f'/api/mapas/{mapa.pk}/')
+
+        # Só a alteração de um campo indexado regrava o índice de busca (um upsert)
+        dados = {'assunto': mapa.assunto_id, 'item_edital': '3.2'}
+        with self.assertNumQueries(6):
+            self.client.patch(f'/api/mapas/{mapa.pk}/', dados, format='json')
+        self.assertConsultasConstantes(5, 'patch', f'/api/mapas/{mapa.pk}/', dados)
+
+    def test_metadados(self):
+        pk = MetadadosAssunto.objects.first().pk
+        self.assertConsultasConstantes(1, 'get', '/api/metadados/')
+        self.assertConsultasConstantes(2, 'get', f'/api/metadados/?mapa_assunto__concurso={self.concurso.pk}')
+        self.assertConsultasConstantes(1, 'get', f'/api/metadados/{pk}/')
+
+    def _linhas_de_metadados(self, **valores):
+        return [{'mapa_assunto': pk, **valores} for pk in MapaAssunto.objects.values_list('pk', flat=True)]
+
+    def test_metadados_em_lote(self):
+        # Consultas fixas: itens, metadados, bulk_create, bulk_update e a resposta
+        MetadadosAssunto.objects.filter(pk__in=MetadadosAssunto.objects.values('pk')[:2]).delete()
+        with self.assertNumQueries(8):
+            response = self.client.patch(
+                '/api/metadados/bulk/', self._linhas_de_metadados(peso_resumos=2), format='json'
+            )
+        self.assertEqual(response.json()['criados'], 2)
+
+        self._ampliar()
+        with self.assertNumQueries(7):
+            response = self.client.patch(
+                '/api/metadados/bulk/', self._linhas_de_metadados(peso_resumos=3), format='json'
+            )
+        self.assertEqual(response.json()['criados'], 0)
+        self.assertFalse(MetadadosAssunto.objects.exclude(peso_resumos=3).exists())
+
+    def test_metadados_em_lote_com_erros(self):
+        linhas = self._linhas_de_metadados(peso_questoes=2)
+        linhas[1]['peso_resumos'] = 5
+        linhas[2]['dica'] = 'x' * 501
+
+        response = self.client.patch('/api/metadados/bulk/', linhas, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['erros']), {'1', '2'})
+        self.assertIn('peso_resumos', response.json()['erros']['1'])
+        self.assertIn('dica', response.json()['erros']['2'])
+        self.assertFalse(MetadadosAssunto.objects.filter(peso_questoes=2).exists())
+
+    def test_formatos_compactos(self):
+        url = f'/api/mapas/?concurso={self.concurso.pk}'
+        linhas = self.client.get(url).json()
+
+        response = self.client.get(url, HTTP_ACCEPT='application/vnd.resumos.colunar+json')
+        self.assertEqual(response['Content-Type'], 'application/vnd.resumos.colunar+json')
+        self.assertEqual(_decodificar_colunar(response.json()), linhas)
+
+        # Detalhe não é listagem: sai em JSON normal
+        response = self.client.get(f'/api/concursos/{self.concurso.pk}/?format=colunar')
+        self.assertEqual(response.json()['sigla'], 'TRF')
+
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), linhas)
+
+        response = self.client.get(url, HTTP_ACCEPT='application/vnd.resumos.colunar+msgpack')
+        self.assertEqual(_decodificar_colunar(msgpack.unpackb(response.content)), linhas)
+
+    def test_compressao(self):
+        url = f'/api/concursos/{self.concurso.pk}/'
+        self._ampliar(20)
+        original = self.client.get(url)
+
+        for codificacao, descomprimir in (('gzip', gzip.decompress), ('br', brotli and brotli.decompress)):
+            if descomprimir is None:
+                continue
+
+            # Primeira leitura comprime e guarda a variante; a segunda vem do cache
+            for descricao in (f'"{codificacao}"', f'"{codificacao} (cache)"'):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=f'{codificacao}, identity;q=0.5')
+                self.assertEqual(response['Content-Encoding'], codificacao)
+                self.assertIn(f'desc={descricao}', response['Server-Timing'])
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(descomprimir(response.content), original.content)
+
+        # Respostas comuns são comprimidas pelo middleware
+        response = self.client.get('/api/mapas/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.client.get('/api/mapas/').json())
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0, br;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_tarefas(self):
+        self.assertConsultasConstantes(1, 'get', '/api/tarefas/')
+        self.assertConsultasConstantes(1, 'get', '/api/matriz/importacoes/')
+
+
+def _decodificar_colunar(dados):
+    """Linhas de volta a partir de codificar_colunar"""
+    colunas = {}
+    for campo, coluna in dados['colunas'].items():
+        if isinstance(coluna, list):
+            colunas[campo] = coluna
+        elif 'dicionario' in coluna:
+            colunas[campo] = [coluna['dicionario'][i] for i in coluna['indices']]
+        else:
+            valores = _decodificar_colunar(coluna)
+            for i in coluna.get('nulos', ()):
+                valores[i] = None
+            colunas[campo] = valores
+
+    return [
+        {campo: valores[i] for campo, valores in colunas.items()}
+        for i in range(dados['linhas'])
+    ]
+
+
+class MatrizSnapshotTests(TestCase):
+    """Snapshot da matriz em /api/disciplinas/ e /api/matriz/<hash>/ (MatrizSnapshotService)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        cls.disciplina = Disciplina.objects.create(nome='Direito Administrativo')
+        cls.assunto = Assunto.objects.create(disciplina=cls.disciplina, nome='Licitações')
+        cls.subassunto = Subassunto.objects.create(assunto=cls.assunto, nome='Dispensa')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _matriz(self, **headers):
+        return self.client.get('/api/disciplinas/', **headers)
+
+    def _planilha(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.title = 'Direito Penal'
+        for linha in ([], ['Assunto'], [], ['Teoria do Crime', 'Dolo']):
+            workbook.active.append(linha)
+        arquivo = io.BytesIO()
+        workbook.save(arquivo)
+        arquivo.seek(0)
+        return arquivo
+
+    def test_etag_e_304(self):
+        response = self._matriz()
+        hash_conteudo = hashlib.sha256(response.content).hexdigest()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{hash_conteudo}"')
+        self.assertEqual(response['X-Matriz-Hash'], hash_conteudo)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(response.json()[0]['assuntos'][0]['subassuntos'][0]['nome'], 'Dispensa')
+
+        # Cliente atualizado: só a versão da matriz é lida
+        for if_none_match in (f'"{hash_conteudo}"', f'"outro", W/"{hash_conteudo}"', '*'):
+            with self.assertNumQueries(1):
+                response = self._matriz(HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, 304, if_none_match)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], f'"{hash_conteudo}"')
+
+        self.assertEqual(self._matriz(HTTP_IF_NONE_MATCH='"outro"').status_code, 200)
+
+    def test_outros_formatos(self):
+        response = self._matriz()
+        self.assertIn('Accept', response['Vary'])
+        etag, arvore = response['ETag'], response.json()
+
+        formatos = [
+            ('application/msgpack', msgpack.unpackb),
+            ('application/vnd.resumos.colunar+json', lambda corpo: _decodificar_colunar(json.loads(corpo))),
+            ('application/vnd.resumos.colunar+msgpack', lambda corpo: _decodificar_colunar(msgpack.unpackb(corpo))),
+            ('application/json; indent=2', json.loads),
+        ]
+        for media_type, decodificar in formatos:
+            response = self._matriz(HTTP_ACCEPT=media_type, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, media_type)
+            self.assertEqual(response['Content-Type'].split(';')[0], media_type.split(';')[0])
+            self.assertFalse(response.has_header('ETag'), media_type)
+            self.assertEqual(decodificar(response.content), arvore, media_type)
+
+    def test_etag_fraco_da_variante_comprimida(self):
+        original = self._matriz().content
+        hash_conteudo = hashlib.sha256(original).hexdigest()
+
+        with self.settings(COMPRESSAO_TAMANHO_MINIMO=1):
+            response = self._matriz(HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['ETag'], f'W/"{hash_conteudo}"')
+            self.assertEqual(gzip.decompress(response.content), original)
+
+            # O ETag fraco devolvido com a variante também vale para o 304
+            response = self._matriz(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+            response = self.client.get(
+                f'/api/matriz/{hash_conteudo}/',
+                HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=f'W/"{hash_conteudo}"'
+            )
+            self.assertEqual(response.status_code, 304)
+
+    def test_versao_muda_com_a_matriz(self):
+        def estado():
+            return MatrizSnapshotService.versao_atual(), self._matriz()['ETag']
+
+        versao, etag = estado()
+
+        # Save sem mudança de conteúdo gera nova versão, mas o mesmo snapshot
+        response = self.client.patch(f'/api/assuntos/{self.assunto.pk}/', {'nome': 'Licitações'})
+        self.assertEqual(response.status_code, 200)
+        nova_versao, novo_etag = estado()
+        self.assertNotEqual(nova_versao, versao)
+        self.assertEqual(novo_etag, etag)
+
+        alteracoes = [
+            ('save', lambda: self.client.patch(f'/api/assuntos/{self.assunto.pk}/', {'nome': 'Contratos'})),
+            ('delete', lambda: self.client.delete(f'/api/subassuntos/{self.subassunto.pk}/')),
+            ('importação', lambda: MatrizImportService().importar_arquivo(self._planilha())),
+        ]
+        for descricao, alterar in alteracoes:
+            versao, etag = estado()
+            alterar()
+            nova_versao, novo_etag = estado()
+            self.assertNotEqual(nova_versao, versao, descricao)
+            self.assertNotEqual(novo_etag, etag, descricao)
+            self.assertEqual(self._matriz(HTTP_IF_NONE_MATCH=etag).status_code, 200, descricao)
+
+        self.assertEqual(
+            [disciplina['nome'] for disciplina in self._matriz().json()], ['Direito Administrativo', 'Direito Penal']
+        )
+
+        # Importação que não altera nada mantém a versão
+        versao = MatrizSnapshotService.versao_atual()
+        MatrizImportService().importar_arquivo(self._planilha())
+        self.assertEqual(MatrizSnapshotService.versao_atual(), versao)
+
+    def test_snapshot_imutavel(self):
+        atual = self._matriz()
+        hash_anterior = atual['X-Matriz-Hash']
+        url = f'/api/matriz/{hash_anterior}/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, atual.content)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['ETag'], f'"{hash_anterior}"')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"{hash_anterior}"').status_code, 304)
+
+        # O conteúdo de um hash não muda depois que a matriz muda
+        self.client.patch(f'/api/disciplinas/{self.disciplina.pk}/', {'nome': 'Direito Constitucional'})
+        self.assertNotEqual(self._matriz()['X-Matriz-Hash'], hash_anterior)
+        self.assertEqual(self.client.get(url).content, atual.content)
+
+        self.assertEqual(self.client.get(f'/api/matriz/{"0" * 64}/').status_code, 404)
+
+        # Fora do cache, só o snapshot da versão atual é regenerado
+        hash_atual = self._matriz()['X-Matriz-Hash']
+        cache.clear()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(f'/api/matriz/{hash_atual}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['nome'], 'Direito Constitucional')
+
+
+class ContadoresTests(TestCase):
+    """Colunas de contagem mantidas pelos sinais (ContadoresService) e reconcile_counters"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.penal = Disciplina.objects.create(nome='Direito Penal')
+        cls.civil = Disciplina.objects.create(nome='Direito Civil')
+        cls.concurso = Concurso.objects.create(nome='PF 2025', sigla='PF')
+        cls.outro_concurso = Concurso.objects.create(nome='PC 2025', sigla='PC')
+
+    def assertContadores(self, disciplinas, assuntos=None, concursos=None):
+        """Compara os contadores guardados com os esperados e com a contagem real"""
+        self.assertEqual(dict(Disciplina.objects.values_list('nome', 'total_assuntos')), disciplinas)
+        if assuntos is not None:
+            self.assertEqual(dict(Assunto.objects.values_list('nome', 'total_subassuntos')), assuntos)
+        if concursos is not None:
+            self.assertEqual(dict(Concurso.objects.values_list('sigla', 'total_assuntos_mapa')), concursos)
+        for modelo in ContadoresService.CONTADORES:
+            self.assertFalse(ContadoresService.divergentes(modelo).exists(), modelo.__name__)
+
+    def test_criar_mover_e_remover(self):
+        crimes = Assunto.objects.create(disciplina=self.penal, nome='Crimes')
+        penas = Assunto.objects.create(disciplina=self.penal, nome='Penas')
+        contratos = Assunto.objects.create(disciplina=self.civil, nome='Contratos')
+        for nome in ('Homicídio', 'Furto', 'Roubo'):
+            Subassunto.objects.create(assunto=crimes, nome=nome)
+        MapaAssunto.objects.create(concurso=self.concurso, assunto=crimes)
+        MapaAssunto.objects.create(concurso=self.concurso, assunto=penas)
+        self.assertContadores(
+            {'Direito Penal': 2, 'Direito Civil': 1},
+            {'Crimes': 3, 'Penas': 0, 'Contratos': 0},
+            {'PF': 2, 'PC': 0},
+        )
+
+        # Mudança de pai, com save completo e com update_fields
+        penas.disciplina = self.civil
+        penas.save()
+        self.assertContadores({'Direito Penal': 1, 'Direito Civil': 2})
+
+        penas.disciplina = self.penal
+        penas.save(update_fields=['disciplina'])
+        self.assertContadores({'Direito Penal': 2, 'Direito Civil': 1})
+
+        furto = Subassunto.objects.get(nome='Furto')
+        furto.assunto = contratos
+        furto.nome = 'Furto de coisa comum'
+        furto.save(update_fields=['nome'])  # FK fora de update_fields: não é gravada
+        self.assertContadores({'Direito Penal': 2, 'Direito Civil': 1}, {'Crimes': 3, 'Penas': 0, 'Contratos': 0})
+        furto.save()
+        self.assertContadores({'Direito Penal': 2, 'Direito Civil': 1}, {'Crimes': 2, 'Penas': 0, 'Contratos': 1})
+
+        # O pai anterior vem da carga do registro, sem outra consulta
+        mapa = MapaAssunto.objects.get(assunto=penas)
+        mapa.concurso = self.outro_concurso
+        with CaptureQueriesContext(connection) as consultas:
+            mapa.save()
+        self.assertFalse([q['sql'] for q in consultas if q['sql'].startswith('SELECT')])
+        self.assertContadores({'Direito Penal': 2, 'Direito Civil': 1}, concursos={'PF': 1, 'PC': 1})
+
+        # Sem a FK na carga, o pai anterior é consultado no banco
+        mapa = MapaAssunto.objects.only('pk').get(pk=mapa.pk)
+        mapa.concurso = self.concurso
+        mapa.save()
+        self.assertContadores({'Direito Penal': 2, 'Direito Civil': 1}, concursos={'PF': 2, 'PC': 0})
+        mapa.concurso = self.outro_concurso
+        mapa.save()
+        self.assertContadores({'Direito Penal': 2, 'Direito Civil': 1}, concursos={'PF': 1, 'PC': 1})
+
+        # Delete individual e de queryset
+        Subassunto.objects.get(nome='Roubo').delete()
+        self.assertContadores({'Direito Penal': 2, 'Direito Civil': 1}, {'Crimes': 1, 'Penas': 0, 'Contratos': 1})
+        MapaAssunto.objects.filter(concurso=self.concurso).delete()
+        self.assertContadores({'Direito Penal': 2, 'Direito Civil': 1}, concursos={'PF': 0, 'PC': 1})
+
+    def test_delete_em_cascata(self):
+        crimes = Assunto.objects.create(disciplina=self.penal, nome='Crimes')
+        Assunto.objects.create(disciplina=self.penal, nome='Penas')
+        contratos = Assunto.objects.create(disciplina=self.civil, nome='Contratos')
+        Subassunto.objects.create(assunto=crimes, nome='Homicídio')
+        Subassunto.objects.create(assunto=crimes, nome='Furto')
+        Subassunto.objects.create(assunto=contratos, nome='Compra e Venda')
+        MapaAssunto.objects.create(concurso=self.concurso, assunto=crimes)
+        MapaAssunto.objects.create(concurso=self.concurso, assunto=contratos)
+
+        # O assunto leva os subassuntos e os itens de mapa; a disciplina perde só um
+        crimes.delete()
+        self.assertContadores(
+            {'Direito Penal': 1, 'Direito Civil': 1}, {'Penas': 0, 'Contratos': 1}, {'PF': 1, 'PC': 0}
+        )
+
+        Disciplina.objects.filter(pk=self.civil.pk).delete()
+        self.assertContadores({'Direito Penal': 1}, {'Penas': 0}, {'PF': 0, 'PC': 0})
+
+        self.concurso.delete()
+        self.assertContadores({'Direito Penal': 1}, concursos={'PC': 0})
+
+    def test_suspender(self):
+        crimes = Assunto.objects.create(disciplina=self.penal, nome='Crimes')
+
+        with ContadoresService.suspender():
+            with ContadoresService.suspender():
+                Assunto.objects.create(disciplina=self.penal, nome='Penas')
+            Subassunto.objects.create(assunto=crimes, nome='Homicídio')
+            MapaAssunto.objects.create(concurso=self.concurso, assunto=crimes)
+            crimes.disciplina = self.civil
+            crimes.save()
+
+        self.assertEqual(
+            dict(Disciplina.objects.values_list('nome', 'total_assuntos')),
+            {'Direito Penal': 1, 'Direito Civil': 0}
+        )
+        self.assertEqual(Assunto.objects.get(pk=crimes.pk).total_subassuntos, 0)
+        self.assertEqual(Concurso.objects.get(pk=self.concurso.pk).total_assuntos_mapa, 0)
+
+        self.assertEqual(ContadoresService.recalcular(Disciplina), 2)
+        ContadoresService.recalcular(Assunto, [crimes.pk])
+        ContadoresService.recalcular(Concurso, [self.concurso.pk])
+        self.assertContadores(
+            {'Direito Penal': 1, 'Direito Civil': 1}, {'Crimes': 1, 'Penas': 0}, {'PF': 1, 'PC': 0}
+        )
+
+        # Fora de suspender, os sinais voltam a atualizar
+        Assunto.objects.create(disciplina=self.civil, nome='Contratos')
+        self.assertContadores({'Direito Penal': 1, 'Direito Civil': 2})
+
+    def test_reconcile_counters(self):
+        crimes = Assunto.objects.create(disciplina=self.penal, nome='Crimes')
+        Subassunto.objects.create(assunto=crimes, nome='Homicídio')
+        MapaAssunto.objects.create(concurso=self.concurso, assunto=crimes)
+        Disciplina.objects.filter(pk=self.penal.pk).update(total_assuntos=7)
+        Concurso.objects.filter(pk=self.concurso.pk).update(total_assuntos_mapa=0)
+
+        saida = io.StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=saida)
+        self.assertEqual(saida.getvalue().splitlines(), [
+            f'Disciplina #{self.penal.pk}: total_assuntos=7, real=1',
+            f'Concurso #{self.concurso.pk}: total_assuntos_mapa=0, real=1',
+            '2 contador(es) divergente(s) encontrados.',
+        ])
+        self.assertEqual(Disciplina.objects.get(pk=self.penal.pk).total_assuntos, 7)
+
+        saida = io.StringIO()
+        call_command('reconcile_counters', stdout=saida)
+        self.assertIn('2 contador(es) corrigido(s).', saida.getvalue())
+        self.assertContadores({'Direito Penal': 1, 'Direito Civil': 0}, {'Crimes': 1}, {'PF': 1, 'PC': 0})
+
+        saida = io.StringIO()
+        call_command('reconcile_counters', stdout=saida)
+        self.assertEqual(saida.getvalue().strip(), 'Nenhuma divergência encontrada.')
+
+
+class MapaAssuntoLoteTests(TestCase):
+    """Criação e remoção em lote de itens de mapa (MapaAssuntoLoteService)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        cls.disciplina = Disciplina.objects.create(nome='Direito Penal')
+        cls.assuntos = [
+            Assunto.objects.create(disciplina=cls.disciplina, nome=f'Assunto {i}', ordem=i)
+            for i in range(3)
+        ]
+        cls.subassunto = Subassunto.objects.create(assunto=cls.assuntos[0], nome='Subassunto')
+        cls.concurso = Concurso.objects.create(nome='PF 2025', sigla='PF')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _criar_mapas(self, quantidade, concurso=None):
+        """Itens com metadados e entrada no índice de busca"""
+        concurso = concurso or self.concurso
+        mapas = MapaAssunto.objects.bulk_create([
+            MapaAssunto(concurso=concurso, assunto=self.assuntos[i % 3], ordem=i, item_edital=f'{i}.1')
+            for i in range(quantidade)
+        ])
+        MetadadosAssunto.objects.bulk_create([MetadadosAssunto(mapa_assunto=mapa) for mapa in mapas])
+        BuscaService.reindexar_mapas(concurso_ids=[concurso.pk])
+        ContadoresService.recalcular(Concurso, [concurso.pk])
+        return mapas
+
+    def test_criar_em_lote(self):
+        assunto, outro, terceiro = self.assuntos
+        existente = MapaAssunto.objects.create(concurso=self.concurso, assunto=assunto, ordem=7)
+
+        response = self.client.post('/api/mapas/bulk/', [
+            {'concurso': self.concurso.pk, 'assunto': assunto.pk},
+            {'concurso': self.concurso.pk, 'assunto': assunto.pk, 'subassunto': self.subassunto.pk},
+            {'concurso': self.concurso.pk, 'assunto': outro.pk, 'item_edital': '2.3'},
+            {'concurso': self.concurso.pk, 'assunto': outro.pk},
+            {'concurso': self.concurso.pk, 'extra_cursinho': True, 'nome_extra': 'Revisão final'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        # Já no mapa (índice 0) e repetido dentro do próprio lote (índice 3)
+        self.assertEqual(response.json()['ignorados'], [0, 3])
+        criados = response.json()['criados']
+        self.assertEqual([item['ordem'] for item in criados], [8, 9, 10])
+        self.assertEqual(
+            [(item['assunto'], item['subassunto']) for item in criados],
+            [(assunto.pk, self.subassunto.pk), (outro.pk, None), (None, None)]
+        )
+
+        self.concurso.refresh_from_db()
+        self.assertEqual(self.concurso.total_assuntos_mapa, 4)
+        self.assertEqual(MapaAssunto.objects.get(pk=existente.pk).ordem, 7)
+        # Itens com item do edital ou nome extra entram no índice de busca
+        self.assertEqual(IndiceBusca.objects.filter(tipo='mapa').count(), 2)
+
+        # Concurso sem itens começa da ordem 1
+        vazio = Concurso.objects.create(nome='PC 2025', sigla='PC')
+        response = self.client.post('/api/mapas/bulk/', [
+            {'concurso': vazio.pk, 'assunto': terceiro.pk},
+        ], format='json')
+        self.assertEqual(response.json()['criados'][0]['ordem'], 1)
+        vazio.refresh_from_db()
+        self.assertEqual(vazio.total_assuntos_mapa, 1)
+
+    def test_criar_em_lote_com_itens_invalidos(self):
+        assunto, outro, _ = self.assuntos
+        response = self.client.post('/api/mapas/bulk/', [
+            {'concurso': self.concurso.pk, 'assunto': assunto.pk},
+            {'concurso': 999999, 'assunto': assunto.pk},
+            {'concurso': self.concurso.pk, 'assunto': 999999},
+            {'concurso': self.concurso.pk, 'assunto': outro.pk, 'subassunto': self.subassunto.pk},
+        ], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        erros = response.json()['erros']
+        self.assertEqual(set(erros), {'1', '2', '3'})
+        self.assertIn('concurso', erros['1'])
+        self.assertIn('assunto', erros['2'])
+        self.assertIn('subassunto', erros['3'])
+        # Nada é gravado quando qualquer item é inválido
+        self.assertFalse(MapaAssunto.objects.exists())
+
+        # Erros de formato são apontados pelo serializer, por item
+        response = self.client.post('/api/mapas/bulk/', [
+            {'concurso': self.concurso.pk, 'extra_cursinho': True},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nome_extra', response.json()[0])
+
+    def test_remover_com_numero_fixo_de_comandos(self):
+        outro = Concurso.objects.create(nome='PRF 2025', sigla='PRF')
+        self._criar_mapas(2, outro)
+
+        for quantidade in (1, 1000):
+            mapas = self._criar_mapas(quantidade)
+            # Savepoint, IDs (FOR UPDATE), três DELETEs pela lista de IDs, contador do concurso e release
+            with self.assertNumQueries(7):
+                removidos = MapaAssuntoLoteService().remover(self.concurso.pk, ids=[mapa.pk for mapa in mapas])
+
+            self.assertEqual(len(removidos), quantidade)
+            self.assertFalse(MapaAssunto.objects.filter(concurso=self.concurso).exists())
+            self.assertFalse(MetadadosAssunto.objects.filter(mapa_assunto__concurso=self.concurso).exists())
+            self.assertFalse(IndiceBusca.objects.filter(mapa_assunto_id__in=removidos).exists())
+            self.concurso.refresh_from_db()
+            self.assertEqual(self.concurso.total_assuntos_mapa, 0)
+
+        # Itens de outros concursos não são afetados
+        self.assertEqual(MapaAssunto.objects.filter(concurso=outro).count(), 2)
+        self.assertEqual(MetadadosAssunto.objects.filter(mapa_assunto__concurso=outro).count(), 2)
+        self.assertEqual(IndiceBusca.objects.filter(tipo='mapa').count(), 2)
+
+    def test_remover_por_assunto_e_disciplina(self):
+        mapas = self._criar_mapas(6)
+
+        response = self.client.post('/api/mapas/bulk-delete/', {
+            'concurso': self.concurso.pk, 'assuntos': [self.assuntos[0].pk]
+        }, format='json')
+        self.assertEqual(sorted(response.json()['removidos']), [mapas[0].pk, mapas[3].pk])
+
+        removidos = MapaAssuntoLoteService().remover(self.concurso.pk, disciplina_id=self.disciplina.pk)
+        self.assertEqual(len(removidos), 4)
+        self.assertEqual(MetadadosAssunto.objects.count(), 0)
+
+
+class MatrizSubstituicaoTests(TestCase):
+    """Substituição da matriz mantendo IDs (MatrizSubstituicaoService)"""
+
+    LINKS = ['https://resumos/novo', '', '', 'Dica nova']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.penal = Disciplina.objects.create(nome='Direito Penal', ordem=1)
+        cls.pessoa = Assunto.objects.create(disciplina=cls.penal, nome='Crimes contra a Pessoa', ordem=1)
+        cls.homicidio = Subassunto.objects.create(assunto=cls.pessoa, nome='Homicídio', ordem=1)
+        cls.lesao = Subassunto.objects.create(assunto=cls.pessoa, nome='Lesão Corporal', ordem=2)
+        cls.teoria = Assunto.objects.create(disciplina=cls.penal, nome='Teoria do Crime', ordem=2)
+        cls.civil = Disciplina.objects.create(nome='Direito Civil', ordem=2)
+        cls.contratos = Assunto.objects.create(disciplina=cls.civil, nome='Contratos', ordem=1)
+
+        cls.concurso = Concurso.objects.create(nome='PF 2025', sigla='PF')
+        cls.mapas = {}
+        for ordem, (chave, assunto, subassunto) in enumerate([
+            ('pessoa', cls.pessoa, None),
+            ('homicidio', cls.pessoa, cls.homicidio),
+            ('lesao', cls.pessoa, cls.lesao),
+            ('teoria', cls.teoria, None),
+            ('contratos', cls.contratos, None),
+        ], start=1):
+            mapa = MapaAssunto.objects.create(
+                concurso=cls.concurso, assunto=assunto, subassunto=subassunto,
+                ordem=ordem, item_edital=f'{ordem}.1'
+            )
+            MetadadosAssunto.objects.create(mapa_assunto=mapa, link_pdf=f'https://pdf/{ordem}')
+            cls.mapas[chave] = mapa
+
+    def _arquivo(self):
+        """Mantém Crimes contra a Pessoa e Homicídio, renomeia Teoria do Crime e troca as disciplinas"""
+        return {
+            'Direito Penal': {
+                'Crimes contra a Pessoa': [1, list(self.LINKS), {'Homicídio': 1, 'Infanticídio': 2}],
+                'Teoria Geral do Crime': [2, ['', '', '', ''], {}],
+            },
+            'Direito Constitucional': {
+                'Controle de Constitucionalidade': [1, ['', '', '', ''], {'ADI': 1}],
+            },
+        }
+
+    def _estado(self):
+        return {
+            'disciplinas': list(Disciplina.objects.order_by('pk').values_list()),
+            'assuntos': list(Assunto.objects.order_by('pk').values_list()),
+            'subassuntos': list(Subassunto.objects.order_by('pk').values_list()),
+            'mapas': list(MapaAssunto.objects.order_by('pk').values_list()),
+            'metadados': list(MetadadosAssunto.objects.order_by('pk').values_list()),
+            'indice': list(IndiceBusca.objects.order_by('pk').values_list()),
+            'concursos': list(Concurso.objects.order_by('pk').values_list()),
+            'versao': MatrizSnapshotService.versao_atual(),
+        }
+
+    def test_substituir(self):
+        versao = MatrizSnapshotService.versao_atual()
+
+        estatisticas = MatrizSubstituicaoService().substituir(self._arquivo())
+
+        self.assertEqual(estatisticas, {
+            'mapas_removidos': 3,
+            'subassuntos_removidos': 1,
+            'assuntos_removidos': 2,
+            'disciplinas_removidas': 1,
+            'disciplinas_atualizadas': 0,
+            'disciplinas_criadas': 1,
+            'assuntos_atualizados': 1,
+            'assuntos_criados': 2,
+            'subassuntos_atualizados': 0,
+            'subassuntos_criados': 2,
+        })
+
+        # Itens com a mesma chave natural mantêm o ID; o renomeado é um item novo
+        self.assertEqual(
+            list(Disciplina.objects.order_by('ordem').values_list('pk', 'nome')),
+            [(self.penal.pk, 'Direito Penal'), (Disciplina.objects.get(nome='Direito Constitucional').pk,
+                                                 'Direito Constitucional')]
+        )
+        pessoa = Assunto.objects.get(pk=self.pessoa.pk)
+        self.assertEqual((pessoa.link_resumos, pessoa.dica), ('https://resumos/novo', 'Dica nova'))
+        self.assertEqual(Subassunto.objects.get(nome='Homicídio').pk, self.homicidio.pk)
+        self.assertFalse(Assunto.objects.filter(pk__in=[self.teoria.pk, self.contratos.pk]).exists())
+        self.assertTrue(Assunto.objects.filter(disciplina=self.penal, nome='Teoria Geral do Crime').exists())
+        self.assertFalse(Subassunto.objects.filter(pk=self.lesao.pk).exists())
+
+        # Mapas (e metadados) dos itens removidos saem junto
+        mantidos = [self.mapas['pessoa'].pk, self.mapas['homicidio'].pk]
+        self.assertEqual(sorted(MapaAssunto.objects.values_list('pk', flat=True)), mantidos)
+        self.assertEqual(sorted(MetadadosAssunto.objects.values_list('mapa_assunto_id', flat=True)), mantidos)
+
+        # Contadores
+        self.assertEqual(
+            dict(Disciplina.objects.values_list('nome', 'total_assuntos')),
+            {'Direito Penal': 2, 'Direito Constitucional': 1}
+        )
+        self.assertEqual(
+            dict(Assunto.objects.values_list('nome', 'total_subassuntos')),
+            {'Crimes contra a Pessoa': 2, 'Teoria Geral do Crime': 0, 'Controle de Constitucionalidade': 1}
+        )
+        self.assertEqual(Concurso.objects.get(pk=self.concurso.pk).total_assuntos_mapa, 2)
+
+        # Índice de busca
+        textos = set(IndiceBusca.objects.exclude(tipo='mapa').values_list('tipo', 'texto'))
+        self.assertEqual(textos, {
+            ('disciplina', 'direito penal'),
+            ('disciplina', 'direito constitucional'),
+            ('assunto', 'crimes contra a pessoa'),
+            ('assunto', 'teoria geral do crime'),
+            ('assunto', 'controle de constitucionalidade'),
+            ('subassunto', 'homicidio'),
+            ('subassunto', 'infanticidio'),
+            ('subassunto', 'adi'),
+        })
+        self.assertEqual(
+            sorted(IndiceBusca.objects.filter(tipo='mapa').values_list('mapa_assunto_id', flat=True)), mantidos
+        )
+
+        self.assertNotEqual(MatrizSnapshotService.versao_atual(), versao)
+
+        # Substituir de novo pelo mesmo conteúdo não altera nenhuma linha
+        estado = self._estado()
+        estatisticas = MatrizSubstituicaoService().substituir(self._arquivo())
+        self.assertEqual(set(estatisticas.values()), {0})
+        for chave in ('disciplinas', 'assuntos', 'subassuntos', 'mapas', 'metadados', 'indice', 'concursos'):
+            self.assertEqual(self._estado()[chave], estado[chave], chave)
+
+    def test_falha_na_troca_nao_altera_a_matriz(self):
+        estado = self._estado()
+
+        # Falha depois de _trocar já ter aplicado as mudanças, na mesma transação
+        with patch.object(ContadoresService, 'recalcular', side_effect=RuntimeError('falha')):
+            with self.assertRaises(RuntimeError):
+                MatrizSubstituicaoService().substituir(self._arquivo())
+
+        self.assertEqual(self._estado(), estado)
+
+        # As tabelas temporárias foram removidas
+        with connection.cursor() as cursor, self.assertRaises(DatabaseError), transaction.atomic():
+            cursor.execute(f'SELECT 1 FROM {MatrizSubstituicaoService.STAGING_DISCIPLINAS}')
+
+    def test_indice_sincronizado_depois_da_troca(self):
+        reindexar_matriz = BuscaService.reindexar_matriz
+        durante_a_troca = []
+
+        def reindexar():
+            durante_a_troca.append(ContadoresService.suspenso())
+            raise RuntimeError('falha')
+
+        with patch.object(BuscaService, 'reindexar_matriz', side_effect=reindexar):
+            with self.assertRaises(RuntimeError):
+                MatrizSubstituicaoService().substituir(self._arquivo())
+        self.assertEqual(durante_a_troca, [False])
+
+        # A troca foi mantida; o índice só perdeu os itens removidos e ainda não tem os novos
+        self.assertTrue(Disciplina.objects.filter(nome='Direito Constitucional').exists())
+        self.assertEqual(Concurso.objects.get(pk=self.concurso.pk).total_assuntos_mapa, 2)
+        textos = set(IndiceBusca.objects.filter(tipo='assunto').values_list('texto', flat=True))
+        self.assertEqual(textos, {'crimes contra a pessoa'})
+
+        reindexar_matriz()
+        textos = set(IndiceBusca.objects.filter(tipo='assunto').values_list('texto', flat=True))
+        self.assertEqual(textos, {'crimes contra a pessoa', 'teoria geral do crime', 'controle de constitucionalidade'})
+
+
+class ConcursoDuplicacaoTests(TestCase):
+    """Duplicação de concursos (ConcursoDuplicacaoService) e sua tarefa em segundo plano"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        disciplina = Disciplina.objects.create(nome='Direito Constitucional')
+        controle = Assunto.objects.create(disciplina=disciplina, nome='Controle de Constitucionalidade')
+        direitos = Assunto.objects.create(disciplina=disciplina, nome='Direitos Fundamentais')
+        adi = Subassunto.objects.create(assunto=controle, nome='ADI')
+
+        cls.concurso = Concurso.objects.create(nome='STF 2025', sigla='STF', tipo='Analista', ordem=4)
+        itens = [
+            dict(assunto=controle, ordem=1, item_edital='1.1'),
+            dict(assunto=controle, subassunto=adi, ordem=2, item_edital='1.2'),
+            # Repetidos em todas as colunas copiadas (subassunto nulo não entra no unique)
+            dict(assunto=direitos, ordem=3),
+            dict(assunto=direitos, ordem=3),
+            dict(extra_cursinho=True, nome_extra='Revisão', ordem=4),
+            dict(extra_cursinho=True, nome_extra='Revisão', ordem=4),
+            dict(assunto=direitos, ordem=5, item_edital='2.1'),
+        ]
+        for indice, campos in enumerate(itens):
+            mapa = MapaAssunto.objects.create(concurso=cls.concurso, **campos)
+            if indice == 6:
+                continue
+            MetadadosAssunto.objects.create(
+                mapa_assunto=mapa,
+                paginas_minutos=10 * indice,
+                minutos_regular=decimal.Decimal(f'{indice}.50'),
+                dica=f'Dica {indice}',
+                link_pdf=f'https://pdf/{indice}',
+                suplementar=indice % 2 == 0,
+            )
+
+    def _linhas(self, concurso):
+        campos_metadados = [
+            field.attname for field in MetadadosAssunto._meta.concrete_fields
+            if field.attname not in ('id', 'mapa_assunto_id', 'created_at', 'updated_at')
+        ]
+        linhas = []
+        for mapa in MapaAssunto.objects.filter(concurso=concurso).order_by('pk'):
+            metadados = MetadadosAssunto.objects.filter(mapa_assunto=mapa).values(*campos_metadados).first()
+            campos_mapa = {campo: getattr(mapa, campo) for campo in ConcursoDuplicacaoService.CAMPOS_MAPA}
+            linhas.append((campos_mapa, metadados))
+        return linhas
+
+    def assertCopiaFiel(self, copia):
+        self.assertEqual(
+            [getattr(copia, campo) for campo in ('sigla', 'tipo', 'ordem', 'total_assuntos_mapa')],
+            ['STF', 'Analista', 4, 7]
+        )
+        originais = self._linhas(self.concurso)
+        copias = self._linhas(copia)
+        self.assertEqual(len(copias), len(originais))
+        for indice, (original, replica) in enumerate(zip(originais, copias)):
+            self.assertEqual(replica, original, f'item {indice}')
+        self.assertEqual(
+            IndiceBusca.objects.filter(tipo='mapa', mapa_assunto__concurso=copia).count(),
+            IndiceBusca.objects.filter(tipo='mapa', mapa_assunto__concurso=self.concurso).count(),
+        )
+
+    def test_duplicar(self):
+        copia = ConcursoDuplicacaoService().duplicar(self.concurso, 'STF 2026', self.admin)
+
+        self.assertEqual((copia.nome, copia.criado_por), ('STF 2026', self.admin))
+        self.assertCopiaFiel(copia)
+
+    def test_tarefas_interrompidas(self):
+        agora = timezone.now()
+        parada, ativa = [
+            Tarefa.objects.create(tipo='duplicar_concurso', parametros={}, criado_por=self.admin) for _ in range(2)
+        ]
+        Tarefa.objects.filter(pk=parada.pk).update(
+            estado='executando', iniciada_em=agora - datetime.timedelta(hours=3),
+            updated_at=agora - datetime.timedelta(hours=2)
+        )
+        # Iniciada há muito tempo, mas com progresso recente
+        Tarefa.objects.filter(pk=ativa.pk).update(
+            estado='executando', iniciada_em=agora - datetime.timedelta(hours=3), updated_at=agora
+        )
+
+        saida = io.StringIO()
+        with self.settings(TAREFAS_TEMPO_LIMITE=60 * 60):
+            call_command('processar_tarefas', stdout=saida)
+        self.assertIn('1 tarefa(s) interrompida(s)', saida.getvalue())
+
+        parada.refresh_from_db()
+        self.assertEqual(parada.estado, 'erro')
+        self.assertIn('interrompida', parada.erro)
+        self.assertIsNotNone(parada.concluida_em)
+        self.assertEqual(Tarefa.objects.get(pk=ativa.pk).estado, 'executando')
+        self.assertFalse(TarefaService.executar(parada.pk))
+
+    def test_duplicar_com_bulk_create(self):
+        """Caminho dos backends sem INSERT ... SELECT"""
+        with patch.object(
+            ConcursoDuplicacaoService, '_copiar_com_insert_select',
+            ConcursoDuplicacaoService._copiar_com_bulk_create
+        ):
+            copia = ConcursoDuplicacaoService().duplicar(self.concurso, 'STF 2026')
+
+        self.assertCopiaFiel(copia)
+
+    def test_duplicar_em_segundo_plano(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        with self.settings(TAREFAS_EM_SEGUNDO_PLANO=False):
+            response = client.post(
+                f'/api/concursos/{self.concurso.pk}/duplicate/',
+                {'novo_nome': 'STF 2026', 'assincrono': True}, format='json'
+            )
+        self.assertEqual(response.status_code, 202)
+        tarefa = response.json()
+        self.assertEqual((tarefa['tipo'], tarefa['estado']), ('duplicar_concurso', 'pendente'))
+        self.assertFalse(Concurso.objects.filter(nome='STF 2026').exists())
+
+        self.assertTrue(TarefaService.executar(tarefa['id']))
+        self.assertFalse(TarefaService.executar(tarefa['id']))
+
+        tarefa = client.get(f'/api/tarefas/{tarefa["id"]}/').json()
+        copia = Concurso.objects.get(nome='STF 2026')
+        self.assertEqual(tarefa['estado'], 'concluida')
+        self.assertEqual(tarefa['resultado'], {'concurso': copia.pk, 'total_assuntos_mapa': 7})
+        self.assertEqual(copia.criado_por, self.admin)
+        self.assertCopiaFiel(copia)
+
+
+class MatrizImportacaoTests(TestCase):
+    """Importação da matriz a partir da planilha (MatrizImportService)"""
+
+    CABECALHO = ['Assunto', 'Subassunto 1', 'Subassunto 2', 'Resumos', 'Cebraspe', None, 'FGV', 'Dica']
+
+    # Linhas a partir da linha 4 de cada aba (ver MatrizImportService)
+    ABAS = {
+        'Direito Penal': [
+            ['Teoria do Crime', 'Dolo', 'Culpa', 'https://resumos/teoria', None, None, None, 'Dica 1'],
+            [],
+            ['Assunto', 'Subassunto 1'],
+            [None, 'Sem pai'],
+            ['  Teoria do Crime  ', 'Dolo', 'Erro de Tipo', None, 'https://cebraspe/teoria', None,
+             'https://fgv/teoria', 'Outra dica'],
+            ['Penas'],
+        ],
+        'Direito Civil': [
+            ['Contratos', 'Compra e Venda', None, 'https://resumos/novo', None, None, None, 'Dica contratos'],
+            ['Obrigações'],
+        ],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        civil = Disciplina.objects.create(nome='Direito Civil', ordem=1)
+        Assunto.objects.create(disciplina=civil, nome='Contratos', ordem=1, link_resumos='https://resumos/antigo')
+
+    def _planilha(self, abas=None):
+        workbook = openpyxl.Workbook()
+        workbook.remove(workbook.active)
+        for nome, linhas in (abas or self.ABAS).items():
+            sheet = workbook.create_sheet(nome)
+            for linha in ([], self.CABECALHO, [], *linhas):
+                sheet.append(linha)
+        arquivo = io.BytesIO()
+        arquivo.name = 'matriz.xlsx'
+        workbook.save(arquivo)
+        arquivo.seek(0)
+        return arquivo
+
+    def _planilha_em_disco(self, abas=None):
+        with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as arquivo:
+            arquivo.write(self._planilha(abas).getvalue())
+        self.addCleanup(os.remove, arquivo.name)
+        return arquivo.name
+
+    def _matriz(self):
+        return {
+            'disciplinas': list(Disciplina.objects.order_by('nome').values_list('nome', 'ordem', 'total_assuntos')),
+            'assuntos': list(Assunto.objects.order_by('disciplina__nome', 'nome').values_list(
+                'disciplina__nome', 'nome', 'ordem', 'link_resumos', 'link_questoes_cebraspe',
+                'link_questoes_fgv', 'dica', 'total_subassuntos'
+            )),
+            'subassuntos': list(Subassunto.objects.order_by('assunto__nome', 'nome').values_list(
+                'assunto__nome', 'nome', 'ordem'
+            )),
+        }
+
+    def test_mesmo_resultado_da_importacao_linha_a_linha(self):
+        """Resultado da importação anterior (get_or_create por linha) para a mesma planilha"""
+        resultado = MatrizImportService().importar_arquivo(self._planilha())
+
+        self.assertEqual(
+            {chave: resultado[chave] for chave in ('sucesso', 'estatisticas', 'erros', 'avisos')},
+            {
+                'sucesso': True,
+                'estatisticas': {
+                    'disciplinas_criadas': 1,
+                    'assuntos_criados': 3,
+                    'subassuntos_criados': 4,
+                    'linhas_processadas': 8,
+                    'linhas_ignoradas': 2,
+                },
+                'erros': [],
+                'avisos': ["Linha 7 em 'Direito Penal': Subassunto sem assunto pai"],
+            }
+        )
+        # Links já preenchidos são mantidos; repetições só completam os vazios
+        self.assertEqual(self._matriz(), {
+            'disciplinas': [('Direito Civil', 1, 2), ('Direito Penal', 1, 2)],
+            'assuntos': [
+                ('Direito Civil', 'Contratos', 1, 'https://resumos/antigo', '', '', 'Dica contratos', 1),
+                ('Direito Civil', 'Obrigações', 2, '', '', '', '', 0),
+                ('Direito Penal', 'Penas', 3, '', '', '', '', 0),
+                ('Direito Penal', 'Teoria do Crime', 1, 'https://resumos/teoria', 'https://cebraspe/teoria',
+                 'https://fgv/teoria', 'Dica 1', 3),
+            ],
+            'subassuntos': [
+                ('Contratos', 'Compra e Venda', 1),
+                ('Teoria do Crime', 'Culpa', 2),
+                ('Teoria do Crime', 'Dolo', 1),
+                ('Teoria do Crime', 'Erro de Tipo', 2),
+            ],
+        })
+        self.assertEqual(
+            set(IndiceBusca.objects.filter(tipo='subassunto').values_list('texto', flat=True)),
+            {'compra e venda', 'culpa', 'dolo', 'erro de tipo'}
+        )
+
+    def test_simular_nao_grava(self):
+        admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        civil = Disciplina.objects.get(nome='Direito Civil')
+        familia = Assunto.objects.create(disciplina=civil, nome='Família', ordem=3)
+        concurso = Concurso.objects.create(nome='TJSP 2025', sigla='TJSP')
+        MapaAssunto.objects.create(concurso=concurso, assunto=familia, ordem=1)
+
+        def tabelas():
+            return [
+                list(modelo.objects.order_by('pk').values_list())
+                for modelo in (Disciplina, Assunto, Subassunto, MapaAssunto, IndiceBusca, ImportacaoMatriz,
+                               MatrizVersao)
+            ]
+
+        antes = tabelas()
+        respostas = {}
+        for modo in ('', 'limpar_existente', 'substituir'):
+            dados = {'arquivo': self._planilha(), 'simular': True}
+            if modo:
+                dados[modo] = True
+            with CaptureQueriesContext(connection) as consultas:
+                response = client.post('/api/matriz/importar/', dados, format='multipart')
+            self.assertEqual(response.status_code, 200, response.content)
+            escritas = [q['sql'] for q in consultas if not q['sql'].lstrip().upper().startswith('SELECT')]
+            self.assertEqual(escritas, [], modo)
+            respostas[modo] = response.json()
+
+        self.assertEqual(tabelas(), antes)
+
+        diferencas = respostas['']['diferencas']
+        self.assertEqual(diferencas['disciplinas']['novas'], ['Direito Penal'])
+        self.assertEqual(diferencas['assuntos']['removidos'], [{'disciplina': 'Direito Civil', 'assunto': 'Família'}])
+        # Sem substituir, links já preenchidos não mudam
+        self.assertEqual([item['campo'] for item in diferencas['links_alterados']], ['dica'])
+        self.assertEqual(respostas['limpar_existente']['diferencas']['mapas']['removidos'], 1)
+        self.assertEqual(respostas['substituir']['diferencas']['mapas']['orfaos'], [
+            {'concurso_id': concurso.pk, 'concurso': 'TJSP 2025', 'sigla': 'TJSP', 'itens': 1}
+        ])
+
+        # A simulação prevê as estatísticas da importação
+        resultado = MatrizImportService().importar_arquivo(self._planilha())
+        self.assertEqual(respostas['']['estatisticas'], resultado['estatisticas'])
+        self.assertEqual(respostas['']['avisos'], resultado['avisos'])
+
+
+    def test_leitura_em_paralelo(self):
+        abas = dict(self.ABAS)
+        for indice in range(MatrizImportService.MINIMO_ABAS_PARALELO):
+            abas[f'Disciplina {indice}'] = [
+                [f'Assunto {indice}.{linha}', f'Sub {linha}', None, f'https://resumos/{indice}/{linha}']
+                for linha in range(1, 30)
+            ] + [[], [None, f'Sem pai {indice}']]
+        caminho = self._planilha_em_disco(abas)
+
+        def ler(quantidade):
+            progresso = []
+            service = MatrizImportService(ao_progredir=progresso.append)
+            service.processos = quantidade
+            lidas = service.ler_arquivo(caminho)
+            return lidas, service.estatisticas, service.avisos, progresso[-1]
+
+        serial = ler(1)
+
+        # Arquivo pequeno: mesmo com processos disponíveis, a leitura é serial
+        with patch.object(processos, 'executar') as executar:
+            self.assertEqual(ler(2), serial)
+        executar.assert_not_called()
+
+        with patch.object(MatrizImportService, 'MINIMO_BYTES_PARALELO', os.path.getsize(caminho)), \
+                patch.object(processos, 'executar', wraps=processos.executar) as executar:
+            paralelo = ler(2)
+        # Um bloco por processo: cada filho abre o arquivo uma vez
+        self.assertEqual(len(executar.call_args.args[1]), 2)
+
+        self.assertEqual([aba['nome'] for aba in paralelo[0]], list(abas))
+        self.assertEqual(paralelo, serial)
+        self.assertEqual(serial[3]['linhas_processadas'], serial[1]['linhas_processadas'])
+
+
+    def test_abas_inalteradas_sao_ignoradas(self):
+        planilha = self._planilha().getvalue()
+        MatrizImportService().importar_arquivo(io.BytesIO(planilha))
+        matriz = self._matriz()
+
+        # Arquivo idêntico: nem é lido (só a última importação e o estado das disciplinas)
+        with self.assertNumQueries(2):
+            resultado = MatrizImportService().importar_arquivo(io.BytesIO(planilha))
+        self.assertTrue(resultado['arquivo_inalterado'])
+        self.assertEqual(resultado['abas_ignoradas'], ['Direito Penal', 'Direito Civil'])
+        self.assertEqual(resultado['estatisticas']['linhas_processadas'], 0)
+
+        # Só a aba alterada é gravada
+        abas = dict(self.ABAS, **{'Direito Civil': [*self.ABAS['Direito Civil'], ['Sucessões']]})
+        resultado = MatrizImportService().importar_arquivo(self._planilha(abas))
+        self.assertFalse(resultado['arquivo_inalterado'])
+        self.assertEqual(resultado['abas_ignoradas'], ['Direito Penal'])
+        self.assertEqual(resultado['estatisticas']['assuntos_criados'], 1)
+        self.assertEqual(self._matriz()['assuntos'][:4], [
+            *matriz['assuntos'][:2], ('Direito Civil', 'Sucessões', 3, '', '', '', '', 0), matriz['assuntos'][2]
+        ])
+
+        # Aba igual, mas disciplina alterada no banco desde a última importação
+        Assunto.objects.filter(nome='Penas').delete()
+        resultado = MatrizImportService().importar_arquivo(self._planilha(abas))
+        self.assertEqual(resultado['abas_ignoradas'], ['Direito Civil'])
+        self.assertEqual(resultado['estatisticas']['assuntos_criados'], 1)
+        self.assertTrue(Assunto.objects.filter(nome='Penas').exists())
+
+        # limpar_existente sempre grava tudo
+        resultado = MatrizImportService().importar_arquivo(self._planilha(abas), limpar_existente=True)
+        self.assertEqual(resultado['abas_ignoradas'], [])
+        self.assertEqual(resultado['estatisticas']['assuntos_criados'], 5)
+
+
+    def test_importacao_em_segundo_plano(self):
+        admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        aluno = User.objects.create_user('aluno@exemplo.com', 'senha')
+        client = APIClient()
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, diretorio)
+
+        with self.settings(TAREFAS_EM_SEGUNDO_PLANO=False, IMPORTACOES_DIR=diretorio, IMPORTACAO_MAX_PROCESSOS=1):
+            client.force_authenticate(aluno)
+            response = client.post('/api/matriz/importacoes/', {'arquivo': self._planilha()}, format='multipart')
+            self.assertEqual(response.status_code, 403)
+
+            client.force_authenticate(admin)
+            response = client.post('/api/matriz/importacoes/', {'arquivo': self._planilha()}, format='multipart')
+            self.assertEqual(response.status_code, 202, response.content)
+            tarefa = response.json()
+            self.assertEqual((tarefa['tipo'], tarefa['estado']), ('importar_matriz', 'pendente'))
+            self.assertEqual(tarefa['parametros']['nome_original'], 'matriz.xlsx')
+            self.assertEqual(os.listdir(diretorio), [tarefa['parametros']['arquivo']])
+
+            url = f'/api/matriz/importacoes/{tarefa["id"]}/'
+            self.assertEqual(client.get(url).json()['estado'], 'pendente')
+            client.force_authenticate(aluno)
+            self.assertEqual(client.get(url).status_code, 404)
+            self.assertEqual(client.get('/api/tarefas/').json(), [])
+            client.force_authenticate(admin)
+
+            # Estado da tarefa a cada progresso informado
+            andamento = []
+            atualizar_progresso = TarefaService.atualizar_progresso
+
+            def registrar(tarefa_em_execucao, progresso):
+                atualizar_progresso(tarefa_em_execucao, progresso)
+                andamento.append((client.get(url).json()['estado'], progresso['etapa'], progresso['abas']))
+
+            with patch.object(TarefaService, 'atualizar_progresso', registrar), \
+                    patch.object(MatrizImportService, 'INTERVALO_PROGRESSO', 2):
+                self.assertTrue(TarefaService.executar(tarefa['id']))
+
+        self.assertEqual({estado for estado, _, _ in andamento}, {'executando'})
+        self.assertEqual([etapa for _, etapa, _ in andamento if etapa != 'leitura'], ['gravacao', 'concluida'])
+        # Na leitura serial, o progresso avança durante cada aba
+        self.assertEqual(
+            [abas['Direito Penal'] for _, etapa, abas in andamento if etapa == 'leitura'],
+            [0, 2, 4, 6, 6, 6, 6]
+        )
+
+        tarefa = client.get(url).json()
+        self.assertEqual(tarefa['estado'], 'concluida')
+        self.assertEqual(tarefa['progresso']['etapa'], 'concluida')
+        self.assertEqual(tarefa['progresso']['linhas_processadas'], 8)
+        self.assertEqual(tarefa['resultado']['estatisticas']['assuntos_criados'], 3)
+        self.assertIsNotNone(tarefa['concluida_em'])
+        self.assertTrue(Assunto.objects.filter(nome='Teoria do Crime').exists())
+        # A planilha guardada é removida ao final
+        self.assertEqual(os.listdir(diretorio), [])
+        self.assertFalse(TarefaService.executar(tarefa['id']))
+
+    def test_importacao_em_segundo_plano_com_erro(self):
+        admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, diretorio)
+        arquivo = io.BytesIO(b'nao e uma planilha')
+        arquivo.name = 'matriz.xlsx'
+
+        with self.settings(TAREFAS_EM_SEGUNDO_PLANO=False, IMPORTACOES_DIR=diretorio):
+            tarefa = client.post('/api/matriz/importacoes/', {'arquivo': arquivo}, format='multipart').json()
+            self.assertTrue(TarefaService.executar(tarefa['id']))
+
+        tarefa = client.get(f'/api/matriz/importacoes/{tarefa["id"]}/').json()
+        self.assertEqual(tarefa['estado'], 'erro')
+        self.assertTrue(tarefa['erro'].startswith('Erro ao abrir arquivo Excel'), tarefa['erro'])
+        self.assertIsNone(tarefa['resultado'])
+        self.assertEqual(os.listdir(diretorio), [])
+        self.assertEqual(
+            [t['id'] for t in client.get('/api/tarefas/', {'estado': 'erro'}).json()], [tarefa['id']]
+        )
+
+
+
+class ExportacaoTests(TestCase):
+    """Exportação Tutory: individual, em lote e cache das planilhas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        cls.aluno = User.objects.create_user('aluno@exemplo.com', 'senha')
+        disciplina = Disciplina.objects.create(nome='Direito Constitucional')
+        cls.assunto = Assunto.objects.create(
+            disciplina=disciplina, nome='Controle de Constitucionalidade', link_resumos='https://exemplo.com/r'
+        )
+        cls.subassunto = Subassunto.objects.create(assunto=cls.assunto, nome='ADI')
+        cls.concursos = [
+            Concurso.objects.create(nome=f'Concurso {i}', sigla=f'C{i}', criado_por=cls.admin)
+            for i in range(3)
+        ]
+        for concurso in cls.concursos:
+            mapa = MapaAssunto.objects.create(
+                concurso=concurso, assunto=cls.assunto, subassunto=cls.subassunto, ordem=1, item_edital='1.1'
+            )
+            MetadadosAssunto.objects.create(
+                mapa_assunto=mapa, minutos_regular='25.00', link_pdf='https://exemplo.com/material.pdf'
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        ExportacaoCacheService.cache().limpar()
+
+    def _linha_de_referencia(self, mapa):
+        """Linha como montada pela exportação célula a célula, com o link de estudo dos campos separados"""
+        metadados = getattr(mapa, 'metadados', None)
+        assunto = mapa.assunto
+        if mapa.extra_cursinho:
+            nome = mapa.nome_extra
+        elif mapa.subassunto:
+            nome = f'{assunto.nome} - {mapa.subassunto.nome}'
+        else:
+            nome = assunto.nome if assunto else ''
+        if metadados is None:
+            return [assunto.disciplina.nome if assunto else '', nome,
+                    0, 0, 0, 0, '', '', '', '', mapa.ordem, 1, 1, 1, 0, '', '', '', 0]
+        return [
+            assunto.disciplina.nome if assunto else '',
+            nome,
+            metadados.paginas_minutos,
+            float(metadados.minutos_expresso),
+            float(metadados.minutos_regular),
+            float(metadados.minutos_calma),
+            metadados.dica or '',
+            metadados.dica_revisoes or '',
+            metadados.dica_questoes or '',
+            metadados.referencia or '',
+            mapa.ordem,
+            metadados.peso_resumos,
+            metadados.peso_revisoes,
+            metadados.peso_questoes,
+            metadados.numero_questoes,
+            metadados.link_estrategia or metadados.link_direcao or metadados.link_pdf or metadados.link_video or '',
+            metadados.link_resumo or '',
+            metadados.link_questoes or '',
+            1 if metadados.suplementar else 0,
+        ]
+
+    def test_exportar_mesmas_linhas(self):
+        self.client.force_authenticate(self.admin)
+        concurso = Concurso.objects.create(nome='TRF 2025', sigla='TRF')
+        outro = Assunto.objects.create(disciplina=self.assunto.disciplina, nome='Poder Constituinte')
+        # (campos do item, metadados ou None); o link de estudo é o primeiro entre estratégia, direção, PDF e vídeo
+        itens = [
+            (dict(assunto=self.assunto, subassunto=self.subassunto, ordem=3),
+             dict(paginas_minutos=40, minutos_expresso='10.50', minutos_regular='20.25', minutos_calma='30.00',
+                  dica='Ler a lei', referencia='CF art. 102', peso_resumos=3, numero_questoes=12,
+                  link_video='https://video', link_resumo='https://resumo', suplementar=True)),
+            (dict(assunto=self.assunto, ordem=1),
+             dict(link_pdf='https://pdf', link_video='https://video', link_questoes='https://questoes')),
+            (dict(extra_cursinho=True, nome_extra='Revisão geral', ordem=2),
+             dict(link_estrategia='https://estrategia', link_direcao='https://direcao', dica_revisoes='Revisar')),
+            (dict(assunto=outro, ordem=4), None),
+            (dict(assunto=outro, subassunto=None, item_edital='2.1', ordem=5),
+             dict(link_direcao='https://direcao', link_pdf='https://pdf', dica_questoes='Só FGV')),
+        ]
+        for campos, metadados in itens:
+            mapa = MapaAssunto.objects.create(concurso=concurso, **campos)
+            if metadados is not None:
+                MetadadosAssunto.objects.create(mapa_assunto=mapa, **metadados)
+
+        esperado = [
+            self._linha_de_referencia(mapa)
+            for mapa in MapaAssunto.objects.filter(concurso=concurso).order_by('ordem')
+        ]
+        self.assertEqual(
+            [linha[15] for linha in esperado],
+            ['https://pdf', 'https://estrategia', 'https://video', '', 'https://direcao']
+        )
+
+        self.assertEqual(list(ExportacaoTutoryService().linhas(concurso.pk)), esperado)
+        self.assertEqual(
+            [(pk, list(linhas)) for pk, linhas in ExportacaoTutoryService().linhas_por_concurso([concurso.pk])],
+            [(concurso.pk, esperado)]
+        )
+
+        response = self.client.get(f'/api/concursos/{concurso.pk}/exportar/')
+        self.assertEqual(response.status_code, 200)
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        sheet = workbook['TRF']
+        linhas = [['' if valor is None else valor for valor in linha] for linha in sheet.iter_rows(values_only=True)]
+        workbook.close()
+        self.assertEqual(linhas[0], ExportacaoTutoryService.CABECALHOS)
+        self.assertEqual(linhas[1:], esperado)
+
+    def test_impressao_digital_acompanha_o_conteudo(self):
+        self.client.force_authenticate(self.admin)
+        concurso = self.concursos[0]
+
+        def impressoes():
+            return [
+                ExportacaoCacheService.impressao_digital(Concurso.objects.get(pk=c.pk)) for c in self.concursos
+            ]
+
+        def exportar():
+            response = self.client.get(f'/api/concursos/{concurso.pk}/exportar/')
+            conteudo = b''.join(response.streaming_content)
+            return response['X-Exportacao-Cache'], conteudo
+
+        self.assertEqual(exportar()[0], 'MISS')
+        self.assertEqual(exportar()[0], 'HIT')
+        self.assertEqual(impressoes(), impressoes())
+
+        mapa = MapaAssunto.objects.get(concurso=concurso)
+        metadados_removidos = MetadadosAssunto.objects.get(mapa_assunto__concurso=self.concursos[1])
+        alteracoes = [
+            # (descrição, alteração, concursos afetados)
+            ('item do mapa', lambda: MapaAssunto.objects.get(pk=mapa.pk).save(), [0]),
+            ('metadado', lambda: MetadadosAssunto.objects.get(mapa_assunto=mapa).save(), [0]),
+            ('metadado removido', lambda: metadados_removidos.delete(), [1]),
+            ('sigla', lambda: Concurso.objects.filter(pk=self.concursos[2].pk).update(sigla='C9'), [2]),
+            ('assunto', lambda: Assunto.objects.get(pk=self.assunto.pk).save(), [0, 1, 2]),
+            ('subassunto', lambda: Subassunto.objects.get(pk=self.subassunto.pk).save(), [0, 1, 2]),
+            ('disciplina', lambda: Disciplina.objects.get(pk=self.assunto.disciplina_id).save(), [0, 1, 2]),
+            ('novo item', lambda: MapaAssunto.objects.create(
+                concurso=concurso, extra_cursinho=True, nome_extra='Revisão', ordem=2
+            ), [0]),
+        ]
+        for descricao, alterar, afetados in alteracoes:
+            antes = impressoes()
+            alterar()
+            depois = impressoes()
+            self.assertEqual(
+                [indice for indice in range(3) if antes[indice] != depois[indice]], afetados, descricao
+            )
+
+        # Conteúdo novo não vem do cache
+        cache_status, conteudo = exportar()
+        self.assertEqual(cache_status, 'MISS')
+        workbook = openpyxl.load_workbook(io.BytesIO(conteudo), read_only=True)
+        self.assertEqual(
+            [linha[1] for linha in workbook['C0'].iter_rows(min_row=2, values_only=True)],
+            ['Controle de Constitucionalidade - ADI', 'Revisão']
+        )
+        workbook.close()
+        self.assertEqual(exportar()[0], 'HIT')
+
+    def test_detalhe_acompanha_o_criador(self):
+        ConcursoDetalheCacheService.cache().limpar()
+        url = f'/api/concursos/{self.concursos[0].pk}/'
+        self.assertEqual(self.client.get(url)['X-Concurso-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Concurso-Cache'], 'HIT')
+
+        # O e-mail do criador é renderizado, mas alterá-lo não muda o concurso
+        User.objects.filter(pk=self.admin.pk).update(email='gestor@exemplo.com')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Concurso-Cache'], 'MISS')
+        self.assertEqual(response.json()['criado_por_email'], 'gestor@exemplo.com')
+
+        # Alterações na matriz chegam pela versão, sem consultar as tabelas dela
+        Assunto.objects.get(pk=self.assunto.pk).save()
+        self.assertEqual(self.client.get(url)['X-Concurso-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url)['X-Concurso-Cache'], 'HIT')
+        tabelas = (Disciplina._meta.db_table, Assunto._meta.db_table, Subassunto._meta.db_table)
+        self.assertFalse([q['sql'] for q in consultas if any(f'"{t}"' in q['sql'] for t in tabelas)])
+
+    def test_exportar_lote_exige_admin(self):
+        self.assertEqual(self.client.get('/api/concursos/exportar-lote/').status_code, 403)
+
+        self.client.force_authenticate(self.aluno)
+        response = self.client.get('/api/concursos/exportar-lote/')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('erro', response.json())
+
+    def test_exportar_lote(self):
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get('/api/concursos/exportar-lote/?ids=' + ','.join(
+            str(concurso.pk) for concurso in self.concursos[:2]
+        ))
+        self.assertEqual(response.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as arquivo:
+            self.assertEqual(sorted(arquivo.namelist()), ['C0_tutory.xlsx', 'C1_tutory.xlsx'])
+
+        with self.settings(EXPORTACAO_LOTE_MAXIMO_CONCURSOS=2):
+            response = self.client.get('/api/concursos/exportar-lote/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('no máximo 2', response.json()['erro'])
+
+        self.assertEqual(self.client.get('/api/concursos/exportar-lote/?ids=0').status_code, 404)
+        self.assertEqual(self.client.get('/api/concursos/exportar-lote/?ids=x').status_code, 400)
+
+
+class ExportacaoEmProcessosTests(TransactionTestCase):
+    """Exportação em lote com mais de um processo, lendo o banco de teste nos filhos"""
+
+    def setUp(self):
+        disciplina = Disciplina.objects.create(nome='Direito Constitucional')
+        assunto = Assunto.objects.create(disciplina=disciplina, nome='Controle de Constitucionalidade')
+        for indice in range(ExportacaoLoteService.MINIMO_PARALELO):
+            concurso = Concurso.objects.create(nome=f'Concurso {indice}', sigla=f'C{indice}')
+            for ordem in range(indice + 1):
+                mapa = MapaAssunto.objects.create(
+                    concurso=concurso, assunto=assunto, ordem=ordem, item_edital=f'{indice}.{ordem}'
+                )
+                MetadadosAssunto.objects.create(mapa_assunto=mapa, minutos_regular='25.00')
+
+    def _abas(self, arquivo):
+        workbook = openpyxl.load_workbook(arquivo, read_only=True)
+        abas = {nome: list(workbook[nome].iter_rows(values_only=True)) for nome in workbook.sheetnames}
+        workbook.close()
+        return abas
+
+    def _planilhas(self, arquivo):
+        with zipfile.ZipFile(arquivo) as arquivo_zip:
+            return {nome: self._abas(io.BytesIO(arquivo_zip.read(nome))) for nome in arquivo_zip.namelist()}
+
+    def test_mesmo_resultado_com_varios_processos(self):
+        concursos = Concurso.objects.all()
+        with patch.object(processos, 'obter_pool', wraps=processos.obter_pool) as pool:
+            planilha = self._abas(ExportacaoLoteService(processos=2).exportar(concursos, 'xlsx'))
+            planilhas = self._planilhas(ExportacaoLoteService(processos=2).exportar(concursos, 'zip'))
+        self.assertEqual(pool.call_count, 2)
+
+        self.assertEqual(planilha, self._abas(ExportacaoLoteService(processos=1).exportar(concursos, 'xlsx')))
+        self.assertEqual(planilhas, self._planilhas(ExportacaoLoteService(processos=1).exportar(concursos, 'zip')))
+        self.assertEqual(len(planilha['C7']), 9)
+
+        # O pool é reaproveitado entre as exportações
+        self.assertIs(processos.obter_pool(2), processos.obter_pool(2))
+
+
+class BuscaTests(TestCase):
+    """Índice de busca (BuscaService), /api/busca/ e ?search= das viewsets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin@exemplo.com', 'senha', is_admin=True)
+        cls.disciplina = Disciplina.objects.create(nome='Direito Administrativo')
+        cls.assunto = Assunto.objects.create(disciplina=cls.disciplina, nome='Licitações e Contratos')
+        cls.subassunto = Subassunto.objects.create(assunto=cls.assunto, nome='Dispensa de Licitação')
+        outra = Disciplina.objects.create(nome='Língua Portuguesa')
+        Assunto.objects.create(disciplina=outra, nome='Concordância Verbal')
+        cls.concurso = Concurso.objects.create(nome='TCU 2025', sigla='TCU')
+        cls.mapa = MapaAssunto.objects.create(
+            concurso=cls.concurso, assunto=cls.assunto, extra_cursinho=True,
+            nome_extra='Revisão de licitação', item_edital='4.1'
+        )
+        MapaAssunto.objects.create(concurso=cls.concurso, assunto=cls.assunto, subassunto=cls.subassunto)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _buscar(self, **params):
+        response = self.client.get('/api/busca/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(r['tipo'], r['nome']) for r in response.json()['resultados']]
+
+    def test_busca_sem_acentos(self):
+        self.assertEqual(
+            {tipo for tipo, _ in self._buscar(q='LICITACAO')}, {'subassunto', 'mapa'}
+        )
+
+        response = self.client.get('/api/busca/', {'q': 'licitaç'})
+        resultados = response.json()['resultados']
+
+        self.assertEqual(
+            {(r['tipo'], r['id']) for r in resultados},
+            {('assunto', self.assunto.pk), ('subassunto', self.subassunto.pk), ('mapa', self.mapa.pk)}
+        )
+        relevancias = [r['relevancia'] for r in resultados]
+        self.assertEqual(relevancias, sorted(relevancias, reverse=True))
+
+        por_tipo = {r['tipo']: r for r in resultados}
+        self.assertEqual(por_tipo['assunto']['disciplina']['nome'], 'Direito Administrativo')
+        self.assertEqual(por_tipo['subassunto']['assunto']['nome'], 'Licitações e Contratos')
+        self.assertEqual(por_tipo['mapa']['nome'], 'Revisão de licitação')
+        self.assertEqual(por_tipo['mapa']['concurso'], {'id': self.concurso.pk, 'sigla': 'TCU'})
+
+        # Prefixo das palavras, todos os termos precisam casar
+        self.assertEqual(self._buscar(q='concord verb'), [('assunto', 'Concordância Verbal')])
+        self.assertEqual(self._buscar(q='concordancia nominal'), [])
+        self.assertEqual(self._buscar(q='licitação', tipos='subassunto'), [('subassunto', 'Dispensa de Licitação')])
+        self.assertEqual(len(self._buscar(q='licitacao', limite=1)), 1)
+
+    def test_parametros_invalidos(self):
+        for params in ({}, {'q': ' ?! '}, {'q': 'lei', 'tipos': 'concurso'}, {'q': 'lei', 'limite': 'x'}):
+            response = self.client.get('/api/busca/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('erro', response.json())
+
+    def test_indice_acompanha_alteracoes(self):
+        self.client.patch(f'/api/assuntos/{self.assunto.pk}/', {'nome': 'Improbidade'}, format='json')
+        self.assertEqual(self._buscar(q='licitacoes', tipos='assunto'), [])
+        self.assertEqual(self._buscar(q='improbidade'), [('assunto', 'Improbidade')])
+
+        self.client.patch(
+            f'/api/mapas/{self.mapa.pk}/',
+            {'assunto': self.assunto.pk, 'extra_cursinho': False, 'nome_extra': '', 'item_edital': ''},
+            format='json'
+        )
+        self.assertEqual(self._buscar(q='revisao'), [])
+
+        self.client.delete(f'/api/disciplinas/{self.disciplina.pk}/')
+        self.assertEqual(self._buscar(q='improbidade dispensa administrativo'), [])
+        self.assertFalse(IndiceBusca.objects.filter(texto__contains='administrativo').exists())
+
+    def test_reindexar(self):
+        total = IndiceBusca.objects.count()
+        IndiceBusca.objects.filter(tipo__in=('assunto', 'mapa')).delete()
+        IndiceBusca.objects.filter(tipo='disciplina').update(texto='desatualizado')
+
+        estatisticas = BuscaService.reindexar()
+
+        self.assertEqual(estatisticas, {'criadas': 3, 'atualizadas': 2, 'removidas': 0})
+        self.assertEqual(IndiceBusca.objects.count(), total)
+        self.assertEqual(BuscaService.reindexar(), {'criadas': 0, 'atualizadas': 0, 'removidas': 0})
+
+        # Operações em massa também mantêm o índice
+        ConcursoDuplicacaoService().duplicar(self.concurso, 'TCU 2026')
+        self.assertEqual(len(self._buscar(q='revisao', tipos='mapa')), 2)
+
+    def test_filtro_de_busca(self):
+        def nomes(url):
+            return sorted(linha.get('nome') or linha['nome_completo'] for linha in self.client.get(url).json())
+
+        self.assertEqual(nomes('/api/assuntos/?search=licitacoes'), ['Licitações e Contratos'])
+        # Pelo nome da disciplina, como em search_fields
+        self.assertEqual(nomes('/api/assuntos/?search=administrativo'), ['Licitações e Contratos'])
+        self.assertEqual(nomes('/api/subassuntos/?search=dispensa licitacao'), ['Dispensa de Licitação'])
+        self.assertEqual(nomes('/api/subassuntos/?search=dispensa concordancia'), [])
+        self.assertEqual(
+            nomes('/api/mapas/?search=licitacoes'),
+            ['Licitações e Contratos - Dispensa de Licitação', 'Revisão de licitação']
+        )
+        self.assertEqual(nomes('/api/mapas/?search=4.1'), ['Revisão de licitação'])
+        self.assertEqual(nomes('/api/disciplinas/?search=lingua'), ['Língua Portuguesa'])
+
+    def test_filtro_usa_o_indice(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('plano de consulta do SQLite')
+
+        request = Request(APIRequestFactory().get('/api/subassuntos/', {'search': 'licitacao'}))
+        queryset = BuscaIndexadaFilter().filter_queryset(request, Subassunto.objects.all(), SubassuntoViewSet())
+        plano = queryset.explain()
+
+        self.assertIn('core_indicebusca_fts VIRTUAL TABLE', plano)
+        self.assertNotRegex(plano, r'SCAN (core_subassunto|core_assunto)\b')
+        self.assertEqual(list(queryset), [self.subassunto])
+
+
+class CacheLRUTests(SimpleTestCase):
+    """Cache em memória limitado por tamanho (core.cache.CacheLRU)"""
+
+    def test_acertos_e_falhas(self):
+        cache_lru = CacheLRU(100)
+        self.assertIsNone(cache_lru.obter('a'))
+        self.assertTrue(cache_lru.guardar('a', b'x' * 10))
+        self.assertEqual(cache_lru.obter('a'), b'x' * 10)
+        self.assertEqual(cache_lru.obter('a'), b'x' * 10)
+
+        self.assertEqual(cache_lru.estatisticas(), {
+            'entradas': 1, 'tamanho': 10, 'tamanho_maximo': 100,
+            'acertos': 2, 'falhas': 1, 'descartes': 0, 'taxa_acerto': 0.6667,
+        })
+
+        # Regravar a chave substitui o valor e o tamanho
+        cache_lru.guardar('a', b'y' * 30)
+        self.assertEqual(cache_lru.obter('a'), b'y' * 30)
+        self.assertEqual(cache_lru.estatisticas()['tamanho'], 30)
+
+        cache_lru.limpar()
+        self.assertIsNone(cache_lru.obter('a'))
+        self.assertEqual(cache_lru.estatisticas()['tamanho'], 0)
+        self.assertEqual(cache_lru.estatisticas()['falhas'], 2)
+
+    def test_descarte_lru(self):
+        cache_lru = CacheLRU(30, tamanho_maximo_entrada=20)
+        for chave in 'abc':
+            cache_lru.guardar(chave, chave.encode() * 10)
+
+        # 'a' lida por último: 'b' é a entrada usada há mais tempo
+        cache_lru.obter('a')
+        cache_lru.guardar('d', b'd' * 10)
+        self.assertIsNone(cache_lru.obter('b'))
+        self.assertEqual([chave for chave in 'acd' if cache_lru.obter(chave)], ['a', 'c', 'd'])
+
+        # Uma entrada maior descarta quantas forem necessárias
+        cache_lru.guardar('e', b'e' * 20)
+        self.assertEqual([chave for chave in 'acde' if cache_lru.obter(chave)], ['d', 'e'])
+        self.assertEqual(cache_lru.estatisticas()['descartes'], 3)
+        self.assertEqual(cache_lru.estatisticas()['tamanho'], 30)
+
+        # Valores acima do limite por entrada não são guardados nem descartam nada
+        self.assertFalse(cache_lru.guardar('f', b'f' * 21))
+        self.assertIsNone(cache_lru.obter('f'))
+        self.assertEqual(cache_lru.estatisticas()['entradas'], 2)
+
+
+class RenderizacaoJSONTests(SimpleTestCase):
+    """JSONRapidoRenderer/JSONRapidoParser devem equivaler aos do DRF"""
+
+    DADOS = {
+        'texto': 'Legislação \u2028 seca',
+        'lazy': gettext_lazy('Concurso'),
+        'decimal': decimal.Decimal('12.50'),
+        'data_hora': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'data_hora_local': timezone.localtime(
+            datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone.utc)
+        ),
+        'data': datetime.date(2024, 5, 1),
+        'hora': datetime.time(8, 15, 30, 250000),
+        'uuid': uuid.UUID(int=1),
+        'lista': (1, 2.5, None, True),
+        'por_id': {1: {'peso': 2}, 2: {'peso': 3}},
+    }
+
+    def test_mesmo_json_do_drf(self):
+        corpo = JSONRapidoRenderer().render(self.DADOS)
+        esperado = json.loads(JSONRenderer().render(self.DADOS))
+
+        # Decimal como string, igual aos DecimalField (COERCE_DECIMAL_TO_STRING)
+        esperado['decimal'] = '12.50'
+        self.assertEqual(json.loads(corpo), esperado)
+        self.assertIn(b'"2024-05-01T12:30:15.123456Z"', corpo)
+        self.assertIn(b'\\u2028', corpo)
+
+    def test_floats_nao_finitos(self):
+        dados = {'nan': float('nan'), 'infinito': float('inf'), 'negativo': float('-inf'), 'peso': 2.5}
+        self.assertEqual(
+            json.loads(JSONRapidoRenderer().render(dados)),
+            {'nan': None, 'infinito': None, 'negativo': None, 'peso': 2.5}
+        )
+
+        # O DRF, em modo estrito, recusa os mesmos valores
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(dados)
+
+    def test_colunar(self):
+        linhas = [
+            {'id': i, 'disciplina_nome': 'Direito' if i < 3 else 'Português',
+             'metadados': None if i == 1 else {'dica': 'Revisar', 'peso': i}}
+            for i in range(5)
+        ]
+        colunar = codificar_colunar(linhas)
+
+        self.assertEqual(colunar['colunas']['id'], [0, 1, 2, 3, 4])
+        self.assertEqual(colunar['colunas']['disciplina_nome'], {
+            'dicionario': ['Direito', 'Português'], 'indices': [0, 0, 0, 1, 1]
+        })
+        self.assertEqual(colunar['colunas']['metadados']['nulos'], [1])
+        self.assertEqual(_decodificar_colunar(colunar), linhas)
+
+    def test_fallback_para_json_da_biblioteca_padrao(self):
+        dados = {'grande': 2**70, 'lista': [1]}
+        self.assertEqual(JSONRapidoRenderer().render(dados), JSONRenderer().render(dados))
+
+    def test_indentacao(self):
+        corpo = JSONRapidoRenderer().render(
+            {'a': [1]}, 'application/json; indent=4'
+        )
+        self.assertEqual(corpo, JSONRenderer().render({'a': [1]}, 'application/json; indent=4'))
+
+    def test_parser(self):
+        corpo = JSONRenderer().render([{'peso_resumos': 2, 'dica': 'Revisão'}])
+
+        self.assertEqual(
+            JSONRapidoParser().parse(io.BytesIO(corpo)),
+            JSONParser().parse(io.BytesIO(corpo))
+        )
+        for invalido in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                JSONRapidoParser().parse(io.BytesIO(invalido))
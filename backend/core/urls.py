@@ -2,7 +2,7 @@
 URLs da API REST do sistema de mapas de estudos.
 """
 
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     DisciplinaViewSet,
@@ -11,7 +11,11 @@ from .views import (
     ConcursoViewSet,
     MapaAssuntoViewSet,
     MetadadosAssuntoViewSet,
-    MatrizImportView
+    TarefaViewSet,
+    MatrizImportacaoViewSet,
+    MatrizImportView,
+    MatrizSnapshotView,
+    BuscaView
 )
 
 # Router para registrar os ViewSets
@@ -22,8 +26,16 @@ router.register(r'subassuntos', SubassuntoViewSet, basename='subassunto')
 router.register(r'concursos', ConcursoViewSet, basename='concurso')
 router.register(r'mapas', MapaAssuntoViewSet, basename='mapa')
 router.register(r'metadados', MetadadosAssuntoViewSet, basename='metadados')
+router.register(r'tarefas', TarefaViewSet, basename='tarefa')
+router.register(r'matriz/importacoes', MatrizImportacaoViewSet, basename='matriz-importacao')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('matriz/importar/', MatrizImportView.as_view(), name='matriz-importar'),
+    path('busca/', BuscaView.as_view(), name='busca'),
+    re_path(
+        r'^matriz/(?P<hash_conteudo>[0-9a-f]{64})/$',
+        MatrizSnapshotView.as_view(),
+        name='matriz-snapshot'
+    ),
 ]
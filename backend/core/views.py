@@ -10,18 +10,29 @@ from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.http import FileResponse, HttpResponse
+from django.db.models import prefetch_related_objects
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 import tempfile
 import os
 
+from .busca import BuscaIndexadaFilter
+from .compressao import resposta_precomprimida
 from .models import (
     Disciplina,
     Assunto,
     Subassunto,
     Concurso,
     MapaAssunto,
-    MetadadosAssunto
+    MetadadosAssunto,
+    Tarefa
 )
+from .otimizacao import otimizar_queryset
+from .pagination import CursorPaginacao
 from .serializers import (
     DisciplinaSerializer,
     DisciplinaListSerializer,
@@ -31,9 +42,26 @@ from .serializers import (
     ConcursoListSerializer,
     MapaAssuntoSerializer,
     MetadadosAssuntoSerializer,
+    MapaAssuntoLoteItemSerializer,
+    MapaAssuntoLoteRemocaoSerializer,
+    CamposDinamicosMixin,
+    TarefaSerializer,
     MatrizImportSerializer
 )
-from .services import MatrizImportService
+from .services import (
+    BuscaService,
+    MatrizImportService,
+    MatrizArvoreService,
+    MatrizSnapshotService,
+    ConcursoDetalheCacheService,
+    ExportacaoCacheService,
+    ExportacaoLoteService,
+    MapaAssuntoLoteService,
+    MetadadosConcursoService,
+    MetadadosLoteService,
+    ConcursoDuplicacaoService,
+    TarefaService
+)
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -52,7 +80,80 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_authenticated and request.user.is_admin
 
 
-class DisciplinaViewSet(viewsets.ModelViewSet):
+def _etag_corresponde(request, etag):
+    """Verifica se `etag` está no cabeçalho If-None-Match da requisição"""
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return '*' in etags or etag in [e.removeprefix('W/') for e in etags]
+
+
+def _resposta_snapshot(request, hash_conteudo, corpo, cache_control):
+    """
+    Resposta HTTP para um snapshot da matriz.
+    
+    Retorna 304 quando o cliente já tem o snapshot `hash_conteudo`; senão,
+    o corpo ou a variante comprimida guardada ao lado dele no cache.
+    """
+    etag = f'"{hash_conteudo}"'
+    
+    if _etag_corresponde(request, etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = resposta_precomprimida(
+            request, corpo,
+            lambda codificacao: MatrizSnapshotService.obter_variante(hash_conteudo, corpo, codificacao)
+        )
+        # Variantes comprimidas são outra representação: ETag fraco, como no GZipMiddleware
+        if response.has_header('Content-Encoding'):
+            etag = f'W/{etag}'
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    response['X-Matriz-Hash'] = hash_conteudo
+    # O snapshot é só a representação JSON; outros formatos (Accept) são montados na hora
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+class ConsultaOtimizadaMixin:
+    """
+    Monta os select_related e Prefetch da consulta a partir do serializer
+    da ação (ver core.otimizacao), sem consultas adicionais por registro.
+    
+    Aplicado em ACOES_OTIMIZADAS; outras ações que serializam registros
+    usam `otimizar_queryset()`. Com ?fields= ou ?expand= (ver
+    CamposDinamicosMixin), carrega também só as colunas usadas.
+    """
+    ACOES_OTIMIZADAS = ('list', 'retrieve', 'update', 'partial_update')
+    
+    def campos_dinamicos_pedidos(self):
+        """Se a requisição (de leitura) escolhe os campos da resposta"""
+        parametros = self.request.query_params
+        return self.request.method in permissions.SAFE_METHODS and (
+            CamposDinamicosMixin.PARAMETRO_CAMPOS in parametros or
+            CamposDinamicosMixin.PARAMETRO_EXPANDIR in parametros
+        )
+    
+    def otimizar_queryset(self, queryset, many=None):
+        """Aplica a `queryset` o plano de consulta do serializer da ação"""
+        if many is None:
+            many = self.action == 'list'
+        serializer = self.get_serializer(many=many)
+        return otimizar_queryset(queryset, serializer, restringir_colunas=self.campos_dinamicos_pedidos())
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.ACOES_OTIMIZADAS:
+            queryset = self.otimizar_queryset(queryset)
+        return queryset
+    
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        # O update descarta os prefetches do registro; recarrega para a resposta
+        if getattr(serializer.instance, '_prefetched_objects_cache', None):
+            serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+
+class DisciplinaViewSet(ConsultaOtimizadaMixin, viewsets.ModelViewSet):
     """
     ViewSet para Disciplinas da Matriz.
     
@@ -64,8 +165,9 @@ class DisciplinaViewSet(viewsets.ModelViewSet):
     """
     queryset = Disciplina.objects.all()
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    filter_backends = [BuscaIndexadaFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ['nome']
+    busca_indexada = {'disciplina': 'pk'}
     ordering_fields = ['ordem', 'nome', 'created_at']
     ordering = ['ordem', 'nome']
     filterset_fields = ['ativa']
@@ -73,46 +175,98 @@ class DisciplinaViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         """Usa serializer completo para incluir assuntos aninhados"""
         return DisciplinaSerializer
+    
+    def otimizar_queryset(self, queryset, many=None):
+        # Sem ?fields=/?expand=, list e retrieve montam a árvore com MatrizArvoreService
+        if self.action in ('list', 'retrieve') and not self.campos_dinamicos_pedidos():
+            return queryset
+        return super().otimizar_queryset(queryset, many)
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Lista a matriz completa em modo árvore.
+        
+        Sem filtros e no formato padrão (JSON), serve o snapshot
+        pré-computado da versão atual da matriz, com ETag forte e resposta
+        304 para If-None-Match. Com filtros ou outro formato, monta a mesma
+        árvore de DisciplinaSerializer com três consultas (disciplinas,
+        assuntos e subassuntos), sem N+1. Com ?fields= ou ?expand=, usa o
+        serializer com os campos escolhidos.
+        """
+        if self.campos_dinamicos_pedidos():
+            return super().list(request, *args, **kwargs)
+        
+        renderer = request.accepted_renderer
+        if not request.query_params and renderer.format == 'json' and \
+                request.accepted_media_type == renderer.media_type:
+            hash_conteudo, corpo = MatrizSnapshotService.etag_atual(), None
+            if not _etag_corresponde(request, f'"{hash_conteudo}"'):
+                hash_conteudo, corpo = MatrizSnapshotService.snapshot_atual()
+            return _resposta_snapshot(request, hash_conteudo, corpo, 'no-cache')
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(MatrizArvoreService().montar(queryset))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Detalhes de uma disciplina em modo árvore"""
+        if self.campos_dinamicos_pedidos():
+            return super().retrieve(request, *args, **kwargs)
+        
+        disciplina = self.get_object()
+        arvore = MatrizArvoreService().montar(Disciplina.objects.filter(pk=disciplina.pk))
+        return Response(arvore[0])
 
 
-class AssuntoViewSet(viewsets.ModelViewSet):
+class AssuntoViewSet(ConsultaOtimizadaMixin, viewsets.ModelViewSet):
     """
     ViewSet para Assuntos da Matriz.
     
-    Permite filtrar por disciplina.
+    Permite filtrar por disciplina. Paginação opcional por cursor
+    (?page_size=, ver CursorPaginacao).
     """
     queryset = Assunto.objects.select_related('disciplina').all()
     serializer_class = AssuntoSerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    pagination_class = CursorPaginacao
+    ordenacao_cursor = ('disciplina_id', 'ordem', 'nome', 'id')
+    filter_backends = [BuscaIndexadaFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ['nome', 'disciplina__nome']
+    busca_indexada = {'assunto': 'pk', 'disciplina': 'disciplina_id'}
     ordering_fields = ['ordem', 'nome', 'created_at']
     ordering = ['disciplina', 'ordem', 'nome']
     filterset_fields = ['disciplina', 'ativo']
 
 
-class SubassuntoViewSet(viewsets.ModelViewSet):
+class SubassuntoViewSet(ConsultaOtimizadaMixin, viewsets.ModelViewSet):
     """
     ViewSet para Subassuntos da Matriz.
     
-    Permite filtrar por assunto e disciplina.
+    Permite filtrar por assunto e disciplina. Paginação opcional por cursor
+    (?page_size=, ver CursorPaginacao).
     """
     queryset = Subassunto.objects.select_related('assunto', 'assunto__disciplina').all()
     serializer_class = SubassuntoSerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    pagination_class = CursorPaginacao
+    ordenacao_cursor = ('assunto_id', 'ordem', 'nome', 'id')
+    filter_backends = [BuscaIndexadaFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ['nome', 'assunto__nome']
+    busca_indexada = {'subassunto': 'pk', 'assunto': 'assunto_id'}
     ordering_fields = ['ordem', 'nome', 'created_at']
     ordering = ['assunto', 'ordem', 'nome']
     filterset_fields = ['assunto', 'assunto__disciplina', 'ativo']
 
 
-class ConcursoViewSet(viewsets.ModelViewSet):
+class ConcursoViewSet(ConsultaOtimizadaMixin, viewsets.ModelViewSet):
     """
     ViewSet para Concursos.
     
     Endpoints adicionais:
     - duplicate: Duplica um concurso existente
+    - exportar: Exporta um concurso para o formato Tutory
+    - exportar-lote: Exporta vários concursos (.zip ou .xlsx com várias abas)
+    - exportacao-cache: Estatísticas do cache de exportação (admins)
+    - metadados: Metadados de todos os itens do mapa, em lote
     """
     queryset = Concurso.objects.all()
     permission_classes = [IsAdminOrReadOnly]
@@ -120,7 +274,7 @@ class ConcursoViewSet(viewsets.ModelViewSet):
     search_fields = ['nome', 'sigla', 'cursinho']
     ordering_fields = ['ordem', 'nome', 'created_at']
     ordering = ['ordem', '-created_at']
-    filterset_fields = ['tipo', 'ativo']
+    filterset_fields = ['tipo', 'ativo', 'cursinho']
     
     def get_serializer_class(self):
         """Usa serializer simplificado para listagem"""
@@ -128,6 +282,45 @@ class ConcursoViewSet(viewsets.ModelViewSet):
             return ConcursoListSerializer
         return ConcursoSerializer
     
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalhes do concurso, com o mapa completo aninhado.
+        
+        No formato padrão (JSON, sem ?fields=/?expand=), o corpo e as suas
+        variantes gzip/brotli são servidos do cache enquanto o conteúdo não
+        mudar (ver ConcursoDetalheCacheService): repetições custam apenas a
+        consulta da impressão digital.
+        """
+        renderer = request.accepted_renderer
+        if self.campos_dinamicos_pedidos() or renderer.format != 'json' or \
+                request.accepted_media_type != renderer.media_type:
+            return super().retrieve(request, *args, **kwargs)
+        
+        # O mapa aninhado só é carregado (prefetch) se o corpo não estiver no cache
+        queryset = self.filter_queryset(self.get_queryset())
+        prefetches = queryset._prefetch_related_lookups
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        concurso = get_object_or_404(
+            queryset.prefetch_related(None), **{self.lookup_field: kwargs[lookup]}
+        )
+        self.check_object_permissions(request, concurso)
+        
+        def renderizar():
+            prefetch_related_objects([concurso], *prefetches)
+            dados = self.get_serializer(concurso).data
+            return renderer.render(dados, request.accepted_media_type, self.get_renderer_context())
+        
+        chave = ConcursoDetalheCacheService.chave(concurso)
+        corpo, acerto = ConcursoDetalheCacheService.obter_corpo(chave, renderizar)
+        
+        response = resposta_precomprimida(
+            request, corpo,
+            lambda codificacao: ConcursoDetalheCacheService.obter_variante(chave, corpo, codificacao),
+            content_type=renderer.media_type
+        )
+        response['X-Concurso-Cache'] = 'HIT' if acerto else 'MISS'
+        return response
+    
     def perform_create(self, serializer):
         """Salva o usuário que criou o concurso"""
         serializer.save(criado_por=self.request.user)
@@ -138,55 +331,33 @@ class ConcursoViewSet(viewsets.ModelViewSet):
         Duplica um concurso existente.
         
         POST /api/concursos/{id}/duplicate/
-        Body: { "novo_nome": "Nome do novo concurso" }
+        Body: { "novo_nome": "Nome do novo concurso", "assincrono": false }
+        
+        Com "assincrono": true, a duplicação roda em segundo plano e a
+        resposta (202) traz a tarefa para acompanhamento em /api/tarefas/{id}/.
         """
         concurso_original = self.get_object()
         novo_nome = request.data.get('novo_nome', f"{concurso_original.nome} (Cópia)")
         
-        # Criar novo concurso
-        novo_concurso = Concurso.objects.create(
-            nome=novo_nome,
-            sigla=concurso_original.sigla,
-            tipo=concurso_original.tipo,
-            cursinho=concurso_original.cursinho,
-            ordem=concurso_original.ordem,
-            criado_por=request.user
-        )
+        if Concurso.objects.filter(nome=novo_nome, sigla=concurso_original.sigla).exists():
+            return Response(
+                {'novo_nome': 'Já existe um concurso com este nome e sigla'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Copiar mapas de assuntos
-        mapas_originais = MapaAssunto.objects.filter(concurso=concurso_original)
-        for mapa in mapas_originais:
-            novo_mapa = MapaAssunto.objects.create(
-                concurso=novo_concurso,
-                assunto=mapa.assunto,
-                subassunto=mapa.subassunto,
-                ordem=mapa.ordem,
-                item_edital=mapa.item_edital,
-                extra_cursinho=mapa.extra_cursinho,
-                nome_extra=mapa.nome_extra
+        if str(request.data.get('assincrono', '')).lower() in ('true', '1'):
+            tarefa = TarefaService.enfileirar(
+                'duplicar_concurso',
+                {'concurso': concurso_original.pk, 'novo_nome': novo_nome},
+                request.user
             )
-            
-            # Copiar metadados se existirem (formato Tutory)
-            if hasattr(mapa, 'metadados'):
-                MetadadosAssunto.objects.create(
-                    mapa_assunto=novo_mapa,
-                    paginas_minutos=mapa.metadados.paginas_minutos,
-                    minutos_expresso=mapa.metadados.minutos_expresso,
-                    minutos_regular=mapa.metadados.minutos_regular,
-                    minutos_calma=mapa.metadados.minutos_calma,
-                    dica=mapa.metadados.dica,
-                    dica_revisoes=mapa.metadados.dica_revisoes,
-                    dica_questoes=mapa.metadados.dica_questoes,
-                    referencia=mapa.metadados.referencia,
-                    peso_resumos=mapa.metadados.peso_resumos,
-                    peso_revisoes=mapa.metadados.peso_revisoes,
-                    peso_questoes=mapa.metadados.peso_questoes,
-                    numero_questoes=mapa.metadados.numero_questoes,
-                    link_estudo=mapa.metadados.link_estudo,
-                    link_resumo=mapa.metadados.link_resumo,
-                    link_questoes=mapa.metadados.link_questoes,
-                    suplementar=mapa.metadados.suplementar
-                )
+            return Response(TarefaSerializer(tarefa).data, status=status.HTTP_202_ACCEPTED)
+        
+        novo_concurso = ConcursoDuplicacaoService().duplicar(
+            concurso_original, novo_nome, request.user
+        )
+        
+        novo_concurso = self.otimizar_queryset(Concurso.objects.all()).get(pk=novo_concurso.pk)
         
         serializer = self.get_serializer(novo_concurso)
         return Response(serializer.data)
@@ -197,54 +368,334 @@ class ConcursoViewSet(viewsets.ModelViewSet):
         Exporta um concurso para o formato Tutory (Excel).
         
         GET /api/concursos/{id}/exportar/
-        """
-        from django.http import HttpResponse
-        from .services import ExportacaoTutoryService
         
+        A planilha é gerada em um arquivo temporário e enviada em blocos.
+        Planilhas já geradas para o mesmo conteúdo do mapa são servidas do
+        cache (cabeçalho X-Exportacao-Cache: HIT ou MISS).
+        """
         concurso = self.get_object()
         
-        service = ExportacaoTutoryService()
-        output = service.exportar_concurso(concurso)
+        output, acerto = ExportacaoCacheService.exportar(concurso)
         
-        response = HttpResponse(
-            output.read(),
+        response = FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'{concurso.sigla}_tutory.xlsx',
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = f'attachment; filename="{concurso.sigla}_tutory.xlsx"'
+        response['X-Exportacao-Cache'] = 'HIT' if acerto else 'MISS'
+        return response
+    
+    @action(detail=False, methods=['get'], url_path='exportacao-cache')
+    def exportacao_cache(self, request):
+        """
+        Estatísticas do cache de exportação deste processo do servidor.
+        
+        GET /api/concursos/exportacao-cache/
+        """
+        if not (request.user.is_authenticated and request.user.is_admin):
+            return Response(
+                {'erro': 'Apenas administradores podem consultar o cache'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response(ExportacaoCacheService.estatisticas())
+    
+    @action(detail=True, methods=['get'])
+    def metadados(self, request, pk=None):
+        """
+        Metadados de todos os itens do mapa, indexados pelo ID do item.
+        
+        GET /api/concursos/{id}/metadados/
+        GET /api/concursos/{id}/metadados/?desde=2025-03-01T12:00:00Z
+        
+        Resposta: {"concurso": 1, "atualizado_em": "...", "metadados": {"<mapa_id>": {...}}}
+        
+        Com `desde` (por exemplo, o `atualizado_em` da leitura anterior),
+        traz apenas os metadados alterados depois. Envia ETag e responde
+        304 para If-None-Match quando nada mudou.
+        """
+        concurso = self.get_object()
+        
+        desde = request.query_params.get('desde')
+        if desde:
+            desde = parse_datetime(desde)
+            if desde is None:
+                return Response(
+                    {'desde': 'Data/hora inválida (use ISO 8601)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
+        hash_conteudo, ultima_alteracao = MetadadosConcursoService.etag(concurso.pk, desde)
+        etag = f'"{hash_conteudo}"'
+        
+        if _etag_corresponde(request, etag):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                'concurso': concurso.pk,
+                'atualizado_em': MetadadosConcursoService.formatar_data_hora(ultima_alteracao),
+                'metadados': MetadadosConcursoService.ler(concurso.pk, desde),
+            })
+        
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
         return response
+    
+    @action(detail=False, methods=['get'], url_path='exportar-lote')
+    def exportar_lote(self, request):
+        """
+        Exporta vários concursos para o formato Tutory de uma vez.
+        
+        GET /api/concursos/exportar-lote/?ids=1,2,3
+        GET /api/concursos/exportar-lote/?cursinho=X&tipo=GRAD&formato=xlsx
+        
+        Aceita os mesmos filtros da listagem. Com formato=zip (padrão), gera
+        um .zip com uma planilha por concurso; com formato=xlsx, uma única
+        planilha com uma aba por concurso.
+        
+        Apenas admins, com no máximo EXPORTACAO_LOTE_MAXIMO_CONCURSOS
+        concursos por requisição (a exportação usa um pool de processos).
+        """
+        if not (request.user.is_authenticated and request.user.is_admin):
+            return Response(
+                {'erro': 'Apenas administradores podem exportar concursos em lote'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        concursos = self.filter_queryset(self.get_queryset())
+        
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                concursos = concursos.filter(pk__in=[int(pk) for pk in ids.split(',') if pk.strip()])
+            except ValueError:
+                return Response(
+                    {'ids': 'Informe IDs numéricos separados por vírgula'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        formato = request.query_params.get('formato', 'zip')
+        if formato not in ExportacaoLoteService.FORMATOS:
+            return Response(
+                {'formato': "Use 'zip' ou 'xlsx'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        total = concursos.count()
+        if not total:
+            return Response(
+                {'erro': 'Nenhum concurso encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        maximo = ExportacaoLoteService.maximo_concursos()
+        if total > maximo:
+            return Response(
+                {'erro': f'{total} concursos selecionados; exporte no máximo {maximo} por vez (use ?ids= ou filtros)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        output = ExportacaoLoteService().exportar(concursos, formato)
+        
+        if formato == 'zip':
+            content_type = 'application/zip'
+        else:
+            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'concursos_tutory.{formato}',
+            content_type=content_type
+        )
 
 
-class MapaAssuntoViewSet(viewsets.ModelViewSet):
+class MapaAssuntoViewSet(ConsultaOtimizadaMixin, viewsets.ModelViewSet):
     """
     ViewSet para Mapas de Assuntos.
     
-    Permite filtrar por concurso.
+    Permite filtrar por concurso. Paginação opcional por cursor
+    (?page_size=, ver CursorPaginacao).
     """
     queryset = MapaAssunto.objects.select_related(
         'concurso', 'assunto', 'subassunto', 'assunto__disciplina'
     ).all()
     serializer_class = MapaAssuntoSerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    pagination_class = CursorPaginacao
+    ordenacao_cursor = ('concurso_id', 'ordem', 'id')
+    filter_backends = [BuscaIndexadaFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ['assunto__nome', 'nome_extra', 'item_edital']
+    busca_indexada = {'mapa': 'pk', 'assunto': 'assunto_id'}
     ordering_fields = ['ordem', 'created_at']
     ordering = ['concurso', 'ordem']
     filterset_fields = ['concurso', 'extra_cursinho']
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Cria vários itens de mapa em uma única requisição.
+        
+        POST /api/mapas/bulk/
+        Body: [{ "concurso": 1, "assunto": 10, "subassunto": 20 }, ...]
+        
+        Itens já presentes no mapa (mesmo concurso, assunto e subassunto)
+        são ignorados. A ordem é atribuída pelo servidor.
+        """
+        itens_serializer = MapaAssuntoLoteItemSerializer(data=request.data, many=True)
+        itens_serializer.is_valid(raise_exception=True)
+        
+        resultado = MapaAssuntoLoteService().criar(itens_serializer.validated_data)
+        if resultado['erros']:
+            return Response({'erros': resultado['erros']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        criados = self.otimizar_queryset(self.get_queryset(), many=True).filter(
+            pk__in=[mapa.pk for mapa in resultado['criados']]
+        ).order_by('concurso', 'ordem')
+        
+        return Response({
+            'criados': self.get_serializer(criados, many=True).data,
+            'ignorados': resultado['ignorados']
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """
+        Remove vários itens de um mapa em uma única requisição.
+        
+        POST /api/mapas/bulk-delete/
+        Body: { "concurso": 1, "assuntos": [10, 11] }
+           ou { "concurso": 1, "disciplina": 3 }
+           ou { "concurso": 1, "ids": [100, 101] }
+        
+        Os metadados dos itens também são removidos. Retorna os IDs removidos.
+        """
+        filtro_serializer = MapaAssuntoLoteRemocaoSerializer(data=request.data)
+        filtro_serializer.is_valid(raise_exception=True)
+        filtro = filtro_serializer.validated_data
+        
+        removidos = MapaAssuntoLoteService().remover(
+            filtro['concurso'],
+            ids=filtro.get('ids'),
+            assunto_ids=filtro.get('assuntos'),
+            disciplina_id=filtro.get('disciplina')
+        )
+        
+        return Response({'removidos': removidos})
 
 
-class MetadadosAssuntoViewSet(viewsets.ModelViewSet):
+class MetadadosAssuntoViewSet(ConsultaOtimizadaMixin, viewsets.ModelViewSet):
     """
     ViewSet para Metadados dos Assuntos.
     
-    Permite filtrar por mapa de assunto e concurso.
+    Permite filtrar por mapa de assunto e concurso. Paginação opcional por
+    cursor (?page_size=, ver CursorPaginacao), na ordem dos mapas.
     """
     queryset = MetadadosAssunto.objects.select_related('mapa_assunto', 'mapa_assunto__concurso').all()
     serializer_class = MetadadosAssuntoSerializer
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = CursorPaginacao
+    ordenacao_cursor = ('mapa_assunto__concurso_id', 'mapa_assunto__ordem', 'id')
     filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
     ordering_fields = ['paginas_minutos', 'peso_resumos', 'peso_questoes']
     filterset_fields = ['mapa_assunto', 'mapa_assunto__concurso', 'suplementar']
+    
+    @action(detail=False, methods=['patch'])
+    def bulk(self, request):
+        """
+        Cria ou atualiza os metadados de vários itens de mapa (edição em grade).
+        
+        PATCH /api/metadados/bulk/
+        Body: [{ "mapa_assunto": 10, "paginas_minutos": 30, "peso_resumos": 2 }, ...]
+        
+        Cada linha traz apenas os campos alterados. Todas as linhas são
+        validadas antes de gravar; com qualquer erro, nada é gravado e a
+        resposta (400) traz os erros por índice da linha. Retorna os
+        metadados gravados no formato de /api/concursos/{id}/metadados/.
+        """
+        if not isinstance(request.data, list) or not request.data:
+            return Response(
+                {'erro': 'Envie uma lista com as linhas a gravar'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        resultado = MetadadosLoteService().gravar(request.data)
+        if resultado['erros']:
+            return Response({'erros': resultado['erros']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        gravados = MetadadosConcursoService.formatar(MetadadosAssunto.objects.filter(
+            mapa_assunto_id__in=resultado['criados'] + resultado['atualizados']
+        ))
+        
+        return Response({
+            'criados': len(resultado['criados']),
+            'atualizados': len(resultado['atualizados']),
+            'metadados': gravados
+        })
+
+
+class TarefaViewSet(ConsultaOtimizadaMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet para acompanhamento de Tarefas em segundo plano (polling).
+    
+    Admins veem todas as tarefas; demais usuários, apenas as próprias.
+    """
+    queryset = Tarefa.objects.all()
+    serializer_class = TarefaSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['tipo', 'estado']
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_admin:
+            queryset = queryset.filter(criado_por=self.request.user)
+        return queryset
+
+
+class MatrizImportacaoViewSet(ConsultaOtimizadaMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet para importações da matriz em segundo plano.
+    
+    POST /api/matriz/importacoes/ (multipart: arquivo, limpar_existente, substituir)
+        Guarda a planilha e responde 202 com a tarefa criada.
+    GET /api/matriz/importacoes/{id}/
+        Estado, progresso (linhas processadas por aba) e, ao final,
+        estatísticas, avisos e erros em `resultado`. Com a leitura em
+        paralelo (IMPORTACAO_MAX_PROCESSOS > 1, planilha grande e com muitas
+        abas), o progresso da leitura avança por bloco de abas, não a cada
+        linha.
+    
+    Apenas admins podem importar e consultar importações.
+    """
+    queryset = Tarefa.objects.filter(tipo='importar_matriz')
+    serializer_class = TarefaSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        if not self.request.user.is_admin:
+            return Tarefa.objects.none()
+        return super().get_queryset()
+    
+    def create(self, request):
+        if not request.user.is_admin:
+            return Response(
+                {'erro': 'Apenas administradores podem importar a matriz'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = MatrizImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        tarefa = MatrizImportService.enfileirar(
+            serializer.validated_data['arquivo'],
+            serializer.validated_data.get('limpar_existente', False),
+            request.user,
+            serializer.validated_data.get('substituir', False)
+        )
+        return Response(TarefaSerializer(tarefa).data, status=status.HTTP_202_ACCEPTED)
 
 
 class MatrizImportView(APIView):
@@ -253,6 +704,9 @@ class MatrizImportView(APIView):
     
     POST /api/matriz/importar/
     
+    A importação roda dentro da requisição; para planilhas grandes, use
+    /api/matriz/importacoes/ (segundo plano, com progresso).
+    
     Apenas admins podem importar.
     """
     permission_classes = [permissions.IsAuthenticated]
@@ -264,6 +718,10 @@ class MatrizImportView(APIView):
         Body (multipart/form-data):
         - arquivo: Arquivo Excel (.xlsx)
         - limpar_existente: Boolean (opcional, default=False)
+        - substituir: Boolean (opcional, default=False). Torna a matriz igual
+          ao arquivo, mantendo IDs e mapas dos itens que continuam nele
+        - simular: Boolean (opcional, default=False). Se True, nada é gravado;
+          a resposta traz as diferenças entre a planilha e a matriz atual
         """
         # Verificar se é admin
         if not request.user.is_admin:
@@ -279,6 +737,8 @@ class MatrizImportView(APIView):
         
         arquivo = serializer.validated_data['arquivo']
         limpar_existente = serializer.validated_data.get('limpar_existente', False)
+        simular = serializer.validated_data.get('simular', False)
+        substituir = serializer.validated_data.get('substituir', False)
         
         # Salvar arquivo temporariamente
         with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
@@ -290,17 +750,28 @@ class MatrizImportView(APIView):
             # Executar importação
             service = MatrizImportService()
             
-            if limpar_existente:
-                service.limpar_matriz_existente()
+            if simular:
+                resultado = service.comparar_arquivo(tmp_path, limpar_existente, substituir)
+                return Response({
+                    'mensagem': 'Simulação concluída. Nenhuma alteração foi gravada.',
+                    'estatisticas': resultado['estatisticas'],
+                    'avisos': resultado['avisos'],
+                    'diferencas': resultado['diferencas']
+                }, status=status.HTTP_200_OK)
             
-            resultado = service.importar_arquivo(tmp_path)
+            resultado = service.importar_arquivo(tmp_path, limpar_existente, substituir)
             
             # Retornar resultado
             if resultado['sucesso']:
+                if resultado['arquivo_inalterado']:
+                    mensagem = 'Arquivo idêntico à última importação. Nada foi alterado.'
+                else:
+                    mensagem = 'Matriz importada com sucesso!'
                 return Response({
-                    'mensagem': 'Matriz importada com sucesso!',
+                    'mensagem': mensagem,
                     'estatisticas': resultado['estatisticas'],
-                    'avisos': resultado['avisos']
+                    'avisos': resultado['avisos'],
+                    'abas_ignoradas': resultado['abas_ignoradas']
                 }, status=status.HTTP_200_OK)
             else:
                 return Response({
@@ -324,3 +795,86 @@ class MatrizImportView(APIView):
             # Remover arquivo temporário
             if os.path.exists(tmp_path):
                 os.remove(tmp_path)
+
+
+class MatrizSnapshotView(APIView):
+    """
+    Snapshot imutável da matriz, endereçado pelo hash do conteúdo.
+    
+    GET /api/matriz/{hash}/
+    
+    O hash da versão atual é informado no cabeçalho X-Matriz-Hash de
+    GET /api/disciplinas/. Como o conteúdo de um hash nunca muda, a resposta
+    pode ser cacheada indefinidamente por navegadores e proxies.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+    
+    def get(self, request, hash_conteudo):
+        corpo = MatrizSnapshotService.obter_corpo(hash_conteudo)
+        
+        # Snapshots podem sair do cache; só o da versão atual é regenerado
+        if corpo is None:
+            hash_atual, corpo_atual = MatrizSnapshotService.snapshot_atual()
+            if hash_atual == hash_conteudo:
+                corpo = corpo_atual
+        
+        if corpo is None:
+            return Response(
+                {'erro': 'Versão da matriz não encontrada'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return _resposta_snapshot(
+            request, hash_conteudo, corpo, 'public, max-age=31536000, immutable'
+        )
+
+
+class BuscaView(APIView):
+    """
+    Busca na matriz e nos mapas, sem acentos e ordenada por relevância.
+    
+    GET /api/busca/?q=licitacao
+    
+    Query params:
+    - q: Termos da busca; cada um casa pelo início das palavras e todos
+      precisam casar
+    - tipos: Lista separada por vírgulas entre disciplina, assunto,
+      subassunto e mapa (opcional, default=todos)
+    - limite: Máximo de resultados (opcional, default=20, máximo 100)
+    
+    Resposta: {'q': ..., 'resultados': [{'tipo', 'id', 'nome', 'relevancia', ...}]}
+    Assuntos e subassuntos trazem a disciplina (e o assunto); itens de mapa,
+    o concurso e o item do edital. Ver BuscaService.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+    
+    def get(self, request):
+        texto = request.query_params.get('q', '')
+        if not BuscaService.termos(texto):
+            return Response(
+                {'erro': 'Informe o texto da busca (q)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        tipos = [tipo.strip() for tipo in request.query_params.get('tipos', '').split(',') if tipo.strip()]
+        invalidos = [tipo for tipo in tipos if tipo not in BuscaService.TIPOS]
+        if invalidos:
+            return Response(
+                {'erro': f'Tipos inválidos: {", ".join(invalidos)}. Use: {", ".join(BuscaService.TIPOS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limite = int(request.query_params.get('limite', BuscaService.LIMITE_PADRAO))
+        except ValueError:
+            limite = 0
+        if limite < 1:
+            return Response(
+                {'erro': 'limite deve ser um inteiro positivo'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'q': texto,
+            'resultados': BuscaService.buscar(texto, tipos or None, limite),
+        })
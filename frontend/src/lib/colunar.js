@@ -0,0 +1,47 @@
+// Formato colunar das listagens da API (core.renderers.ColunarJSONRenderer):
+// uma coluna por campo, com textos repetidos codificados por dicionário.
+// Bem menor que a lista de objetos nas listagens grandes (ex.: mapas).
+
+export const ACCEPT_COLUNAR = 'application/vnd.resumos.colunar+json';
+
+function decodificarColuna(coluna) {
+  if (Array.isArray(coluna)) return coluna;
+
+  if (coluna.dicionario) {
+    return coluna.indices.map((indice) => coluna.dicionario[indice]);
+  }
+
+  // Objetos aninhados (ex.: metadados)
+  const valores = decodificarColunar(coluna);
+  (coluna.nulos || []).forEach((indice) => {
+    valores[indice] = null;
+  });
+  return valores;
+}
+
+export function decodificarColunar(dados) {
+  // Respostas que não são listagens chegam em JSON normal
+  if (!dados || !dados.colunas) return dados;
+
+  const campos = Object.keys(dados.colunas);
+  const colunas = campos.map((campo) => decodificarColuna(dados.colunas[campo]));
+
+  const linhas = new Array(dados.linhas);
+  for (let i = 0; i < dados.linhas; i++) {
+    const linha = {};
+    campos.forEach((campo, j) => {
+      linha[campo] = colunas[j][i];
+    });
+    linhas[i] = linha;
+  }
+  return linhas;
+}
+
+// GET de uma listagem em formato colunar, devolvendo a lista de objetos
+export async function getColunar(api, url, config = {}) {
+  const response = await api.get(url, {
+    ...config,
+    headers: { ...config.headers, Accept: ACCEPT_COLUNAR },
+  });
+  return { ...response, data: decodificarColunar(response.data) };
+}
@@ -10,8 +10,10 @@ const BaseAssuntos = () => {
   const [expandedAssuntos, setExpandedAssuntos] = useState({});
   const [importando, setImportando] = useState(false);
   const [resultadoImportacao, setResultadoImportacao] = useState(null);
+  const [progressoImportacao, setProgressoImportacao] = useState(null);
   const [showImportModal, setShowImportModal] = useState(false);
   const [limparExistente, setLimparExistente] = useState(false);
+  const [substituir, setSubstituir] = useState(false);
   const fileInputRef = useRef(null);
 
   useEffect(() => {
@@ -48,29 +50,58 @@ const BaseAssuntos = () => {
     setResultadoImportacao(null);
   };
 
+  const aguardarImportacao = async (importacaoId) => {
+    // A importação roda em segundo plano; consultar o progresso até terminar
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 1000));
+      const response = await api.get(`/matriz/importacoes/${importacaoId}/`);
+      setProgressoImportacao(response.data.progresso);
+      if (['concluida', 'erro'].includes(response.data.estado)) {
+        return response.data;
+      }
+    }
+  };
+
   const handleFileSelect = async (e) => {
     const file = e.target.files[0];
     if (!file) return;
 
     setImportando(true);
     setResultadoImportacao(null);
+    setProgressoImportacao(null);
 
     const formData = new FormData();
     formData.append('arquivo', file);
     formData.append('limpar_existente', limparExistente);
+    formData.append('substituir', substituir);
 
     try {
-      const response = await api.post('/matriz/importar/', formData, {
+      const response = await api.post('/matriz/importacoes/', formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
       });
       
+      const importacao = await aguardarImportacao(response.data.id);
+      const resultado = importacao.resultado;
+      
+      if (importacao.estado === 'erro' || !resultado?.sucesso) {
+        setResultadoImportacao({
+          sucesso: false,
+          mensagem: importacao.erro || 'Importação concluída com erros',
+          erros: resultado?.erros || [],
+        });
+        return;
+      }
+      
       setResultadoImportacao({
         sucesso: true,
-        mensagem: response.data.mensagem,
-        estatisticas: response.data.estatisticas,
-        avisos: response.data.avisos || [],
+        mensagem: resultado.arquivo_inalterado
+          ? 'Arquivo idêntico à última importação. Nada foi alterado.'
+          : 'Matriz importada com sucesso!',
+        estatisticas: resultado.estatisticas,
+        avisos: resultado.avisos || [],
+        abasIgnoradas: resultado.abas_ignoradas || [],
       });
       
       // Recarregar disciplinas
@@ -251,7 +282,10 @@ const BaseAssuntos = () => {
                 <input
                   type="checkbox"
                   checked={limparExistente}
-                  onChange={(e) => setLimparExistente(e.target.checked)}
+                  onChange={(e) => {
+                    setLimparExistente(e.target.checked);
+                    if (e.target.checked) setSubstituir(false);
+                  }}
                   className="w-4 h-4 text-purple-600 rounded focus:ring-purple-500"
                 />
                 <span className="text-sm text-gray-700">
@@ -263,6 +297,25 @@ const BaseAssuntos = () => {
                   ⚠️ Isso irá remover todos os assuntos existentes!
                 </p>
               )}
+              <label className="flex items-center gap-2 cursor-pointer mt-2">
+                <input
+                  type="checkbox"
+                  checked={substituir}
+                  onChange={(e) => {
+                    setSubstituir(e.target.checked);
+                    if (e.target.checked) setLimparExistente(false);
+                  }}
+                  className="w-4 h-4 text-purple-600 rounded focus:ring-purple-500"
+                />
+                <span className="text-sm text-gray-700">
+                  Substituir a matriz pelo conteúdo do arquivo
+                </span>
+              </label>
+              {substituir && (
+                <p className="text-xs text-red-600 mt-1 ml-6">
+                  ⚠️ Itens ausentes do arquivo serão removidos, inclusive dos mapas dos concursos.
+                </p>
+              )}
             </div>
 
             <input
@@ -297,6 +350,9 @@ const BaseAssuntos = () => {
                         <li>• {resultadoImportacao.estatisticas.disciplinas_criadas} disciplinas criadas</li>
                         <li>• {resultadoImportacao.estatisticas.assuntos_criados} assuntos criados</li>
                         <li>• {resultadoImportacao.estatisticas.subassuntos_criados} subassuntos criados</li>
+                        {resultadoImportacao.abasIgnoradas?.length > 0 && (
+                          <li>• {resultadoImportacao.abasIgnoradas.length} abas sem alterações ignoradas</li>
+                        )}
                       </ul>
                     )}
                     {resultadoImportacao.avisos?.length > 0 && (
@@ -333,6 +389,9 @@ const BaseAssuntos = () => {
                   <>
                     <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-white"></div>
                     Importando...
+                    {progressoImportacao?.linhas_processadas > 0 && (
+                      <span>({progressoImportacao.linhas_processadas} linhas)</span>
+                    )}
                   </>
                 ) : (
                   <>
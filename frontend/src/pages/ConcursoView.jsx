@@ -2,8 +2,16 @@ import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { BookOpen, Clock, TrendingUp, FileText, ExternalLink } from 'lucide-react';
 import api from '../lib/axios';
+import { getColunar } from '../lib/colunar';
 import Navbar from '../components/Navbar';
 
+// Apenas os campos exibidos na página (ver ?fields= na API)
+const CAMPOS_CONCURSO = 'id,nome,sigla,cursinho,tipo_display';
+const CAMPOS_MAPA = [
+  'id', 'disciplina_nome', 'nome_completo', 'subassunto_nome', 'item_edital',
+  'link_resumos', 'link_questoes_cebraspe', 'link_questoes_fgv', 'dica',
+].join(',');
+
 const ConcursoView = () => {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -19,8 +27,8 @@ const ConcursoView = () => {
   const carregarDados = async () => {
     try {
       const [concursoRes, mapasRes] = await Promise.all([
-        api.get(`/concursos/${id}/`),
-        api.get(`/mapas/?concurso=${id}`)
+        api.get(`/concursos/${id}/?fields=${CAMPOS_CONCURSO}`),
+        getColunar(api, `/mapas/?concurso=${id}&fields=${CAMPOS_MAPA}`)
       ]);
       
       setConcurso(concursoRes.data);
@@ -2,10 +2,11 @@ import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { ChevronRight, ChevronDown, Plus, Trash2, Save, ArrowLeft, Search, Edit, X } from 'lucide-react';
 import api from '../lib/axios';
+import { getColunar } from '../lib/colunar';
 import Navbar from '../components/Navbar';
 
 // Componente Modal de Metadados
-const MetadadosModal = ({ mapa, onClose, onSave }) => {
+const MetadadosModal = ({ mapa, metadados, onClose, onSave }) => {
   const [formData, setFormData] = useState({
     paginas_minutos: 0,
     minutos_expresso: 0,
@@ -28,48 +29,36 @@ const MetadadosModal = ({ mapa, onClose, onSave }) => {
     relevancia: 'media',
     suplementar: false,
   });
-  const [loading, setLoading] = useState(true);
   const [salvando, setSalvando] = useState(false);
 
+  // Os metadados do mapa inteiro são carregados uma vez pela página
   useEffect(() => {
-    carregarMetadados();
-  }, [mapa.id]);
-
-  const carregarMetadados = async () => {
-    try {
-      const response = await api.get(`/metadados/?mapa_assunto=${mapa.id}`);
-      if (response.data.length > 0) {
-        const meta = response.data[0];
-        setFormData({
-          id: meta.id,
-          paginas_minutos: meta.paginas_minutos || 0,
-          minutos_expresso: meta.minutos_expresso || 0,
-          minutos_regular: meta.minutos_regular || 0,
-          minutos_calma: meta.minutos_calma || 0,
-          dica: meta.dica || '',
-          dica_revisoes: meta.dica_revisoes || '',
-          dica_questoes: meta.dica_questoes || '',
-          referencia: meta.referencia || '',
-          peso_resumos: meta.peso_resumos || 1,
-          peso_revisoes: meta.peso_revisoes || 1,
-          peso_questoes: meta.peso_questoes || 1,
-          numero_questoes: meta.numero_questoes || 0,
-          link_estrategia: meta.link_estrategia || '',
-          link_direcao: meta.link_direcao || '',
-          link_pdf: meta.link_pdf || '',
-          link_resumo: meta.link_resumo || '',
-          link_questoes: meta.link_questoes || '',
-          link_video: meta.link_video || '',
-          relevancia: meta.relevancia || 'media',
-          suplementar: meta.suplementar || false,
-        });
-      }
-    } catch (error) {
-      console.error('Erro ao carregar metadados:', error);
-    } finally {
-      setLoading(false);
+    if (metadados) {
+      setFormData({
+        id: metadados.id,
+        paginas_minutos: metadados.paginas_minutos || 0,
+        minutos_expresso: metadados.minutos_expresso || 0,
+        minutos_regular: metadados.minutos_regular || 0,
+        minutos_calma: metadados.minutos_calma || 0,
+        dica: metadados.dica || '',
+        dica_revisoes: metadados.dica_revisoes || '',
+        dica_questoes: metadados.dica_questoes || '',
+        referencia: metadados.referencia || '',
+        peso_resumos: metadados.peso_resumos || 1,
+        peso_revisoes: metadados.peso_revisoes || 1,
+        peso_questoes: metadados.peso_questoes || 1,
+        numero_questoes: metadados.numero_questoes || 0,
+        link_estrategia: metadados.link_estrategia || '',
+        link_direcao: metadados.link_direcao || '',
+        link_pdf: metadados.link_pdf || '',
+        link_resumo: metadados.link_resumo || '',
+        link_questoes: metadados.link_questoes || '',
+        link_video: metadados.link_video || '',
+        relevancia: metadados.relevancia || 'media',
+        suplementar: metadados.suplementar || false,
+      });
     }
-  };
+  }, [mapa.id, metadados]);
 
   const handleChange = (e) => {
     const { name, value, type, checked } = e.target;
@@ -83,37 +72,21 @@ const MetadadosModal = ({ mapa, onClose, onSave }) => {
     e.preventDefault();
     setSalvando(true);
     try {
-      const payload = {
-        ...formData,
-        mapa_assunto: mapa.id,
-      };
-      
-      if (formData.id) {
-        await api.put(`/metadados/${formData.id}/`, payload);
-      } else {
-        await api.post('/metadados/', payload);
-      }
+      // Cria ou atualiza pelo endpoint em lote (uma linha)
+      const { id: _id, ...campos } = formData;
+      await api.patch('/metadados/bulk/', [{ ...campos, mapa_assunto: mapa.id }]);
       
       onSave();
       onClose();
     } catch (error) {
       console.error('Erro ao salvar metadados:', error);
-      alert('Erro ao salvar metadados');
+      const erros = error.response?.data?.erros?.[0];
+      alert(erros ? Object.values(erros).join('\n') : 'Erro ao salvar metadados');
     } finally {
       setSalvando(false);
     }
   };
 
-  if (loading) {
-    return (
-      <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50">
-        <div className="bg-white rounded-xl p-8">
-          <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-purple-600 mx-auto"></div>
-        </div>
-      </div>
-    );
-  }
-
   return (
     <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50 p-4">
       <div className="bg-white rounded-xl shadow-xl max-w-4xl w-full max-h-[90vh] overflow-hidden flex flex-col">
@@ -335,6 +308,8 @@ const MapaAssuntos = () => {
   const [expandedDisciplinas, setExpandedDisciplinas] = useState({});
   const [expandedAssuntos, setExpandedAssuntos] = useState({});
   const [mapaParaEditar, setMapaParaEditar] = useState(null);
+  const [metadadosPorMapa, setMetadadosPorMapa] = useState({});
+  const [metadadosAtualizadoEm, setMetadadosAtualizadoEm] = useState(null);
   const [buscaEsquerda, setBuscaEsquerda] = useState('');
   const [buscaDireita, setBuscaDireita] = useState('');
 
@@ -344,15 +319,18 @@ const MapaAssuntos = () => {
 
   const carregarDados = async () => {
     try {
-      const [concursoRes, disciplinasRes, mapasRes] = await Promise.all([
-        api.get(`/concursos/${id}/`),
+      const [concursoRes, disciplinasRes, mapasRes, metadadosRes] = await Promise.all([
+        api.get(`/concursos/${id}/?fields=id,nome,sigla`),
         api.get('/disciplinas/'),
-        api.get(`/mapas/?concurso=${id}`)
+        getColunar(api, `/mapas/?concurso=${id}`),
+        api.get(`/concursos/${id}/metadados/`)
       ]);
       
       setConcurso(concursoRes.data);
       setDisciplinas(disciplinasRes.data);
       setMapas(mapasRes.data);
+      setMetadadosPorMapa(metadadosRes.data.metadados);
+      setMetadadosAtualizadoEm(metadadosRes.data.atualizado_em);
     } catch (error) {
       console.error('Erro ao carregar dados:', error);
     } finally {
@@ -360,6 +338,19 @@ const MapaAssuntos = () => {
     }
   };
 
+  // Busca apenas os metadados alterados desde a última leitura
+  const atualizarMetadados = async () => {
+    try {
+      const response = await api.get(`/concursos/${id}/metadados/`, {
+        params: metadadosAtualizadoEm ? { desde: metadadosAtualizadoEm } : {},
+      });
+      setMetadadosPorMapa(prev => ({ ...prev, ...response.data.metadados }));
+      setMetadadosAtualizadoEm(response.data.atualizado_em);
+    } catch (error) {
+      console.error('Erro ao atualizar metadados:', error);
+    }
+  };
+
   const toggleDisciplina = (disciplinaId) => {
     setExpandedDisciplinas(prev => ({
       ...prev,
@@ -409,37 +400,29 @@ const MapaAssuntos = () => {
     try {
       // Se está adicionando um assunto (não subassunto) que tem subassuntos,
       // adiciona todos os subassuntos automaticamente
+      let novosItens;
       if (!subassunto && assunto.subassuntos?.length > 0) {
-        const novosMapas = [];
-        let ordemAtual = mapas.length + 1;
-        
-        for (const sub of assunto.subassuntos) {
-          // Verifica se já não está no mapa
-          if (!isAssuntoNoMapa(assunto.id, sub.id)) {
-            const novoMapa = {
-              concurso: parseInt(id),
-              assunto: assunto.id,
-              subassunto: sub.id,
-              ordem: ordemAtual++,
-            };
-            const response = await api.post('/mapas/', novoMapa);
-            novosMapas.push(response.data);
-          }
-        }
-        
-        setMapas(prev => [...prev, ...novosMapas]);
+        novosItens = assunto.subassuntos
+          .filter(sub => !isAssuntoNoMapa(assunto.id, sub.id))
+          .map(sub => ({
+            concurso: parseInt(id),
+            assunto: assunto.id,
+            subassunto: sub.id,
+          }));
       } else {
-        // Lógica original para subassunto individual ou assunto sem subassuntos
-        const novoMapa = {
+        // Subassunto individual ou assunto sem subassuntos
+        novosItens = [{
           concurso: parseInt(id),
           assunto: assunto.id,
           subassunto: subassunto?.id || null,
-          ordem: mapas.length + 1,
-        };
-        
-        const response = await api.post('/mapas/', novoMapa);
-        setMapas(prev => [...prev, response.data]);
+        }];
       }
+      
+      if (novosItens.length === 0) return;
+      
+      // A ordem é atribuída pelo servidor
+      const response = await api.post('/mapas/bulk/', novosItens);
+      setMapas(prev => [...prev, ...response.data.criados]);
     } catch (error) {
       console.error('Erro ao adicionar ao mapa:', error);
       alert('Erro ao adicionar assunto ao mapa');
@@ -458,15 +441,14 @@ const MapaAssuntos = () => {
 
   const removerAssuntoCompletoDoMapa = async (assuntoId) => {
     try {
-      // Encontra todos os mapas desse assunto (incluindo subassuntos)
-      const mapasDoAssunto = mapas.filter(m => m.assunto === assuntoId);
-      
-      // Remove todos
-      for (const mapa of mapasDoAssunto) {
-        await api.delete(`/mapas/${mapa.id}/`);
-      }
+      // Remove todos os mapas desse assunto (incluindo subassuntos) de uma vez
+      const response = await api.post('/mapas/bulk-delete/', {
+        concurso: parseInt(id),
+        assuntos: [assuntoId],
+      });
       
-      setMapas(prev => prev.filter(m => m.assunto !== assuntoId));
+      const removidos = new Set(response.data.removidos);
+      setMapas(prev => prev.filter(m => !removidos.has(m.id)));
     } catch (error) {
       console.error('Erro ao remover assuntos do mapa:', error);
       alert('Erro ao remover assuntos do mapa');
@@ -475,40 +457,35 @@ const MapaAssuntos = () => {
 
   const adicionarDisciplinaAoMapa = async (disciplina) => {
     try {
-      const novosMapas = [];
-      let ordemAtual = mapas.length + 1;
+      const novosItens = [];
       
       for (const assunto of disciplina.assuntos || []) {
         if (assunto.subassuntos?.length > 0) {
           // Adiciona todos os subassuntos
           for (const sub of assunto.subassuntos) {
             if (!isAssuntoNoMapa(assunto.id, sub.id)) {
-              const novoMapa = {
+              novosItens.push({
                 concurso: parseInt(id),
                 assunto: assunto.id,
                 subassunto: sub.id,
-                ordem: ordemAtual++,
-              };
-              const response = await api.post('/mapas/', novoMapa);
-              novosMapas.push(response.data);
+              });
             }
           }
-        } else {
+        } else if (!isAssuntoNoMapa(assunto.id)) {
           // Adiciona o assunto sem subassuntos
-          if (!isAssuntoNoMapa(assunto.id)) {
-            const novoMapa = {
-              concurso: parseInt(id),
-              assunto: assunto.id,
-              subassunto: null,
-              ordem: ordemAtual++,
-            };
-            const response = await api.post('/mapas/', novoMapa);
-            novosMapas.push(response.data);
-          }
+          novosItens.push({
+            concurso: parseInt(id),
+            assunto: assunto.id,
+            subassunto: null,
+          });
         }
       }
       
-      setMapas(prev => [...prev, ...novosMapas]);
+      if (novosItens.length === 0) return;
+      
+      // Uma única requisição para a disciplina inteira
+      const response = await api.post('/mapas/bulk/', novosItens);
+      setMapas(prev => [...prev, ...response.data.criados]);
     } catch (error) {
       console.error('Erro ao adicionar disciplina ao mapa:', error);
       alert('Erro ao adicionar disciplina ao mapa');
@@ -517,18 +494,14 @@ const MapaAssuntos = () => {
 
   const removerDisciplinaDoMapa = async (disciplina) => {
     try {
-      // Encontra todos os IDs de assuntos da disciplina
-      const assuntoIds = disciplina.assuntos?.map(a => a.id) || [];
-      
-      // Encontra todos os mapas dessa disciplina
-      const mapasDaDisciplina = mapas.filter(m => assuntoIds.includes(m.assunto));
-      
-      // Remove todos
-      for (const mapa of mapasDaDisciplina) {
-        await api.delete(`/mapas/${mapa.id}/`);
-      }
+      // Remove todos os mapas dessa disciplina em uma única requisição
+      const response = await api.post('/mapas/bulk-delete/', {
+        concurso: parseInt(id),
+        disciplina: disciplina.id,
+      });
       
-      setMapas(prev => prev.filter(m => !assuntoIds.includes(m.assunto)));
+      const removidos = new Set(response.data.removidos);
+      setMapas(prev => prev.filter(m => !removidos.has(m.id)));
     } catch (error) {
       console.error('Erro ao remover disciplina do mapa:', error);
       alert('Erro ao remover disciplina do mapa');
@@ -835,8 +808,9 @@ const MapaAssuntos = () => {
       {mapaParaEditar && (
         <MetadadosModal
           mapa={mapaParaEditar}
+          metadados={metadadosPorMapa[mapaParaEditar.id]}
           onClose={() => setMapaParaEditar(null)}
-          onSave={() => carregarDados()}
+          onSave={() => atualizarMetadados()}
         />
       )}
     </div>